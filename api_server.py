@@ -3,7 +3,9 @@
 API Server for Xpedia Parts Scrapers.
 
 This script provides a REST API interface to trigger scrapers remotely.
-Uses Python's built-in http.server module instead of Flask.
+Uses Python's built-in http.server module instead of Flask. Requests are handled on
+one thread per connection, up to API_MAX_CONNECTIONS connections, with HTTP/1.1
+keep-alive. Large payloads are streamed with chunked transfer encoding.
 """
 
 import os
@@ -13,7 +15,7 @@ import uuid
 import threading
 import time
 from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import parse_qs, urlparse
 
 # Add the project root to Python path to ensure modules can be found
@@ -23,6 +25,7 @@ if project_root not in sys.path:
 
 # Import scraper modules
 from src.scrapers.lkq.runner import start_lkq_scraper, in_memory_jobs
+from src.common.utils.metrics import REGISTRY
 
 # Store running jobs
 running_jobs = {}
@@ -31,45 +34,167 @@ running_jobs = {}
 jobs = {}
 products = {}
 
+# Maximum number of simultaneous client connections
+MAX_CONNECTIONS = int(os.environ.get("API_MAX_CONNECTIONS", 64))
+
+# Seconds an idle keep-alive connection is kept open
+KEEP_ALIVE_TIMEOUT = int(os.environ.get("API_KEEP_ALIVE_TIMEOUT", 15))
+
+# Target size of each chunk in streamed responses
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Page sizes for GET /api/jobs/<job_id>/products
+DEFAULT_PRODUCTS_PAGE_SIZE = 100
+MAX_PRODUCTS_PAGE_SIZE = 1000
+
+# Products fetched per step when streaming a job's products
+PRODUCTS_STREAM_BATCH_SIZE = 1000
+
+# Seconds to wait for PostgreSQL when product queries first need it
+DB_CONNECT_TIMEOUT = int(os.environ.get("API_DB_CONNECT_TIMEOUT", 5))
+
+# Seconds before retrying after the database could not be reached
+DB_RETRY_INTERVAL = 60
+
+# Database modules for jobs whose products are not in memory (None until connected)
+_products_db = None
+_products_db_failed_at = None
+_products_db_lock = threading.Lock()
+
+
+def get_products_db():
+    """
+    Connect to the database on first use, so the API server starts without PostgreSQL.
+    
+    The connection is tested with a timeout and without the sudo fallback, so a request
+    handler never waits on sudo. A failure is remembered for DB_RETRY_INTERVAL seconds
+    instead of being retried on every request.
+    
+    Returns:
+        tuple: (database module, session module), or None if the database is unavailable.
+    """
+    global _products_db, _products_db_failed_at
+    with _products_db_lock:
+        if _products_db is None and (
+            _products_db_failed_at is None or time.monotonic() - _products_db_failed_at >= DB_RETRY_INTERVAL
+        ):
+            try:
+                from src.common.database import database, session
+                session.init_engine(connect_timeout=DB_CONNECT_TIMEOUT, allow_sudo=False)
+                _products_db = (database, session)
+            except Exception as e:
+                print(f"Database unavailable for product queries: {e}")
+                _products_db_failed_at = time.monotonic()
+    return _products_db
+
+
+class InvalidRequest(ValueError):
+    """Raised for malformed query parameters; reported to the client as a 400 response."""
+
+
+class BoundedThreadingHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer that stops accepting connections while max_connections are open."""
+    
+    daemon_threads = True
+    
+    def __init__(self, server_address, handler_class, max_connections=MAX_CONNECTIONS):
+        super().__init__(server_address, handler_class)
+        self.connection_slots = threading.BoundedSemaphore(max_connections)
+    
+    def process_request(self, request, client_address):
+        # Blocks the accept loop until a connection slot is free
+        self.connection_slots.acquire()
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self.connection_slots.release()
+            raise
+    
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self.connection_slots.release()
+
+
 class ScraperAPIHandler(BaseHTTPRequestHandler):
     """HTTP request handler for the Scraper API."""
     
-    def _set_headers(self, status_code=200, content_type='application/json'):
+    # Keep connections open between requests; every response sets Content-Length or is chunked
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEP_ALIVE_TIMEOUT
+    
+    def _set_headers(self, status_code=200, content_type='application/json', content_length=0, chunked=False):
         """Set response headers."""
         self.send_response(status_code)
         self.send_header('Content-type', content_type)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        elif content_length is not None:
+            self.send_header('Content-Length', str(content_length))
+        else:
+            # Body length unknown: it ends when the connection is closed
+            self.close_connection = True
+            self.send_header('Connection', 'close')
         self.end_headers()
     
+    def _discard_request_body(self):
+        """Read any request body so the next request on a keep-alive connection starts cleanly."""
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > 0:
+            self.rfile.read(length)
+    
+    def _read_json_body(self):
+        """Read the request body as a JSON object ({} when the body is empty)."""
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            return {}
+        body = self.rfile.read(length)
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise InvalidRequest("request body must be JSON")
+        if not isinstance(data, dict):
+            raise InvalidRequest("request body must be a JSON object")
+        return data
+    
     def do_OPTIONS(self):
         """Handle OPTIONS requests for CORS."""
+        self._discard_request_body()
         self._set_headers()
     
     def do_GET(self):
         """Handle GET requests."""
         parsed_url = urlparse(self.path)
         path = parsed_url.path
+        query = parse_qs(parsed_url.query)
+        ndjson = query.get('format', [''])[0] == 'ndjson'
         
         # Health check endpoint
         if path == '/api/health':
             self._handle_health_check()
         
+        # Prometheus metrics endpoint
+        elif path == '/api/metrics':
+            self._handle_metrics()
+        
         # List scrapers endpoint
         elif path == '/api/scrapers':
             self._handle_list_scrapers()
         
         # List jobs endpoint
         elif path == '/api/jobs':
-            self._handle_list_jobs()
+            self._handle_list_jobs(ndjson)
         
         # Get job status endpoint
         elif path.startswith('/api/jobs/'):
             if '/products' in path:
                 # Get products for a specific job
                 job_id = path.split('/api/jobs/')[1].split('/products')[0]
-                self._handle_get_job_products(job_id)
+                self._handle_get_job_products(job_id, query, ndjson)
             else:
                 # Get job status
                 job_id = path.split('/api/jobs/')[1]
@@ -77,7 +202,7 @@ class ScraperAPIHandler(BaseHTTPRequestHandler):
                 
         # Debug endpoint to see all stored products
         elif path == '/api/debug/products':
-            self._handle_debug_products()
+            self._handle_debug_products(ndjson)
             
         # Debug endpoint to see all stored jobs
         elif path == '/api/debug/jobs':
@@ -98,6 +223,7 @@ class ScraperAPIHandler(BaseHTTPRequestHandler):
         
         # Unknown endpoint
         else:
+            self._discard_request_body()
             self._handle_not_found()
     
     def _handle_health_check(self):
@@ -109,6 +235,12 @@ class ScraperAPIHandler(BaseHTTPRequestHandler):
         }
         self._send_json_response(response)
     
+    def _handle_metrics(self):
+        """Handle metrics endpoint in the Prometheus text exposition format."""
+        body = REGISTRY.render().encode('utf-8')
+        self._set_headers(200, 'text/plain; version=0.0.4; charset=utf-8', len(body))
+        self.wfile.write(body)
+    
     def _handle_list_scrapers(self):
         """Handle list scrapers endpoint."""
         response = {
@@ -124,21 +256,30 @@ class ScraperAPIHandler(BaseHTTPRequestHandler):
         }
         self._send_json_response(response)
     
-    def _handle_list_jobs(self):
-        """Handle GET /jobs endpoint to list all jobs."""
+    def _job_summary(self, job_id, job):
+        """Build the public summary of an in-memory job."""
+        return {
+            "job_id": job_id,
+            "scraper_name": job.get("scraper_name"),
+            "status": job.get("status"),
+            "total_products": job.get("total_products", 0),
+            "start_time": self._json_serial(job.get("start_time")),
+            "end_time": self._json_serial(job.get("end_time")),
+            "execution_time": job.get("execution_time", 0)
+        }
+    
+    def _handle_list_jobs(self, ndjson=False):
+        """Handle GET /jobs endpoint to list all jobs (one JSON object per line with ?format=ndjson)."""
         try:
+            # Snapshot the jobs so scraper threads can keep adding entries while we respond
+            job_items = list(in_memory_jobs.items())
+            
+            if ndjson:
+                self._send_ndjson_response(self._job_summary(job_id, job) for job_id, job in job_items)
+                return
+            
             # Get all jobs from in-memory storage
-            jobs_list = []
-            for job_id, job in in_memory_jobs.items():
-                jobs_list.append({
-                    "job_id": job_id,
-                    "scraper_name": job.get("scraper_name"),
-                    "status": job.get("status"),
-                    "total_products": job.get("total_products", 0),
-                    "start_time": self._json_serial(job.get("start_time")),
-                    "end_time": self._json_serial(job.get("end_time")),
-                    "execution_time": job.get("execution_time", 0)
-                })
+            jobs_list = [self._job_summary(job_id, job) for job_id, job in job_items]
             
             response = {
                 "status": "success",
@@ -165,16 +306,7 @@ class ScraperAPIHandler(BaseHTTPRequestHandler):
                 
             # Then check in-memory jobs
             if job_id in in_memory_jobs:
-                job = in_memory_jobs[job_id]
-                job_dict = {
-                    "job_id": job_id,
-                    "scraper_name": job.get("scraper_name"),
-                    "status": job.get("status"),
-                    "total_products": job.get("total_products", 0),
-                    "start_time": self._json_serial(job.get("start_time")),
-                    "end_time": self._json_serial(job.get("end_time")),
-                    "execution_time": job.get("execution_time", 0)
-                }
+                job_dict = self._job_summary(job_id, in_memory_jobs[job_id])
                 
                 self._send_json_response({
                     "status": "success",
@@ -194,29 +326,50 @@ class ScraperAPIHandler(BaseHTTPRequestHandler):
                 "message": f"Error getting job: {str(e)}"
             }, 500)
     
-    def _handle_get_job_products(self, job_id):
-        """Handle GET /job/<job_id>/products endpoint to get products for a job."""
+    def _handle_get_job_products(self, job_id, query=None, ndjson=False):
+        """
+        Handle GET /job/<job_id>/products endpoint to get products for a job.
+        
+        Products are paged with ?limit=N (default 100, at most 1000) and ?cursor=<next_cursor
+        from the previous page>. With ?format=ndjson every product of the job is streamed, one
+        per line, reading a batch at a time. Jobs this process knows about are answered from
+        memory, even before their first products are flushed; other jobs are read from PostgreSQL.
+        """
+        query = query or {}
         try:
-            # Get products from the scraper's in-memory storage
-            from src.scrapers.lkq.scraper import in_memory_products
-            job_products = in_memory_products.get(job_id, [])
+            from src.scrapers.lkq.scraper import product_store
+            if job_id in product_store or job_id in running_jobs or job_id in in_memory_jobs:
+                source = "memory"
+            else:
+                # Checked before touching the database, so a mistyped ID never connects
+                try:
+                    uuid.UUID(job_id)
+                except ValueError:
+                    raise InvalidRequest("job_id must be a UUID")
+                if get_products_db():
+                    source = "database"
+                else:
+                    self._send_json_response({
+                        "status": "success",
+                        "message": f"No products found for job {job_id}",
+                        "products": [],
+                        "next_cursor": None
+                    })
+                    return
             
-            if job_products:
-                response = {
-                    "status": "success",
-                    "job_id": job_id,
-                    "product_count": len(job_products),
-                    "products": job_products[:10],  # Limit to 10 products for response size
-                    "note": "Only showing first 10 products for performance" if len(job_products) > 10 else ""
-                }
+            if ndjson:
+                self._send_raw_ndjson_response(self._iter_job_products(job_id, source))
+                return
+            
+            limit = self._parse_limit(query)
+            cursor = query.get('cursor', [None])[0]
+            if source == "memory":
+                response, products = self._memory_products_page(job_id, limit, cursor)
             else:
-                response = {
-                    "status": "success",
-                    "message": f"No products found for job {job_id}",
-                    "products": []
-                }
-                
-            self._send_json_response(response)
+                response, products = self._database_products_page(job_id, limit, cursor)
+            self._send_products_page(response, products)
+        except InvalidRequest as e:
+            self._send_json_response({"status": "error", "message": str(e)}, 400)
         except Exception as e:
             print(f"Error getting products for job: {e}")
             self._send_json_response({
@@ -224,15 +377,113 @@ class ScraperAPIHandler(BaseHTTPRequestHandler):
                 "message": f"Error getting products for job: {str(e)}"
             }, 500)
     
-    def _handle_debug_products(self):
-        """Handle GET /debug/products endpoint to list all products (for debugging only)."""
+    def _parse_limit(self, query):
+        """Read the page size from ?limit=N, clamped to MAX_PRODUCTS_PAGE_SIZE."""
+        try:
+            limit = int(query.get('limit', [DEFAULT_PRODUCTS_PAGE_SIZE])[0])
+        except ValueError:
+            raise InvalidRequest("limit must be an integer")
+        if limit < 1:
+            raise InvalidRequest("limit must be positive")
+        return min(limit, MAX_PRODUCTS_PAGE_SIZE)
+    
+    def _memory_products_page(self, job_id, limit, cursor):
+        """
+        Get one page of a job's in-memory products.
+        
+        The cursor is the position of the next product; products are only appended to a
+        job's list, so positions stay valid while the job is still running.
+        
+        Returns:
+            tuple: (response fields, products as JSON bytes)
+        """
+        from src.scrapers.lkq.scraper import product_store
+        try:
+            start = int(cursor) if cursor else 0
+        except ValueError:
+            raise InvalidRequest("cursor must come from a previous page's next_cursor")
+        if start < 0:
+            raise InvalidRequest("cursor must come from a previous page's next_cursor")
+        
+        total = product_store.count(job_id)
+        page = product_store.get_raw_range(job_id, start, start + limit)
+        end = start + len(page)
+        return {
+            "status": "success",
+            "job_id": job_id,
+            "source": "memory",
+            "product_count": total,
+            "next_cursor": str(end) if end < total else None
+        }, page
+    
+    def _database_products_page(self, job_id, limit, cursor):
+        """
+        Get one page of a job's products from PostgreSQL.
+        
+        Uses keyset pagination on product_id, so the cursor is the last product_id returned
+        and each page costs one index range scan however deep it is.
+        
+        Returns:
+            tuple: (response fields, products as JSON text)
+        """
+        database, session_module = get_products_db()
+        try:
+            if cursor:
+                uuid.UUID(cursor)
+        except ValueError:
+            raise InvalidRequest("cursor must come from a previous page's next_cursor")
+        
+        session = session_module.get_session()
+        try:
+            page, next_cursor = database.get_products_page(session, job_id, limit, cursor, raw=True)
+        finally:
+            session_module.close_session(session)
+        return {
+            "status": "success",
+            "job_id": job_id,
+            "source": "database",
+            "next_cursor": next_cursor
+        }, [data for _, data in page]
+    
+    def _iter_job_products(self, job_id, source):
+        """Yield every product of a job as JSON, holding at most one batch in memory."""
+        if source == "memory":
+            from src.scrapers.lkq.scraper import product_store
+            yield from product_store.iter_raw(job_id, PRODUCTS_STREAM_BATCH_SIZE)
+            return
+        
+        database, session_module = get_products_db()
+        session = session_module.get_session()
+        try:
+            for _, data in database.iter_products(session, job_id, PRODUCTS_STREAM_BATCH_SIZE, raw=True):
+                yield data
+        finally:
+            session_module.close_session(session)
+    
+    def _handle_debug_products(self, ndjson=False):
+        """
+        Handle GET /debug/products endpoint to list all products (for debugging only).
+        
+        Returns a preview by default; with ?format=ndjson every stored product is streamed,
+        one {"job_id", "product_data"} object per line.
+        """
         try:
-            # Get products from the scraper's in-memory storage
-            from src.scrapers.lkq.scraper import in_memory_products
+            # Get products from the scraper's product store
+            from src.scrapers.lkq.scraper import product_store
+            
+            if ndjson:
+                job_ids = product_store.job_ids()
+                self._send_ndjson_response(
+                    {"job_id": job_id, "product_data": product}
+                    for job_id in job_ids
+                    for product in product_store.iter_products(job_id, PRODUCTS_STREAM_BATCH_SIZE)
+                )
+                return
             
             all_products = []
-            for job_id, products_list in in_memory_products.items():
-                for product in products_list[:5]:  # Only include first 5 from each job
+            job_ids = product_store.job_ids()
+            for job_id in job_ids:
+                for product in product_store.get_range(job_id, 0, 5):  # Only include first 5 from each job
                     all_products.append({
                         "job_id": job_id,
                         "product_data": product
@@ -240,7 +491,7 @@ class ScraperAPIHandler(BaseHTTPRequestHandler):
             
             response = {
                 "status": "success",
-                "total_products_in_memory": sum(len(products) for products in in_memory_products.values()),
+                "total_products_in_memory": sum(product_store.count(job_id) for job_id in job_ids),
                 "products_preview": all_products[:20],  # Limit to 20 products total
                 "note": "Limited product preview for performance"
             }
@@ -253,18 +504,35 @@ class ScraperAPIHandler(BaseHTTPRequestHandler):
             }, 500)
     
     def _handle_debug_jobs(self):
-        """Handle debug jobs endpoint."""
+        """Handle debug jobs endpoint. The full job dump is streamed rather than built in memory."""
+        jobs_snapshot = dict(in_memory_jobs)
         response = {
-            "total_jobs": len(in_memory_jobs),
-            "job_ids": list(in_memory_jobs.keys()),
-            "jobs": in_memory_jobs
+            "total_jobs": len(jobs_snapshot),
+            "job_ids": list(jobs_snapshot.keys()),
+            "jobs": jobs_snapshot
         }
         
-        self._send_json_response(response)
+        self._send_json_stream(response)
     
     def _handle_start_lkq(self):
-        """Handle POST /start/lkq endpoint to start LKQ scraper."""
+        """
+        Handle POST /start/lkq endpoint to start LKQ scraper.
+        
+        An optional JSON body of {"category": "Engine Assembly"} crawls that category of the
+        configured catalog URL; without it the configured URL is crawled. Clients can't
+        choose the URL itself. Each call starts its own job, so several categories can be
+        crawled in parallel.
+        """
         try:
+            body = self._read_json_body()
+            if set(body) - {"category"}:
+                raise InvalidRequest(f"unknown fields: {', '.join(sorted(set(body) - {'category'}))}")
+            category = body.get("category")
+            if category is not None:
+                if not isinstance(category, str) or not category.strip():
+                    raise InvalidRequest("category must be a non-empty string")
+                category = category.strip()
+            
             # Create a new job
             job_id = str(uuid.uuid4())
             
@@ -275,21 +543,25 @@ class ScraperAPIHandler(BaseHTTPRequestHandler):
                 "status": "started",
                 "start_time": datetime.now(),
                 "end_time": None,
-                "error": None
+                "error": None,
+                "category": category
             }
             
             # Start scraper in a background thread
             print(f"Starting LKQ scraper as thread with job_id: {job_id}")
-            thread = threading.Thread(target=run_lkq_scraper, args=(job_id,))
+            thread = threading.Thread(target=run_lkq_scraper, args=(job_id, {"category": category}))
             thread.daemon = True
             thread.start()
             
             response = {
                 "status": "success",
                 "message": "LKQ scraper started",
-                "job_id": job_id
+                "job_id": job_id,
+                "category": category
             }
             self._send_json_response(response)
+        except InvalidRequest as e:
+            self._send_json_response({"status": "error", "message": str(e)}, 400)
         except Exception as e:
             print(f"Error starting LKQ scraper: {e}")
             self._send_json_response({
@@ -306,21 +578,96 @@ class ScraperAPIHandler(BaseHTTPRequestHandler):
     
     def _send_json_response(self, data, status_code=200):
         """Send JSON response."""
-        self._set_headers(status_code)
-        self.wfile.write(json.dumps(data, default=self._json_serial).encode('utf-8'))
+        body = json.dumps(data, default=self._json_serial).encode('utf-8')
+        self._set_headers(status_code, content_length=len(body))
+        self.wfile.write(body)
+    
+    def _send_chunked_response(self, pieces, content_type, status_code=200):
+        """
+        Stream an iterable of strings or bytes as the response body.
+        
+        Pieces are grouped into chunks of about STREAM_CHUNK_SIZE bytes and sent with
+        chunked transfer encoding. HTTP/1.0 clients get the raw body and the connection is closed.
+        """
+        chunked = self.request_version != 'HTTP/1.0'
+        self._set_headers(status_code, content_type, content_length=None, chunked=chunked)
+        
+        def write_chunk(data):
+            if chunked:
+                self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+            else:
+                self.wfile.write(data)
+        
+        buffer = []
+        buffered = 0
+        try:
+            for piece in pieces:
+                if isinstance(piece, str):
+                    piece = piece.encode('utf-8')
+                buffer.append(piece)
+                buffered += len(piece)
+                if buffered >= STREAM_CHUNK_SIZE:
+                    write_chunk(b''.join(buffer))
+                    buffer = []
+                    buffered = 0
+            if buffer:
+                write_chunk(b''.join(buffer))
+        except Exception as e:
+            # Headers are already sent, so the only way to signal the error is to drop the connection
+            print(f"Error streaming response: {e}")
+            self.close_connection = True
+            return
+        
+        if chunked:
+            self.wfile.write(b"0\r\n\r\n")
+    
+    def _send_json_stream(self, data, status_code=200):
+        """Send a JSON response encoded incrementally, for payloads too large to build in memory."""
+        encoder = json.JSONEncoder(default=self._json_serial)
+        self._send_chunked_response(encoder.iterencode(data), 'application/json', status_code)
+    
+    def _send_ndjson_response(self, items, status_code=200):
+        """Stream an iterable of objects as newline-delimited JSON."""
+        lines = (json.dumps(item, default=self._json_serial) + "\n" for item in items)
+        self._send_chunked_response(lines, 'application/x-ndjson', status_code)
+    
+    def _send_raw_ndjson_response(self, documents, status_code=200):
+        """Stream an iterable of JSON documents (bytes or text) as newline-delimited JSON, without re-encoding them."""
+        lines = (document + (b"\n" if isinstance(document, bytes) else "\n") for document in documents)
+        self._send_chunked_response(lines, 'application/x-ndjson', status_code)
+    
+    def _send_products_page(self, response, products, status_code=200):
+        """
+        Send the response fields followed by a "products" array holding the page.
+        
+        The products are already JSON (bytes or text) and are spliced into the body as they
+        are, so they are never decoded and encoded again on the way out.
+        """
+        head = json.dumps(response, default=self._json_serial)
+        body = b''.join((
+            head[:-1].encode('utf-8'),
+            b', "products": [',
+            b', '.join(product.encode('utf-8') if isinstance(product, str) else product for product in products),
+            b']}'
+        ))
+        self._set_headers(status_code, 'application/json', content_length=len(body))
+        self.wfile.write(body)
     
     def _json_serial(self, obj):
         """JSON serializer for objects not serializable by default json code."""
         if isinstance(obj, (datetime)):
             return obj.isoformat()
+        if obj is None or isinstance(obj, str):
+            return obj  # Job times may be unset or already serialized
         raise TypeError(f"Type {type(obj)} not serializable")
 
 
 def run_lkq_scraper(job_id, params=None):
-    """Run the LKQ scraper with the given parameters."""
+    """Run the LKQ scraper with the given parameters (category: category to crawl)."""
+    params = params or {}
     try:
         # Start the scraper
-        result_job_id = start_lkq_scraper(job_id)
+        result_job_id = start_lkq_scraper(job_id, category=params.get("category"))
         
         # Update job status if the job exists in running_jobs
         if result_job_id and job_id in running_jobs:
@@ -350,10 +697,11 @@ def run_lkq_scraper(job_id, params=None):
 def run_server(port=5000):
     """Run the HTTP server."""
     server_address = ('', port)
-    httpd = HTTPServer(server_address, ScraperAPIHandler)
-    print(f"Starting API server on port {port}...")
+    httpd = BoundedThreadingHTTPServer(server_address, ScraperAPIHandler)
+    print(f"Starting API server on port {port} (up to {MAX_CONNECTIONS} connections)...")
     print(f"Available endpoints:")
     print(f"  - GET  /api/health")
+    print(f"  - GET  /api/metrics")
     print(f"  - GET  /api/scrapers")
     print(f"  - POST /api/scrapers/lkq/start")
     print(f"  - GET  /api/jobs")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark for product ingestion into PostgreSQL.
+
+Compares the ORM path (database.save_products) with the bulk COPY and execute_values
+paths (database.bulk_save_products) on a local database. Each method writes the same
+synthetic products under its own job, and all benchmark rows are deleted afterwards.
+
+Usage:
+    python benchmarks/bench_product_ingest.py --products 20000 --batch-size 1000
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+
+# Add the project root to Python path to ensure modules can be found
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from sqlalchemy import text
+from src.common.database.session import get_session, close_session
+from src.common.database.database import create_job, save_products, bulk_save_products
+
+
+def make_products(count):
+    """Generate synthetic products shaped like LKQ catalog entries."""
+    return [
+        {
+            "id": f"bench-{i}",
+            "partNumber": f"PN{i:08d}",
+            "description": "Engine Assembly 2.0L, gas, VIN 4 (8th digit)",
+            "price": {"amount": 1000 + i % 500, "currency": "USD"},
+            "vehicle": {"year": 2000 + i % 20, "make": "Toyota", "model": "Camry"},
+            "location": {"name": "LKQ Benchmark Yard", "state": "TX", "zip": "75001"},
+            "availability": "In Stock",
+            "images": [f"https://example.com/images/{i}/{n}.jpg" for n in range(3)]
+        }
+        for i in range(count)
+    ]
+
+
+def run_method(name, products, save):
+    """Time one ingestion method under a fresh job and return products per second."""
+    session = get_session()
+    try:
+        job_id = create_job(session, f"bench-ingest-{name}")
+        start = time.perf_counter()
+        save(session, job_id, products)
+        elapsed = time.perf_counter() - start
+
+        stored = session.execute(
+            text('SELECT COUNT(*) FROM "Products" WHERE job_id = CAST(:job_id AS uuid)'), {"job_id": job_id}
+        ).scalar()
+
+        # Remove benchmark rows
+        session.execute(text('DELETE FROM "Products" WHERE job_id = CAST(:job_id AS uuid)'), {"job_id": job_id})
+        session.execute(text('DELETE FROM "Jobs" WHERE job_id = CAST(:job_id AS uuid)'), {"job_id": job_id})
+        session.commit()
+    finally:
+        close_session(session)
+
+    rate = len(products) / elapsed if elapsed > 0 else float("inf")
+    print(f"{name:<16} {elapsed:>8.2f}s {rate:>12.0f} products/s  ({stored} rows stored)")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Product ingestion benchmark")
+    parser.add_argument("--products", type=int, default=20000, help="Number of products to write per method")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Batch size for the bulk paths")
+    args = parser.parse_args()
+
+    products = make_products(args.products)
+    print(f"\n--- Product Ingestion Benchmark ({datetime.now().isoformat()}) ---")
+    print(f"Products per method: {args.products}, batch size: {args.batch_size}\n")
+
+    results = {
+        "orm": run_method("orm", products, save_products),
+        "execute_values": run_method(
+            "execute_values", products,
+            lambda session, job_id, data: bulk_save_products(session, job_id, data, args.batch_size, use_copy=False)
+        ),
+        "copy": run_method(
+            "copy", products,
+            lambda session, job_id, data: bulk_save_products(session, job_id, data, args.batch_size)
+        )
+    }
+
+    print(f"\nSpeed-up over ORM: execute_values {results['execute_values'] / results['orm']:.1f}x, "
+          f"copy {results['copy'] / results['orm']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
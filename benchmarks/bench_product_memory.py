@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the memory taken by stored products.
+
+Decodes synthetic LKQ pages the way the scraper does and appends the products to a
+ProductStore, then reports the traced memory per stored product for dictionaries and
+for ProductRecords, with the raw bytes sliced from the response or encoded from the
+product. The JSON backend in use (orjson or the standard library) is printed first,
+so run it with and without orjson installed to compare.
+
+Usage:
+    python benchmarks/bench_product_memory.py --products 20000 --page-size 500
+"""
+
+import os
+import gc
+import sys
+import json
+import argparse
+import tracemalloc
+
+# Add the project root to Python path to ensure modules can be found
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from benchmarks.mock_lkq_server import make_product
+from src.common.utils import jsonlib
+from src.common.utils.product_store import ProductStore
+from src.scrapers.lkq.products import ProductRecord
+
+
+def make_pages(products, page_size):
+    """Build response bodies shaped like LKQ catalog pages."""
+    return [
+        json.dumps({"data": [make_product(i % 5, i) for i in range(start, min(products, start + page_size))]}).encode("utf-8")
+        for start in range(0, products, page_size)
+    ]
+
+
+def measure(pages, record_type, keep_raw):
+    """Return the traced bytes per product held by a store after ingesting the pages."""
+    gc.collect()
+    tracemalloc.start()
+    store = ProductStore(record_type=record_type)
+    for page in pages:
+        data, raw_products = jsonlib.loads_with_raw_items(page)
+        store.append("bench", data["data"], raw_products if keep_raw else None)
+        del data, raw_products
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = store.count("bench")
+    store.close()
+    return current / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure memory per stored product")
+    parser.add_argument("--products", type=int, default=20000, help="Number of products to store")
+    parser.add_argument("--page-size", type=int, default=500, help="Products per response page")
+    args = parser.parse_args()
+
+    pages = make_pages(args.products, args.page_size)
+    print(f"JSON backend: {jsonlib.BACKEND}")
+    print(f"{'storage':<32} {'bytes/product':>14}")
+    for name, record_type, keep_raw in (
+        ("dict", None, False),
+        ("ProductRecord (sliced bytes)", ProductRecord, True),
+        ("ProductRecord (encoded bytes)", ProductRecord, False),
+    ):
+        print(f"{name:<32} {measure(pages, record_type, keep_raw):>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark for the LKQ scraper.
+
+Starts the mock LKQ catalog server (benchmarks/mock_lkq_server.py) and runs
+fetch_all_products against it for every combination of engine, worker count, page
+size and failure rate. Each run happens in its own subprocess, inside a temporary
+working directory, so scraper globals, CPU time and peak RSS are measured per run
+and response files don't pile up in the repository.
+
+Reports pages/s, products/s, p50/p95/p99 page latency, CPU seconds and peak RSS,
+and writes the results as JSON tagged with the git commit so runs can be compared
+across commits. Page latency is each page's end-to-end time as recorded in the
+scraper_page_duration_seconds histogram, so it includes retries, retry sleeps and
+rate limiter waits, not just the final request.
+
+The scraper still imports config/config.py; the benchmark overrides the API URL,
+proxy, page size, worker and engine settings for each run.
+
+Usage:
+    python benchmarks/bench_scraper.py --workers 1,4,16 --take 12,48 --failure-rates 0,0.05
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import itertools
+import contextlib
+import subprocess
+from datetime import datetime
+
+# Add the project root to Python path to ensure modules can be found
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from benchmarks.mock_lkq_server import start_mock_server, catalog_url
+
+RESULT_PREFIX = "BENCH_RESULT "
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers (None for an empty list)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def git_commit():
+    """Get the current commit hash, marked "-dirty" when the tree has local changes."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=project_root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=project_root, capture_output=True, text=True
+        ).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_child(scenario):
+    """
+    Run one scenario in this process and print its measurements as a JSON line.
+
+    Runs in the temporary working directory set up by run_scenario.
+    """
+    from config.config import LKQ, REQUEST
+    from src.common.utils import metrics
+    from src.common.utils.archive import read_archive_index
+    from src.scrapers.lkq import scraper
+
+    LKQ.update(
+        api_url=scenario["api_url"],
+        results_per_page=scenario["take"],
+        parallel_workers=scenario["workers"],
+        engine=scenario["engine"],
+        use_proxy=False,
+        transport="network",
+        archive={"enabled": True},
+        incremental={"enabled": False}
+    )
+    LKQ.setdefault("async", {}).update(workers=scenario["workers"])
+    LKQ.setdefault("pipeline", {}).update(fetchers=scenario["workers"])
+    REQUEST["delay"] = scenario["retry_delay"]
+    scraper.ALTERNATIVE_URLS[:] = []
+
+    # Keep every page's end-to-end time; the histogram itself only keeps bucket counts
+    page_durations = []
+    observe_page_duration = metrics.page_duration.observe
+
+    def record_page_duration(value, **labels):
+        page_durations.append(value)
+        observe_page_duration(value, **labels)
+
+    metrics.page_duration.observe = record_page_duration
+
+    job_id = "bench"
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        total_products = scraper.fetch_all_products(scenario["api_url"], take=scenario["take"], job_id=job_id)
+    elapsed = time.perf_counter() - start
+
+    pages = len(read_archive_index(os.path.join(scraper.ARCHIVE_DIR, job_id)))
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    stored = len(scraper.get_products_for_job_memory(job_id))
+
+    result = {
+        "elapsed": elapsed,
+        "pages": pages,
+        "products": total_products,
+        "stored_products": stored,
+        "pages_per_sec": pages / elapsed if elapsed > 0 else 0.0,
+        "products_per_sec": total_products / elapsed if elapsed > 0 else 0.0,
+        "latency_p50": percentile(page_durations, 0.50),
+        "latency_p95": percentile(page_durations, 0.95),
+        "latency_p99": percentile(page_durations, 0.99),
+        "cpu_seconds": usage.ru_utime + usage.ru_stime,
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        "peak_rss_mb": usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    }
+    print(RESULT_PREFIX + json.dumps(result))
+
+
+def run_scenario(scenario, timeout):
+    """Run one scenario in a subprocess and return its measurements (None on failure)."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [project_root, os.environ.get("PYTHONPATH")])))
+    with tempfile.TemporaryDirectory(prefix="bench_scraper_") as workdir:
+        try:
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", json.dumps(scenario)],
+                cwd=workdir, env=env, capture_output=True, text=True, timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            print(f"Scenario timed out after {timeout}s: {scenario}")
+            return None
+
+    for line in completed.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+
+    print(f"Scenario failed: {scenario}")
+    print(completed.stderr[-2000:])
+    return None
+
+
+def format_latency(value):
+    return f"{value * 1000:>7.1f}" if value is not None else f"{'-':>7}"
+
+
+def parse_list(value, cast):
+    return [cast(item) for item in value.split(",") if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end LKQ scraper benchmark")
+    parser.add_argument("--engines", default="threaded", help="Comma-separated crawl engines (threaded, asyncio, pipeline)")
+    parser.add_argument("--workers", default="1,4,16", help="Comma-separated worker counts")
+    parser.add_argument("--take", default="12,48", help="Comma-separated page sizes")
+    parser.add_argument("--failure-rates", default="0,0.05", help="Comma-separated failure rates, split evenly across 429, 5xx and proxy failures")
+    parser.add_argument("--products", type=int, default=2000, help="Synthetic products in the crawled category")
+    parser.add_argument("--latency-dist", default="lognormal", help="Mock server latency distribution")
+    parser.add_argument("--latency-mean", type=float, default=0.05, help="Mock server mean latency in seconds")
+    parser.add_argument("--retry-delay", type=float, default=0.1, help="REQUEST['delay'] used by the scraper between retries")
+    parser.add_argument("--timeout", type=int, default=600, help="Timeout per scenario in seconds")
+    parser.add_argument("--output", default=os.path.join(project_root, "benchmarks", "results"), help="Directory for the JSON results")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(json.loads(args.child))
+        return
+
+    commit = git_commit()
+    print(f"\n--- LKQ Scraper Benchmark ({datetime.now().isoformat()}, commit {commit}) ---")
+    print(f"Catalog: {args.products} products, latency {args.latency_dist} mean {args.latency_mean * 1000:.0f}ms\n")
+    print(f"{'engine':<10} {'workers':>7} {'take':>5} {'fail':>5} {'pages/s':>9} {'products/s':>11} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'cpu s':>7} {'rss MB':>7}")
+
+    results = []
+    matrix = itertools.product(
+        parse_list(args.engines, str),
+        parse_list(args.workers, int),
+        parse_list(args.take, int),
+        parse_list(args.failure_rates, float)
+    )
+    for engine, workers, take, failure_rate in matrix:
+        # A fresh server per scenario so shifting state and counters don't carry over
+        server = start_mock_server(
+            products=args.products,
+            latency={"distribution": args.latency_dist, "mean": args.latency_mean},
+            rate_429=failure_rate / 3,
+            rate_5xx=failure_rate / 3,
+            proxy_failure_rate=failure_rate / 3,
+            retry_after=0,
+            seed=0
+        )
+        scenario = {
+            "engine": engine,
+            "workers": workers,
+            "take": take,
+            "failure_rate": failure_rate,
+            "retry_delay": args.retry_delay,
+            "api_url": catalog_url(server)
+        }
+        try:
+            measured = run_scenario(scenario, args.timeout)
+        finally:
+            server_stats = dict(server.catalog.stats)
+            server.shutdown()
+            server.server_close()
+        if measured is None:
+            continue
+
+        scenario.pop("api_url")
+        results.append({**scenario, **measured, "server": server_stats})
+        print(f"{engine:<10} {workers:>7} {take:>5} {failure_rate:>5.2f} {measured['pages_per_sec']:>9.1f} "
+              f"{measured['products_per_sec']:>11.1f} {format_latency(measured['latency_p50'])} "
+              f"{format_latency(measured['latency_p95'])} {format_latency(measured['latency_p99'])} "
+              f"{measured['cpu_seconds']:>7.2f} {measured['peak_rss_mb']:>7.1f}")
+
+    os.makedirs(args.output, exist_ok=True)
+    output_path = os.path.join(args.output, f"bench_scraper_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{commit}.json")
+    with open(output_path, "w") as f:
+        json.dump({
+            "commit": commit,
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": {
+                "products": args.products,
+                "latency_dist": args.latency_dist,
+                "latency_mean": args.latency_mean,
+                "retry_delay": args.retry_delay
+            },
+            "results": results
+        }, f, indent=2)
+    print(f"\nResults written to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Mock LKQ catalog server for local load and resilience testing.
+
+Implements GET /api/catalog/0/product with skip/take/category paging over a synthetic
+catalog, so fetch_all_products and fetch_with_retries can be exercised without
+lkqonline.com or Oxylabs. Every request can be delayed by a configurable latency
+distribution and can fail the way the real API and proxies do:
+
+    - 429 responses with a Retry-After header
+    - 500/502/503 responses
+    - proxy-style failures: the connection is closed without a response, or a
+      407 Proxy Authentication Required / 522 Connection Timed Out is returned
+    - shifting results: products are inserted at the front of the catalog while the
+      crawl runs, pushing existing products onto later pages (duplicates across pages)
+
+GET /__stats returns request counters as JSON.
+
+Point the scraper at the server with LKQ["api_url"] set to the URL printed on startup,
+and set LKQ["use_proxy"] = False so requests go straight to it. Proxy-style failures
+are then reported against the current proxy user like real proxy errors would be.
+
+Usage:
+    python benchmarks/mock_lkq_server.py --products 5000 --latency-dist lognormal --latency-mean 0.2 --rate-429 0.02
+"""
+
+import json
+import math
+import random
+import socket
+import argparse
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+CATALOG_PATH = "/api/catalog/0/product"
+
+CATEGORIES = [
+    "Engine Assembly",
+    "Engine Compartment",
+    "Transmission Assembly",
+    "Front Body",
+    "Rear Suspension"
+]
+
+DEFAULT_SETTINGS = {
+    "products": 1000,          # Synthetic products per category
+    "include_total": False,    # Report the category size as "total" in each response
+    "latency": {
+        "distribution": "fixed",  # fixed, uniform, exponential or lognormal
+        "mean": 0.0,              # Mean latency in seconds
+        "sigma": 0.5,             # Shape of the lognormal distribution
+        "max": 30.0               # Upper bound on any single delay
+    },
+    "rate_429": 0.0,           # Fraction of requests answered with 429
+    "retry_after": 1,          # Retry-After value sent with 429 responses
+    "rate_5xx": 0.0,           # Fraction of requests answered with 500/502/503
+    "proxy_failure_rate": 0.0, # Fraction of requests failing like a broken proxy
+    "shift_every": 0,          # Insert products at the front every N catalog requests (0 disables)
+    "shift_size": 1,           # Number of products inserted per shift
+    "seed": None               # Random seed for failure injection and latency
+}
+
+
+def sample_latency(latency, rng):
+    """Draw one delay in seconds from the configured latency distribution."""
+    mean = latency.get("mean", 0.0)
+    if mean <= 0:
+        return 0.0
+
+    distribution = latency.get("distribution", "fixed")
+    if distribution == "uniform":
+        delay = rng.uniform(0, 2 * mean)
+    elif distribution == "exponential":
+        delay = rng.expovariate(1 / mean)
+    elif distribution == "lognormal":
+        sigma = latency.get("sigma", 0.5)
+        delay = rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+    else:
+        delay = mean
+    return min(delay, latency.get("max", 30.0))
+
+
+def make_product(category_index, position):
+    """Build the synthetic product at a position of a category's original catalog."""
+    number = position * len(CATEGORIES) + category_index
+    return {
+        "id": f"mock-{number}",
+        "partNumber": f"PN{number:08d}",
+        "category": CATEGORIES[category_index],
+        "description": f"{CATEGORIES[category_index]} 2.0L, gas, VIN 4 (8th digit)",
+        "price": {"amount": 1000 + number % 500, "currency": "USD"},
+        "vehicle": {"year": 2000 + number % 20, "make": "Toyota", "model": "Camry"},
+        "location": {"name": "LKQ Mock Yard", "state": "TX", "zip": "75001"},
+        "availability": "In Stock"
+    }
+
+
+def make_inserted_product(category_index, number):
+    """Build a product inserted at the front of a category by a results shift."""
+    return {
+        "id": f"mock-new-{category_index}-{number}",
+        "partNumber": f"PNNEW{number:08d}",
+        "category": CATEGORIES[category_index],
+        "description": f"{CATEGORIES[category_index]} (newly listed)",
+        "price": {"amount": 900, "currency": "USD"},
+        "vehicle": {"year": 2021, "make": "Honda", "model": "Accord"},
+        "location": {"name": "LKQ Mock Yard", "state": "TX", "zip": "75001"},
+        "availability": "In Stock"
+    }
+
+
+class MockCatalog:
+    """Synthetic catalog state shared by all request handler threads."""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.rng = random.Random(settings.get("seed"))
+        self.lock = threading.Lock()
+        self.catalog_requests = 0
+        self.shift = 0
+        self.stats = {"requests": 0, "ok": 0, "429": 0, "5xx": 0, "proxy_failures": 0, "products_served": 0}
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def next_shift(self):
+        """Count a catalog request and return the current shift (number of inserted products)."""
+        shift_every = self.settings.get("shift_every", 0)
+        with self.lock:
+            self.catalog_requests += 1
+            if shift_every and self.catalog_requests % shift_every == 0:
+                self.shift += self.settings.get("shift_size", 1)
+            return self.shift
+
+    def page(self, category, skip, take):
+        """
+        Return the products and total for one page.
+
+        Args:
+            category: Category filter, or None for every category.
+            skip: Number of products to skip.
+            take: Number of products to return.
+        """
+        if category is None:
+            category_indexes = list(range(len(CATEGORIES)))
+        elif category in CATEGORIES:
+            category_indexes = [CATEGORIES.index(category)]
+        else:
+            return [], 0
+
+        shift = self.next_shift()
+        per_category = self.settings["products"] + shift
+        total = per_category * len(category_indexes)
+
+        products = []
+        for position in range(skip, min(skip + take, total)):
+            category_index = category_indexes[position % len(category_indexes)]
+            category_position = position // len(category_indexes)
+            if category_position < shift:
+                products.append(make_inserted_product(category_index, shift - category_position))
+            else:
+                products.append(make_product(category_index, category_position - shift))
+        return products, total
+
+
+class MockLKQHandler(BaseHTTPRequestHandler):
+    """Request handler serving the mock catalog with keep-alive connections."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, so avoid Nagle/delayed-ACK stalls on keep-alive connections
+    disable_nagle_algorithm = True
+    catalog = None
+
+    def log_message(self, format, *args):
+        pass  # Keep load tests quiet
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def inject_failure(self):
+        """Fail the request according to the configured rates. Returns True if it failed."""
+        settings = self.catalog.settings
+        roll = self.catalog.rng.random()
+
+        if roll < settings.get("rate_429", 0.0):
+            self.catalog.count("429")
+            self.send_json(429, {"error": "Too Many Requests"}, {"Retry-After": str(settings.get("retry_after", 1))})
+            return True
+        roll -= settings.get("rate_429", 0.0)
+
+        if roll < settings.get("rate_5xx", 0.0):
+            self.catalog.count("5xx")
+            self.send_json(self.catalog.rng.choice([500, 502, 503]), {"error": "Server Error"})
+            return True
+        roll -= settings.get("rate_5xx", 0.0)
+
+        if roll < settings.get("proxy_failure_rate", 0.0):
+            self.catalog.count("proxy_failures")
+            failure = self.catalog.rng.choice(["close", 407, 522])
+            if failure == "close":
+                # Drop the connection without a response, like a proxy losing its upstream
+                self.close_connection = True
+                try:
+                    self.connection.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+            else:
+                self.send_json(failure, {"error": "Proxy Error"})
+            return True
+        return False
+
+    def do_GET(self):
+        # Accept absolute-form request targets too, as sent to a forward proxy
+        parsed = urlparse(self.path)
+
+        if parsed.path == "/__stats":
+            with self.catalog.lock:
+                stats = dict(self.catalog.stats, shift=self.catalog.shift)
+            self.send_json(200, stats)
+            return
+
+        if parsed.path != CATALOG_PATH:
+            self.send_json(404, {"error": "Not Found"})
+            return
+
+        self.catalog.count("requests")
+        delay = sample_latency(self.catalog.settings.get("latency", {}), self.catalog.rng)
+        if delay > 0:
+            time.sleep(delay)
+
+        if self.inject_failure():
+            return
+
+        query = parse_qs(parsed.query)
+        try:
+            skip = int(query.get("skip", ["0"])[0])
+            take = int(query.get("take", ["12"])[0])
+        except ValueError:
+            self.send_json(400, {"error": "skip and take must be integers"})
+            return
+
+        products, total = self.catalog.page(query.get("category", [None])[0], max(0, skip), max(0, take))
+        payload = {"data": products}
+        if self.catalog.settings.get("include_total"):
+            payload["total"] = total
+
+        self.catalog.count("ok")
+        self.catalog.count("products_served", len(products))
+        self.send_json(200, payload)
+
+
+def merge_settings(overrides):
+    """Merge setting overrides into a copy of DEFAULT_SETTINGS."""
+    settings = dict(DEFAULT_SETTINGS, **{key: value for key, value in overrides.items() if key != "latency"})
+    settings["latency"] = dict(DEFAULT_SETTINGS["latency"], **overrides.get("latency", {}))
+    return settings
+
+
+def start_mock_server(host="127.0.0.1", port=0, **overrides):
+    """
+    Start the mock server on a background thread.
+
+    Args:
+        host: Interface to listen on.
+        port: Port to listen on (0 picks a free port).
+        **overrides: Settings overriding DEFAULT_SETTINGS.
+
+    Returns:
+        server: Running ThreadingHTTPServer. server.catalog holds the settings and
+            stats; call server.shutdown() to stop it.
+    """
+    catalog = MockCatalog(merge_settings(overrides))
+    handler = type("BoundMockLKQHandler", (MockLKQHandler,), {"catalog": catalog})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.catalog = catalog
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def catalog_url(server, category="Engine Assembly"):
+    """Build the LKQ catalog URL served by a running mock server."""
+    host, port = server.server_address[:2]
+    url = f"http://{host}:{port}{CATALOG_PATH}?catalogId=0"
+    if category:
+        url += f"&category={category.replace(' ', '%20')}"
+    return url + "&sort=closestFirst"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock LKQ catalog server")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--products", type=int, default=DEFAULT_SETTINGS["products"], help="Synthetic products per category")
+    parser.add_argument("--include-total", action="store_true", help="Report the result count in each response")
+    parser.add_argument("--latency-dist", default="fixed", choices=["fixed", "uniform", "exponential", "lognormal"], help="Latency distribution")
+    parser.add_argument("--latency-mean", type=float, default=0.0, help="Mean latency in seconds")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Lognormal latency shape")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="Fraction of requests answered with 5xx")
+    parser.add_argument("--proxy-failure-rate", type=float, default=0.0, help="Fraction of requests failing like a broken proxy")
+    parser.add_argument("--shift-every", type=int, default=0, help="Insert products at the front every N requests")
+    parser.add_argument("--shift-size", type=int, default=1, help="Products inserted per shift")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    args = parser.parse_args()
+
+    server = start_mock_server(
+        args.host,
+        args.port,
+        products=args.products,
+        include_total=args.include_total,
+        latency={"distribution": args.latency_dist, "mean": args.latency_mean, "sigma": args.latency_sigma},
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+        proxy_failure_rate=args.proxy_failure_rate,
+        shift_every=args.shift_every,
+        shift_size=args.shift_size,
+        seed=args.seed
+    )
+    print(f"Mock LKQ server listening on http://{args.host}:{server.server_address[1]}")
+    print(f"Catalog URL: {catalog_url(server)}")
+    print(f"Stats: http://{args.host}:{server.server_address[1]}/__stats")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
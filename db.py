@@ -4,11 +4,18 @@ Database operations module using in-memory storage.
 
 This module provides functions to interact with an in-memory database
 instead of using a real PostgreSQL database.
+
+Product payloads are held in a ProductStore with a memory budget of
+DB_PRODUCTS_MEMORY_MB megabytes (default: 256); older payloads past the budget
+are spilled to disk under DB_PRODUCTS_SPILL_DIR (default: the temp directory).
+Each payload is encoded to JSON once and kept as a compact ProductRecord, so the
+same bytes size the batch, are spilled and are served as raw JSON.
 """
 
 import os
 import sys
 import uuid
+import atexit
 from datetime import datetime
 
 # Add the project root to Python path to ensure modules can be found
@@ -16,10 +23,34 @@ project_root = os.path.dirname(os.path.abspath(__file__))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-# In-memory storage
+from src.common.utils import jsonlib
+from src.common.utils.product_store import ProductStore
+from src.scrapers.lkq.products import ProductRecord
+
+# In-memory storage; product records hold the product's position in product_data instead of its data
 jobs = {}
 products = {}
 
+# Secondary index: job_id -> IDs of the job's products, in insertion order
+job_product_ids = {}
+
+# Product payloads per job, spilled to disk past the memory budget
+product_data = ProductStore(
+    memory_budget=int(float(os.environ.get("DB_PRODUCTS_MEMORY_MB", 256)) * 1024 * 1024),
+    spill_dir=os.environ.get("DB_PRODUCTS_SPILL_DIR"),
+    record_type=ProductRecord
+)
+atexit.register(product_data.close)
+
+def _with_data(record, data):
+    """Build the full product record returned to callers from a stored record and its data."""
+    return {
+        "product_id": record["product_id"],
+        "job_id": record["job_id"],
+        "data": data,
+        "scraped_at": record["scraped_at"]
+    }
+
 def create_tables():
     """Create database tables if they don't exist."""
     print("Using in-memory storage instead of database tables.")
@@ -98,13 +129,14 @@ def update_job(job_id, status, total_products, end_time, execution_time):
         print(f"Error updating job: {e}")
         return False
 
-def save_products(job_id, products_data):
+def save_products(job_id, products_data, raw_products=None):
     """
     Save products to the Products table.
     
     Args:
         job_id: UUID of the job that scraped the products.
         products_data: List of product data to save.
+        raw_products: Each product's JSON bytes, when already encoded (optional).
         
     Returns:
         success: True if save was successful, False otherwise.
@@ -128,33 +160,40 @@ def save_products(job_id, products_data):
         return False
     
     # Check if we already have products for this job
-    job_product_count = len([p for p_id, p in products.items() if p.get('job_id') == job_id])
-    print(f"Current products for job {job_id}: {job_product_count}")
+    job_index = job_product_ids.setdefault(job_id, [])
+    print(f"Current products for job {job_id}: {count_products_for_job(job_id)}")
     
     try:
-        # Create product objects
+        # Store the payloads, then one small record per product pointing at its payload
+        scraped_at = datetime.now()
+        # Encode once; the records keep these bytes. Values JSON can't represent are stored as strings
+        if raw_products is None:
+            raw_products = [None] * len(products_data)
+        raw_products = [
+            raw if raw is not None else jsonlib.dumps(product, default=str)
+            for product, raw in zip(products_data, raw_products)
+        ]
+        first_position = product_data.append(job_id, products_data, raw_products) - len(products_data)
         saved_count = 0
-        for product_data in products_data:
+        for offset in range(len(products_data)):
             product_id = str(uuid.uuid4())
             products[product_id] = {
                 "product_id": product_id,
                 "job_id": job_id,
-                "data": product_data,
-                "scraped_at": datetime.now()
+                "position": first_position + offset,
+                "scraped_at": scraped_at
             }
+            job_index.append(product_id)
             saved_count += 1
         
-        # Count products for this job again
-        new_job_product_count = len([p for p_id, p in products.items() if p.get('job_id') == job_id])
         print(f"Products saved: {saved_count}")
-        print(f"Updated products for job {job_id}: {new_job_product_count}")
+        print(f"Updated products for job {job_id}: {count_products_for_job(job_id)}")
         print(f"Total products in memory: {len(products)}")
         
         # Save a sample product to a file for debugging
         if products_data and len(products_data) > 0:
-            import json
-            with open(f"sample_product_{job_id}.json", "w") as f:
-                json.dump(products_data[0], f, indent=2)
+            with open(f"sample_product_{job_id}.json", "wb") as f:
+                f.write(raw_products[0])
                 print(f"Saved sample product to sample_product_{job_id}.json")
         
         return True
@@ -179,8 +218,10 @@ def get_products_for_job(job_id):
     print(f"Job ID: {job_id}")
     
     try:
-        # Filter products by job_id
-        job_products = [p for p_id, p in products.items() if p.get('job_id') == job_id]
+        # Look up the job's products in the job index
+        job_records = [products[product_id] for product_id in job_product_ids.get(job_id, [])]
+        job_data = product_data.get_all(job_id)
+        job_products = [_with_data(record, job_data[record["position"]]) for record in job_records]
         print(f"Found {len(job_products)} products for job {job_id}")
         return job_products
     
@@ -188,14 +229,30 @@ def get_products_for_job(job_id):
         print(f"Error getting products for job: {e}")
         return []
 
+def count_products_for_job(job_id):
+    """
+    Get the number of products stored for a job.
+    
+    Args:
+        job_id: UUID of the job.
+        
+    Returns:
+        count: Number of products for the job.
+    """
+    return len(job_product_ids.get(job_id, ()))
+
 def get_all_products():
     """
-    Get all products in memory.
+    Get all products in memory, loading spilled payloads back from disk.
     
     Returns:
         products_dict: Dictionary of all products.
     """
-    return products
+    job_data = {job_id: product_data.get_all(job_id) for job_id in product_data.job_ids()}
+    return {
+        product_id: _with_data(record, job_data[record["job_id"]][record["position"]])
+        for product_id, record in list(products.items())
+    }
 
 def get_all_jobs():
     """
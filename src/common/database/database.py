@@ -5,10 +5,45 @@ This module provides functions for database connection, job management, and prod
 using SQLAlchemy ORM.
 """
 
+import csv
+import io
+import time
 import uuid
 from datetime import datetime
+from sqlalchemy import text
+from psycopg2 import errors as pg_errors
+from psycopg2.extras import execute_values
 from src.common.database.models import Job, Product
-from src.common.database.session import get_session, close_session
+from src.common.database.session import get_session
+from src.common.utils import metrics
+from src.common.utils.jsonlib import to_json_text
+
+# Number of products written per COPY/INSERT batch (one transaction per batch)
+DEFAULT_BATCH_SIZE = 1000
+
+COPY_PRODUCTS_SQL = 'COPY "Products" (product_id, job_id, data, scraped_at) FROM STDIN WITH (FORMAT csv)'
+INSERT_PRODUCTS_SQL = 'INSERT INTO "Products" (product_id, job_id, data, scraped_at) VALUES %s'
+
+# Index backing the keyset pagination below. Declared on the Product model too, but that only
+# applies to newly created tables, so existing databases need create_products_index
+CREATE_PRODUCTS_INDEX_SQL = text(
+    'CREATE INDEX IF NOT EXISTS ix_products_job_id_product_id ON "Products" (job_id, product_id)'
+)
+
+_PRODUCTS_PAGE_QUERY = (
+    'SELECT product_id, {data} FROM "Products" WHERE job_id = CAST(:job_id AS uuid) '
+    'ORDER BY product_id LIMIT :limit'
+)
+_PRODUCTS_PAGE_AFTER_QUERY = (
+    'SELECT product_id, {data} FROM "Products" WHERE job_id = CAST(:job_id AS uuid) '
+    'AND product_id > CAST(:after AS uuid) ORDER BY product_id LIMIT :limit'
+)
+PRODUCTS_PAGE_SQL = text(_PRODUCTS_PAGE_QUERY.format(data="data"))
+PRODUCTS_PAGE_AFTER_SQL = text(_PRODUCTS_PAGE_AFTER_QUERY.format(data="data"))
+
+# Same queries returning the stored JSON as text, for callers that pass it through undecoded
+PRODUCTS_PAGE_RAW_SQL = text(_PRODUCTS_PAGE_QUERY.format(data="data::text"))
+PRODUCTS_PAGE_AFTER_RAW_SQL = text(_PRODUCTS_PAGE_AFTER_QUERY.format(data="data::text"))
 
 
 def connect_to_db():
@@ -98,6 +133,8 @@ def save_products(session, job_id, products):
         products: List of product data dictionaries to save.
     """
     try:
+        write_start = time.monotonic()
+        
         # Create products using SQLAlchemy
         for product_data in products:
             product_id = str(uuid.uuid4())
@@ -114,6 +151,173 @@ def save_products(session, job_id, products):
         
         # Commit all products at once
         session.commit()
+        metrics.storage_write_duration.observe(time.monotonic() - write_start, storage="postgres_orm")
+        metrics.products_ingested.inc(len(products), storage="postgres_orm")
+    except Exception as e:
+        session.rollback()
+        print(f"Error saving products: {e}") 
+
+
+def _product_rows(job_id, products):
+    """
+    Build (product_id, job_id, data, scraped_at) rows with the product data as JSON text.
+    
+    Products given as raw JSON bytes (as kept from the scraped response) are written as
+    they are, without being decoded and encoded again.
+    """
+    scraped_at = datetime.now()
+    return [
+        (str(uuid.uuid4()), str(job_id), to_json_text(product_data), scraped_at)
+        for product_data in products
+    ]
+
+
+def _copy_rows(cursor, rows):
+    """Stream rows into the Products table with PostgreSQL COPY."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for product_id, job_id, data, scraped_at in rows:
+        writer.writerow((product_id, job_id, data, scraped_at.isoformat()))
+    buffer.seek(0)
+    cursor.copy_expert(COPY_PRODUCTS_SQL, buffer)
+
+
+def _copy_unsupported(error):
+    """Check if a COPY failure means COPY itself is unavailable rather than a bad batch."""
+    return isinstance(error, (AttributeError, NotImplementedError, pg_errors.FeatureNotSupported))
+
+
+def _insert_rows(cursor, rows, page_size):
+    """Insert rows into the Products table with multi-row INSERT statements."""
+    execute_values(cursor, INSERT_PRODUCTS_SQL, rows, template="(%s::uuid, %s::uuid, %s::jsonb, %s)", page_size=page_size)
+
+
+def bulk_save_products(session, job_id, products, batch_size=None, use_copy=True):
+    """
+    Save scraped products to the Products table in bulk.
+    
+    Products are streamed in batches with PostgreSQL COPY, bypassing the ORM. A batch
+    that COPY fails on is retried with execute_values multi-row INSERTs; only when COPY
+    itself is not supported are INSERTs used for the remaining batches too. Each batch
+    is committed in its own transaction.
+    
+    Args:
+        session: Database session object (SQLAlchemy session).
+        job_id: UUID of the job that produced these products.
+        products: List of product data dictionaries (or their raw JSON bytes) to save.
+        batch_size: Number of products per batch (default: DEFAULT_BATCH_SIZE).
+        use_copy: Whether to try COPY before falling back to execute_values (default: True).
+        
+    Returns:
+        saved_count: Number of products saved.
+    """
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+    saved_count = 0
+    
+    for start in range(0, len(products), batch_size):
+        rows = _product_rows(job_id, products[start:start + batch_size])
+        write_start = time.monotonic()
+        try:
+            cursor = session.connection().connection.cursor()
+            try:
+                if use_copy:
+                    try:
+                        _copy_rows(cursor, rows)
+                    except Exception as e:
+                        session.rollback()
+                        if _copy_unsupported(e):
+                            print(f"COPY is not supported, falling back to execute_values: {e}")
+                            use_copy = False
+                        else:
+                            print(f"COPY failed for batch starting at {start}, retrying it with execute_values: {e}")
+                        cursor.close()
+                        cursor = session.connection().connection.cursor()
+                        _insert_rows(cursor, rows, batch_size)
+                else:
+                    _insert_rows(cursor, rows, batch_size)
+            finally:
+                cursor.close()
+            session.commit()
+            saved_count += len(rows)
+            metrics.storage_write_duration.observe(time.monotonic() - write_start, storage="postgres")
+            metrics.products_ingested.inc(len(rows), storage="postgres")
+        except Exception as e:
+            session.rollback()
+            print(f"Error saving product batch starting at {start}: {e}")
+    
+    return saved_count
+
+
+def create_products_index(session):
+    """
+    Create the (job_id, product_id) index used to page through a job's products.
+    
+    Safe to run more than once. Building it locks the Products table against writes, so
+    run it when no scraper is saving products.
+    
+    Args:
+        session: Database session object (SQLAlchemy session).
+        
+    Returns:
+        success: True if the index exists afterwards, False otherwise.
+    """
+    try:
+        session.execute(CREATE_PRODUCTS_INDEX_SQL)
+        session.commit()
+        return True
     except Exception as e:
         session.rollback()
-        print(f"Error saving products: {e}") 
\ No newline at end of file
+        print(f"Error creating products index: {e}")
+        return False
+
+
+def get_products_page(session, job_id, limit, after=None, raw=False):
+    """
+    Get one page of a job's products using keyset pagination on product_id.
+    
+    Args:
+        session: Database session object (SQLAlchemy session).
+        job_id: UUID of the job.
+        limit: Maximum number of products to return.
+        after: product_id of the last product on the previous page (optional).
+        raw: Return each product's data as JSON text instead of decoding it (default: False).
+        
+    Returns:
+        tuple: (products, next_cursor) where products is a list of (product_id, data)
+            tuples and next_cursor is None on the last page.
+    """
+    params = {"job_id": str(job_id), "limit": limit}
+    if after:
+        params["after"] = str(after)
+        query = PRODUCTS_PAGE_AFTER_RAW_SQL if raw else PRODUCTS_PAGE_AFTER_SQL
+    else:
+        query = PRODUCTS_PAGE_RAW_SQL if raw else PRODUCTS_PAGE_SQL
+    rows = session.execute(query, params).fetchall()
+    
+    products = [(str(product_id), data) for product_id, data in rows]
+    next_cursor = products[-1][0] if len(products) == limit else None
+    return products, next_cursor
+
+
+def iter_products(session, job_id, batch_size=None, raw=False):
+    """
+    Iterate over all of a job's products, one keyset page at a time.
+    
+    Only one page is held in memory at a time.
+    
+    Args:
+        session: Database session object (SQLAlchemy session).
+        job_id: UUID of the job.
+        batch_size: Number of products per query (default: DEFAULT_BATCH_SIZE).
+        raw: Yield each product's data as JSON text instead of decoding it (default: False).
+        
+    Yields:
+        tuple: (product_id, data)
+    """
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+    cursor = None
+    while True:
+        products, cursor = get_products_page(session, job_id, batch_size, cursor, raw)
+        yield from products
+        if cursor is None:
+            break
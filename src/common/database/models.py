@@ -4,7 +4,7 @@ SQLAlchemy models for the database.
 This module defines the ORM models for the Jobs and Products tables.
 """
 
-from sqlalchemy import Column, String, DateTime, Integer, Float, ForeignKey, text
+from sqlalchemy import Column, String, DateTime, Integer, Float, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -47,5 +47,9 @@ class Product(Base):
     # Relationship with Job model
     job = relationship('Job', back_populates='products')
     
+    # Supports keyset pagination of a job's products ordered by product_id. Only created with
+    # new tables; add it to existing databases with database.create_products_index
+    __table_args__ = (Index('ix_products_job_id_product_id', 'job_id', 'product_id'),)
+    
     def __repr__(self):
         return f"<Product(product_id='{self.product_id}', job_id='{self.job_id}')>" 
\ No newline at end of file
@@ -8,8 +8,9 @@ import sys
 import os
 import subprocess
 import re
+import threading
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
 
@@ -49,22 +50,35 @@ DEFAULT_DB_URL = "postgresql://postgres@localhost:5432/xpedia-parts"
 DATABASE_URL = os.getenv("DATABASE_URL", DEFAULT_DB_URL)
 print(f"Using DATABASE_URL: {DATABASE_URL}")
 
+# Engine and session factory, created on first use by init_engine
+engine = None
+SessionLocal = None
+_init_lock = threading.Lock()
+
 # Create engine with custom approach based on environment
-def get_db_engine():
+def get_db_engine(connect_timeout=None, allow_sudo=True):
     """
     Get database engine based on authentication method.
     
+    Args:
+        connect_timeout: Seconds to wait for the connection test (default: driver default).
+        allow_sudo: Fall back to the local socket found through `sudo -u postgres psql`
+            when the standard URL fails (default: True). When False the error is raised.
+    
     Returns:
         SQLAlchemy engine.
     """
+    connect_args = {"connect_timeout": connect_timeout} if connect_timeout else {}
     try:
         # First try to connect using standard connection string
-        engine = create_engine(DATABASE_URL, poolclass=NullPool)
+        engine = create_engine(DATABASE_URL, poolclass=NullPool, connect_args=connect_args)
         # Test the connection
         with engine.connect() as conn:
-            conn.execute("SELECT 1")
+            conn.execute(text("SELECT 1"))
         return engine
     except Exception as e:
+        if not allow_sudo:
+            raise
         print(f"Could not connect with standard URL: {e}")
         print("Trying alternative authentication method...")
         
@@ -82,19 +96,34 @@ def get_db_engine():
             # Fall back to original URL
             return create_engine(DATABASE_URL, poolclass=NullPool)
 
-# Create engine
-engine = get_db_engine()
-
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def init_engine(connect_timeout=None, allow_sudo=True):
+    """
+    Create the engine and session factory if they don't exist yet.
+    
+    Args:
+        connect_timeout: Seconds to wait for the connection test.
+        allow_sudo: Whether get_db_engine may fall back to sudo.
+    
+    Returns:
+        SQLAlchemy engine.
+    """
+    global engine, SessionLocal
+    with _init_lock:
+        if engine is None:
+            new_engine = get_db_engine(connect_timeout, allow_sudo)
+            SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=new_engine)
+            engine = new_engine
+    return engine
 
 def get_session():
     """
-    Get a new database session.
+    Get a new database session, connecting to the database on first use.
     
     Returns:
         SQLAlchemy session object.
     """
+    if SessionLocal is None:
+        init_engine()
     session = SessionLocal()
     try:
         return session
@@ -0,0 +1,221 @@
+"""
+Response archive module for storing raw API responses.
+
+This module appends raw response bytes to rotating, compressed segment files, one
+archive directory per job. Every record is written as an independent gzip (or zstd)
+frame, so an index of page -> (segment, offset, length) allows reading any single
+page back without decompressing the whole segment. Writes are handed to a background
+thread, so fetch threads only enqueue the bytes.
+
+Archive layout:
+    <directory>/<job_id>/segment-00001.jsonl.gz
+    <directory>/<job_id>/index.jsonl
+"""
+
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from src.common.utils.log import get_logger
+
+try:
+    import zstandard
+except ImportError:  # zstd compression is optional
+    zstandard = None
+
+INDEX_FILE = "index.jsonl"
+
+logger = get_logger(__name__)
+
+# Marks the end of the writer thread's input
+_STOP = object()
+
+
+def _segment_extension(compression):
+    return "jsonl.zst" if compression == "zstd" else "jsonl.gz"
+
+
+def prune_archives(root, keep_jobs, exclude=()):
+    """
+    Delete the oldest job archives so at most keep_jobs remain.
+
+    Args:
+        root: Directory holding one archive directory per job.
+        keep_jobs: Number of most recent job archives to keep.
+        exclude: Archive directories that are never deleted, e.g. those of running jobs.
+    """
+    if not keep_jobs or not os.path.isdir(root):
+        return
+    excluded = {os.path.abspath(path) for path in exclude}
+    job_dirs = [os.path.join(root, name) for name in os.listdir(root)]
+    job_dirs = sorted((path for path in job_dirs if os.path.isdir(path)), key=os.path.getmtime)
+    for path in job_dirs[:-keep_jobs]:
+        if os.path.abspath(path) in excluded:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        logger.info("Removed old response archive %s", path, extra={"category": "archive"})
+
+
+class ResponseArchive:
+    """Append-only, compressed, segmented archive of raw responses for one job."""
+
+    def __init__(self, directory, segment_max_bytes=64 * 1024 * 1024, max_total_bytes=None,
+                 compression="gzip", compresslevel=6, queue_size=256):
+        """
+        Args:
+            directory: Archive directory for the job (created if missing).
+            segment_max_bytes: Compressed size at which a new segment is started.
+            max_total_bytes: Total compressed size cap; the oldest segments are deleted past it (optional).
+            compression: "gzip" or "zstd" (requires the zstandard package).
+            compresslevel: Compression level.
+            queue_size: Maximum number of responses waiting for the writer thread.
+        """
+        if compression == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed, falling back to gzip compression for the response archive",
+                           extra={"category": "archive"})
+            compression = "gzip"
+
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.max_total_bytes = max_total_bytes
+        self.compression = compression
+        self.compresslevel = compresslevel
+        self.records_written = 0
+        self.bytes_written = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._compressor = zstandard.ZstdCompressor(level=compresslevel) if compression == "zstd" else None
+        self._segments = []  # [name, size] of segments still on disk, oldest first
+        self._segment_number = 0
+        self._segment_file = None
+        self._index_file = open(os.path.join(directory, INDEX_FILE), "a")
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def append(self, page_num, content, worker_id=None, url=None, latency=None):
+        """
+        Queue a raw response for archiving. Blocks only if the writer has fallen far behind.
+
+        Args:
+            page_num: Page number of the response.
+            content: Raw response bytes.
+            worker_id: Worker that fetched the page (optional).
+            url: Requested URL (optional).
+            latency: Request latency in seconds (optional).
+        """
+        self._queue.put((page_num, content, worker_id, url, latency, time.time()))
+
+    def pending(self):
+        """Number of responses waiting for the writer thread."""
+        return self._queue.qsize()
+
+    def close(self):
+        """Flush queued responses and close the archive files."""
+        self._queue.put(_STOP)
+        self._writer.join()
+        if self._segment_file is not None:
+            self._segment_file.close()
+        self._index_file.close()
+
+    def _compress(self, data):
+        if self._compressor is not None:
+            return self._compressor.compress(data)
+        return gzip.compress(data, compresslevel=self.compresslevel)
+
+    def _open_segment(self):
+        if self._segment_file is not None:
+            self._segment_file.close()
+        self._segment_number += 1
+        name = f"segment-{self._segment_number:05d}.{_segment_extension(self.compression)}"
+        self._segment_file = open(os.path.join(self.directory, name), "ab")
+        self._segments.append([name, 0])
+
+    def _enforce_size_cap(self):
+        """Delete the oldest closed segments while the archive is over its size cap."""
+        if not self.max_total_bytes:
+            return
+        while len(self._segments) > 1 and sum(size for _, size in self._segments) > self.max_total_bytes:
+            name, _ = self._segments.pop(0)
+            os.remove(os.path.join(self.directory, name))
+            logger.info("Response archive over size cap, removed segment %s", name,
+                        extra={"category": "archive", "archive": self.directory})
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            try:
+                self._write_record(*item)
+            except Exception as e:
+                logger.error("Error writing response archive record: %s", e,
+                             extra={"category": "archive", "archive": self.directory, "page": item[0] + 1})
+
+    def _write_record(self, page_num, content, worker_id, url, latency, fetched_at):
+        if self._segment_file is None or self._segments[-1][1] >= self.segment_max_bytes:
+            self._open_segment()
+            self._enforce_size_cap()
+
+        frame = self._compress(content.rstrip(b"\n") + b"\n")
+        segment = self._segments[-1]
+        offset = segment[1]
+        self._segment_file.write(frame)
+        self._segment_file.flush()
+        segment[1] += len(frame)
+
+        entry = {
+            "page": page_num,
+            "segment": segment[0],
+            "offset": offset,
+            "length": len(frame),
+            "size": len(content),
+            "worker": worker_id,
+            "url": url,
+            "latency": latency,
+            "fetched_at": fetched_at
+        }
+        self._index_file.write(json.dumps(entry) + "\n")
+        self._index_file.flush()
+        self.records_written += 1
+        self.bytes_written += len(frame)
+
+
+def read_archive_index(directory):
+    """
+    Read the index of a job archive, skipping records whose segment has been deleted.
+
+    Returns:
+        entries: List of index entry dictionaries in write order.
+    """
+    entries = []
+    with open(os.path.join(directory, INDEX_FILE), "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entries.append(json.loads(line))
+    return [entry for entry in entries if os.path.exists(os.path.join(directory, entry["segment"]))]
+
+
+def read_archive_record(directory, entry):
+    """
+    Read the raw response bytes of one archived record.
+
+    Args:
+        directory: Archive directory for the job.
+        entry: Index entry returned by read_archive_index.
+
+    Returns:
+        content: Raw response bytes.
+    """
+    with open(os.path.join(directory, entry["segment"]), "rb") as f:
+        f.seek(entry["offset"])
+        frame = f.read(entry["length"])
+    if entry["segment"].endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("Reading zstd archives requires the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(frame).rstrip(b"\n")
+    return gzip.decompress(frame).rstrip(b"\n")
@@ -0,0 +1,158 @@
+"""
+Asynchronous HTTP utilities module for making API requests.
+
+This module provides the asyncio counterpart of fetch_with_retries, built on aiohttp.
+aiohttp is only required when the asyncio crawl engine is used.
+"""
+
+import asyncio
+import json
+import time
+from datetime import timedelta
+from config.config import REQUEST
+from urllib.parse import urlparse
+from src.common.utils.http import encode_url, build_proxy_url
+from src.common.utils.rate_limit import get_rate_limiter
+from src.common.utils.proxy_pool import get_proxy_pool
+from src.common.utils import metrics
+from src.common.utils.log import get_logger
+
+try:
+    import aiohttp
+except ImportError:  # Only needed for the asyncio engine
+    aiohttp = None
+
+logger = get_logger(__name__)
+
+
+class FetchedResponse:
+    """
+    Minimal response object holding a fully read HTTP response.
+
+    Mirrors the parts of requests.Response used by the scrapers
+    (status_code, content, url, elapsed, text and json()).
+    """
+
+    def __init__(self, status_code, content, url=None, elapsed=None):
+        self.status_code = status_code
+        self.content = content
+        self.url = url
+        self.elapsed = elapsed if elapsed is not None else timedelta(0)
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def create_client_session(limit):
+    """
+    Create a pooled aiohttp client session.
+
+    Args:
+        limit: Maximum number of simultaneous connections.
+
+    Returns:
+        session: aiohttp.ClientSession with keep-alive connection pooling.
+    """
+    if aiohttp is None:
+        raise RuntimeError("The asyncio engine requires aiohttp. Install it with: pip install aiohttp")
+
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        ssl=False  # Disable SSL verification for proxy connections
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+async def fetch_with_retries_async(session, url, headers, proxy_state, use_proxy=True, retries=None, delay=None, timeout=None, worker_id=None):
+    """
+    Fetch data from the API with retry functionality on the event loop.
+
+    Args:
+        session: aiohttp.ClientSession to send the request with.
+        url: API URL to fetch data from.
+        headers: HTTP headers for the request.
+        proxy_state: Per-worker dictionary holding the "proxy_user" selected from the proxy pool.
+        use_proxy: Whether to use the configured proxy (default: True).
+        retries: Number of retry attempts (default: from config).
+        delay: Delay between retries in seconds (default: from config).
+        timeout: Request timeout in seconds (default: from config).
+        worker_id: Optional worker ID for proxy assignment and logging.
+
+    Returns:
+        response: FetchedResponse if successful, None otherwise.
+    """
+    log_context = {"category": "http", "worker_id": worker_id}
+
+    retries = retries or REQUEST["retries"]
+    delay = delay or REQUEST["delay"]
+    timeout = timeout or REQUEST.get("timeout", 30)
+
+    encoded_url = encode_url(url)
+    target_host = urlparse(encoded_url).netloc
+    rate_limiter = get_rate_limiter()
+
+    # Proxy users are chosen by health; a worker keeps its user while it stays healthy
+    proxy_pool = get_proxy_pool() if use_proxy else None
+    current_user = proxy_state.get("proxy_user")
+    if proxy_pool is not None and (current_user is None or not proxy_pool.is_available(current_user["username"])):
+        proxy_state["proxy_user"] = proxy_pool.select(previous=current_user["username"] if current_user else None)
+
+    for i in range(retries):
+        if i > 0:
+            metrics.http_retries.inc()
+        proxy_user = proxy_state["proxy_user"] if proxy_pool is not None else None
+        proxy_url = build_proxy_url(proxy_user) if proxy_user else None
+
+        # Wait only as long as this proxy user's and host's token buckets require
+        wait = rate_limiter.reserve(proxy_user["username"] if proxy_user else None, target_host)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        attempt_start = time.monotonic()
+        try:
+            async with session.get(
+                encoded_url,
+                headers=headers,
+                proxy=proxy_url,
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                content = await response.read()
+                latency = time.monotonic() - attempt_start
+
+                status = str(response.status)
+                metrics.http_requests.inc(status=status, proxy_user=proxy_user["username"] if proxy_user else "none")
+                metrics.http_request_duration.observe(latency, status=status)
+                metrics.http_response_bytes.inc(len(content))
+
+                if response.status == 200:
+                    if proxy_user:
+                        proxy_pool.record_success(proxy_user["username"], latency)
+                    return FetchedResponse(response.status, content, encoded_url, timedelta(seconds=latency))
+
+                if proxy_user:
+                    proxy_pool.record_failure(proxy_user["username"], f"HTTP {response.status}", latency)
+                logger.warning("Request failed with status code %d", response.status, extra=log_context)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning("Attempt %d failed: %s: %s", i + 1, type(e).__name__, e, extra=log_context)
+            metrics.http_requests.inc(status=type(e).__name__, proxy_user=proxy_user["username"] if proxy_user else "none")
+            metrics.http_request_duration.observe(time.monotonic() - attempt_start, status="error")
+            if proxy_user:
+                proxy_pool.record_failure(proxy_user["username"], type(e).__name__, time.monotonic() - attempt_start)
+
+        # Move to the healthiest other user so a failing account doesn't use up the retry budget
+        if proxy_user and i < retries - 1:
+            proxy_state["proxy_user"] = proxy_pool.select(previous=proxy_user["username"], exclude=proxy_user["username"])
+
+        # Sleep before retrying
+        if i < retries - 1:
+            retry_delay = delay * (1 + (0.5 * i))
+            await asyncio.sleep(retry_delay)
+
+    metrics.http_failures.inc()
+    logger.error("All retry attempts failed for %s", url, extra=log_context)
+    return None
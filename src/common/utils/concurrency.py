@@ -0,0 +1,137 @@
+"""
+Adaptive concurrency module for scraper workers.
+
+This module provides an AIMD (additive increase, multiplicative decrease) controller
+that limits how many workers may fetch at the same time. Request outcomes reported by
+fetch_with_retries drive the limit: it grows while latency and error rates stay healthy
+and shrinks quickly when the target or proxy starts throttling or blocking.
+"""
+
+import math
+import threading
+from src.common.utils.log import get_logger
+
+# Status codes that indicate we are being throttled or blocked
+THROTTLE_STATUS_CODES = {403, 407, 429, 503}
+
+logger = get_logger(__name__)
+
+
+class AdaptiveConcurrencyController:
+    """
+    AIMD controller gating the number of active fetchers.
+
+    Workers call acquire() before fetching a page and release() afterwards.
+    Every request attempt is reported through record(); once per window of
+    samples the limit is adjusted.
+    """
+
+    def __init__(self, initial_limit, min_limit=1, max_limit=None, increase=1, decrease_factor=0.5,
+                 latency_target=None, error_threshold=0.1, window=20):
+        """
+        Args:
+            initial_limit: Number of fetchers allowed when the run starts.
+            min_limit: Lower bound for the limit.
+            max_limit: Upper bound for the limit (default: initial_limit).
+            increase: Fetchers added after a healthy window.
+            decrease_factor: Multiplier applied to the limit after an unhealthy window.
+            latency_target: Average latency in seconds above which a window is unhealthy (optional).
+            error_threshold: Error rate above which a window is unhealthy.
+            window: Number of request samples per adjustment.
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max_limit or initial_limit
+        self.limit = min(max(initial_limit, self.min_limit), self.max_limit)
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_target = latency_target
+        self.error_threshold = error_threshold
+        self.window = window
+
+        self.active = 0
+        self._condition = threading.Condition()
+        self._samples = 0
+        self._errors = 0
+        self._latency_total = 0.0
+
+    def acquire(self):
+        """Block until a fetcher slot is available under the current limit."""
+        with self._condition:
+            while self.active >= self.limit:
+                self._condition.wait()
+            self.active += 1
+
+    def release(self):
+        """Release a fetcher slot."""
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+    def record(self, latency, status_code=None, proxy_error=False):
+        """
+        Record the outcome of a single request attempt.
+
+        Args:
+            latency: Time taken by the attempt in seconds.
+            status_code: HTTP status code, or None if the request raised.
+            proxy_error: Whether the attempt failed with a proxy error.
+        """
+        with self._condition:
+            self._samples += 1
+            self._latency_total += latency
+            if proxy_error or status_code is None or status_code in THROTTLE_STATUS_CODES or status_code >= 500:
+                self._errors += 1
+
+            if self._samples >= self.window:
+                self._adjust()
+
+    def _adjust(self):
+        """Apply AIMD to the limit from the current window. Caller must hold the lock."""
+        error_rate = self._errors / self._samples
+        average_latency = self._latency_total / self._samples
+
+        old_limit = self.limit
+        unhealthy = error_rate > self.error_threshold or (
+            self.latency_target is not None and average_latency > self.latency_target
+        )
+        if unhealthy:
+            self.limit = max(self.min_limit, math.floor(self.limit * self.decrease_factor))
+        else:
+            self.limit = min(self.max_limit, self.limit + self.increase)
+
+        if self.limit != old_limit:
+            logger.info("Concurrency limit %s from %d to %d (error rate: %.0f%%, avg latency: %.2fs)",
+                        "decreased" if unhealthy else "increased", old_limit, self.limit,
+                        error_rate * 100, average_latency,
+                        extra={"category": "concurrency", "limit": self.limit})
+            # Wake waiting workers so they see a raised limit
+            self._condition.notify_all()
+
+        self._samples = 0
+        self._errors = 0
+        self._latency_total = 0.0
+
+
+def create_controller(config, default_workers):
+    """
+    Create an AdaptiveConcurrencyController from a configuration dictionary.
+
+    Args:
+        config: Dictionary with optional keys initial_workers, min_workers, max_workers,
+            latency_target, error_threshold, window, decrease_factor and increase.
+        default_workers: Worker count used when initial/max workers are not configured.
+
+    Returns:
+        controller: Configured AdaptiveConcurrencyController.
+    """
+    max_workers = config.get("max_workers", default_workers)
+    return AdaptiveConcurrencyController(
+        initial_limit=config.get("initial_workers", max(1, max_workers // 2)),
+        min_limit=config.get("min_workers", 1),
+        max_limit=max_workers,
+        increase=config.get("increase", 1),
+        decrease_factor=config.get("decrease_factor", 0.5),
+        latency_target=config.get("latency_target"),
+        error_threshold=config.get("error_threshold", 0.1),
+        window=config.get("window", 20)
+    )
@@ -6,19 +6,114 @@ This module provides functions for making HTTP requests with retries and error h
 
 import requests
 import time
-import random
-import json
 import threading
+from requests.adapters import HTTPAdapter
 from config.config import REQUEST
+from src.common.utils.rate_limit import get_rate_limiter
+from src.common.utils.proxy_pool import get_proxy_pool
+from src.common.utils import metrics
+from src.common.utils.log import get_logger
 from urllib.parse import quote, urlparse, parse_qsl, urlencode, urlunparse
 
-# Thread-local storage for worker-specific proxy selection
+# Thread-local storage for worker-specific proxy selection and pooled sessions
 thread_local = threading.local()
 
-# Lock for thread-safe user selection
-proxy_user_lock = threading.Lock()
+logger = get_logger(__name__)
 
-def fetch_with_retries(url, headers, use_proxy=True, retries=None, delay=None, timeout=None, worker_id=None):
+def encode_url(url):
+    """Re-encode the query string of a URL so it is safe to send."""
+    parsed_url = urlparse(url)
+    query_params = parse_qsl(parsed_url.query)
+    encoded_query = urlencode(query_params)
+    parsed_url = parsed_url._replace(query=encoded_query)
+    return urlunparse(parsed_url)
+
+def build_proxy_url(proxy_user):
+    """
+    Build the Oxylabs proxy URL for a proxy user.
+    
+    Args:
+        proxy_user: Proxy user dictionary with "username" and "password".
+        
+    Returns:
+        proxy_url: Proxy URL including credentials and session parameters.
+    """
+    username = proxy_user["username"]
+    password = proxy_user["password"]
+    
+    # Format the proxy URL according to Oxylabs format
+    base_url = REQUEST["proxy"]["base_url"]
+    session_id = REQUEST["proxy"]["session_id"]
+    session_time = REQUEST["proxy"]["session_time"]
+    
+    # URL encode the password to handle special characters
+    encoded_password = quote(password)
+    
+    # Add country targeting if configured (for US-only websites)
+    country = REQUEST["proxy"].get("country", "")
+    country_param = f"-cc-{country.upper()}" if country else ""
+    
+    # Use https protocol for the proxy URL to fix the 522 error
+    return f"https://customer-{username}{country_param}-sessid-{session_id}-sesstime-{session_time}:{encoded_password}@{base_url}"
+
+def get_session(proxy_user=None):
+    """
+    Get the pooled keep-alive session for the calling thread.
+    
+    Each worker thread keeps one requests.Session per proxy user so TCP/TLS
+    connections to the proxy gateway are reused across pages and retries.
+    When the proxy user changes, the old session is closed and a new one is built.
+    
+    Pool sizes are read from REQUEST["pool"] ("connections", "maxsize", "block").
+    
+    Args:
+        proxy_user: Proxy user dictionary, or None for direct connections.
+        
+    Returns:
+        session: requests.Session bound to the proxy user.
+    """
+    session_key = proxy_user["username"] if proxy_user else None
+    session = getattr(thread_local, 'session', None)
+    
+    if session is not None and thread_local.session_key == session_key:
+        return session
+    
+    # Proxy user was rotated (or no session yet), rebuild the session
+    close_session()
+    
+    pool_config = REQUEST.get("pool", {})
+    adapter = HTTPAdapter(
+        pool_connections=pool_config.get("connections", 4),
+        pool_maxsize=pool_config.get("maxsize", 4),
+        pool_block=pool_config.get("block", False),
+        max_retries=0  # Retries are handled by fetch_with_retries
+    )
+    
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    
+    thread_local.session = session
+    thread_local.session_key = session_key
+    return session
+
+def close_session():
+    """Close the calling thread's pooled session, if any."""
+    session = getattr(thread_local, 'session', None)
+    if session is not None:
+        session.close()
+        thread_local.session = None
+        thread_local.session_key = None
+
+def release_proxy_user():
+    """Return the calling thread's proxy user to the pool when a worker finishes."""
+    proxy_user = getattr(thread_local, 'proxy_user', None)
+    proxy_pool = get_proxy_pool()
+    if proxy_user is not None and proxy_pool is not None:
+        proxy_pool.release(proxy_user["username"])
+    thread_local.proxy_user = None
+
+def fetch_with_retries(url, headers, use_proxy=True, retries=None, delay=None, timeout=None, worker_id=None, controller=None):
     """
     Fetch data from the API with retry functionality.
     
@@ -30,116 +125,117 @@ def fetch_with_retries(url, headers, use_proxy=True, retries=None, delay=None, t
         delay: Delay between retries in seconds (default: from config).
         timeout: Request timeout in seconds (default: from config).
         worker_id: Optional worker ID for parallel processing logging.
+        controller: Optional AdaptiveConcurrencyController to report each attempt's outcome to.
         
     Returns:
         response: Response object if successful, None otherwise.
     """
-    worker_prefix = f"Worker {worker_id}: " if worker_id is not None else ""
+    log_context = {"category": "http", "worker_id": worker_id}
     
     retries = retries or REQUEST["retries"]
     delay = delay or REQUEST["delay"]
     timeout = timeout or REQUEST.get("timeout", 30)  # Default to 30 seconds if not in config
     
     # Ensure URL is properly encoded
-    parsed_url = urlparse(url)
-    query_params = parse_qsl(parsed_url.query)
-    encoded_query = urlencode(query_params)
-    parsed_url = parsed_url._replace(query=encoded_query)
-    encoded_url = urlunparse(parsed_url)
-    
-    print(f"\n--- {worker_prefix}HTTP Request ---")
-    print(f"{worker_prefix}URL: {url}")
-    print(f"{worker_prefix}Using proxy: {use_proxy}")
-    print(f"{worker_prefix}Max retries: {retries}")
-    print(f"{worker_prefix}Timeout: {timeout} seconds")
-    
-    # For the first attempt, initialize thread-local proxy user
-    if use_proxy and not hasattr(thread_local, 'proxy_user') and REQUEST["proxy"]["users"]:
-        with proxy_user_lock:
-            # Assign a unique user to this thread/worker if possible
-            users = REQUEST["proxy"]["users"]
-            if worker_id is not None and worker_id < len(users):
-                # Deterministic assignment for specific workers
-                thread_local.proxy_user = users[worker_id % len(users)]
-                print(f"{worker_prefix}Assigned dedicated proxy user: {thread_local.proxy_user['username']}")
-            else:
-                # Random assignment for workers without specific ID
-                thread_local.proxy_user = random.choice(users)
-                print(f"{worker_prefix}Assigned random proxy user: {thread_local.proxy_user['username']}")
+    encoded_url = encode_url(url)
+    target_host = urlparse(encoded_url).netloc
+    rate_limiter = get_rate_limiter()
+    
+    logger.debug("GET %s (proxy: %s, retries: %d, timeout: %ss)", url, use_proxy, retries, timeout, extra=log_context)
+    
+    # Proxy users are chosen by health; a worker keeps its user while it stays healthy
+    proxy_pool = get_proxy_pool() if use_proxy else None
+    current_user = getattr(thread_local, 'proxy_user', None)
+    if proxy_pool is not None and (current_user is None or not proxy_pool.is_available(current_user["username"])):
+        thread_local.proxy_user = proxy_pool.select(previous=current_user["username"] if current_user else None)
+        logger.debug("Assigned proxy user %s", thread_local.proxy_user["username"], extra=log_context)
     
     for i in range(retries):
+        attempt_start = time.monotonic()
+        if i > 0:
+            metrics.http_retries.inc()
         try:
-            print(f"{worker_prefix}Attempt {i + 1}/{retries}: Connecting to {encoded_url.split('?')[0]}...")
+            proxy_user = thread_local.proxy_user if proxy_pool is not None else None
+            logger.debug("Attempt %d/%d via proxy user %s", i + 1, retries,
+                         proxy_user["username"] if proxy_user else None, extra=log_context)
             
-            # Set up proxy if requested
-            proxies = None
+            # Reuse the pooled session for this worker/proxy user pairing
+            session = get_session(proxy_user)
             
-            if use_proxy and REQUEST["proxy"]:
-                # Use the thread-local user or select a new one if needed
-                if not hasattr(thread_local, 'proxy_user') or (i > 0 and i % 3 == 0):  # Change user every 3 failed attempts
-                    with proxy_user_lock:
-                        if "users" in REQUEST["proxy"] and REQUEST["proxy"]["users"]:
-                            thread_local.proxy_user = random.choice(REQUEST["proxy"]["users"])
-                
-                if hasattr(thread_local, 'proxy_user'):
-                    username = thread_local.proxy_user["username"]
-                    password = thread_local.proxy_user["password"]
-                    
-                    # Format the proxy URL according to Oxylabs format
-                    base_url = REQUEST["proxy"]["base_url"]
-                    session_id = REQUEST["proxy"]["session_id"]
-                    session_time = REQUEST["proxy"]["session_time"]
-                    
-                    # URL encode the password to handle special characters
-                    encoded_password = quote(password)
-                    
-                    # Add country targeting if configured (for US-only websites)
-                    country = REQUEST["proxy"].get("country", "")
-                    country_param = f"-cc-{country.upper()}" if country else ""
-                    
-                    # Use https protocol for the proxy URL to fix the 522 error
-                    proxy_url = f"https://customer-{username}{country_param}-sessid-{session_id}-sesstime-{session_time}:{encoded_password}@{base_url}"
-                    
-                    proxies = {
-                        "http": proxy_url,
-                        "https": proxy_url
-                    }
-                    
-                    print(f"{worker_prefix}Using proxy user: {username}")
+            # Wait only as long as this proxy user's and host's token buckets require
+            waited = rate_limiter.acquire(proxy_user["username"] if proxy_user else None, target_host)
+            if waited > 0:
+                logger.debug("Rate limited for %.2f seconds", waited, extra=log_context)
+            attempt_start = time.monotonic()
+            
+            # Proxies and verify are passed per request: set on the session, environment
+            # settings (HTTPS_PROXY, REQUESTS_CA_BUNDLE, ...) would take precedence over them
+            proxies = None
+            if proxy_user:
+                proxy_url = build_proxy_url(proxy_user)
+                proxies = {
+                    "http": proxy_url,
+                    "https": proxy_url
+                }
             
             # Make the request with a timeout to prevent hanging
-            response = requests.get(
+            response = session.get(
                 encoded_url, 
                 headers=headers, 
                 proxies=proxies, 
-                timeout=timeout, 
+                timeout=timeout,
                 verify=False  # Disable SSL verification for proxy connections
             )
             
+            latency = time.monotonic() - attempt_start
+            if controller is not None:
+                controller.record(latency, status_code=response.status_code)
+            
+            status = str(response.status_code)
+            metrics.http_requests.inc(status=status, proxy_user=proxy_user["username"] if proxy_user else "none")
+            metrics.http_request_duration.observe(latency, status=status)
+            metrics.http_response_bytes.inc(len(response.content))
+            
             if response.status_code == 200:
-                content_length = len(response.content)
-                print(f"{worker_prefix}Request successful! Status code: {response.status_code}, Content length: {content_length} bytes")
+                if proxy_user:
+                    proxy_pool.record_success(proxy_user["username"], latency)
+                logger.debug("Status %d, %d bytes in %.3fs", response.status_code, len(response.content), latency, extra=log_context)
                 return response
             else:
-                print(f"{worker_prefix}Request failed with status code: {response.status_code}")
-                print(f"{worker_prefix}Response: {response.text[:200]}..." if response.text else "Empty response")
+                if proxy_user:
+                    proxy_pool.record_failure(proxy_user["username"], f"HTTP {response.status_code}", latency)
+                logger.warning("Request failed with status code %d: %s", response.status_code,
+                               response.text[:200] if response.text else "empty response", extra=log_context)
                 
         except requests.exceptions.RequestException as e:
-            print(f"{worker_prefix}Attempt {i + 1} failed: {e}")
-            print(f"{worker_prefix}Error type: {type(e).__name__}")
+            logger.warning("Attempt %d failed: %s: %s", i + 1, type(e).__name__, e, extra=log_context)
+            
+            latency = time.monotonic() - attempt_start
+            if controller is not None:
+                controller.record(latency, proxy_error=isinstance(e, requests.exceptions.ProxyError))
             
-            # If this is a proxy error, try with a different user on the next attempt
-            if "ProxyError" in str(type(e).__name__) and i < retries - 1:
-                print(f"{worker_prefix}Proxy error detected. Will try with a different user on next attempt.")
-                # Clear the thread-local proxy user to force selection of a new one
-                if hasattr(thread_local, 'proxy_user'):
-                    delattr(thread_local, 'proxy_user')
+            metrics.http_requests.inc(status=type(e).__name__, proxy_user=proxy_user["username"] if proxy_user else "none")
+            metrics.http_request_duration.observe(latency, status="error")
+            
+            if proxy_user:
+                proxy_pool.record_failure(proxy_user["username"], type(e).__name__, latency)
+            
+            if isinstance(e, requests.exceptions.ProxyError):
+                # Drop pooled connections that went through the failing proxy
+                close_session()
+        
+        # Move to the healthiest other user so a failing account doesn't use up the retry budget
+        if proxy_user and i < retries - 1:
+            thread_local.proxy_user = proxy_pool.select(previous=proxy_user["username"], exclude=proxy_user["username"])
+            if thread_local.proxy_user is not proxy_user:
+                logger.debug("Switching to proxy user %s for next attempt", thread_local.proxy_user["username"], extra=log_context)
             
         # Sleep before retrying
         if i < retries - 1:  # Don't sleep after the last attempt
             retry_delay = delay * (1 + (0.5 * i))  # Increase delay slightly for each retry
-            print(f"{worker_prefix}Waiting {retry_delay:.1f} seconds before next attempt...")
+            logger.debug("Waiting %.1f seconds before next attempt", retry_delay, extra=log_context)
             time.sleep(retry_delay)
             
-    print(f"{worker_prefix}All retry attempts failed.")
+    metrics.http_failures.inc()
+    logger.error("All retry attempts failed for %s", url, extra=log_context)
     return None 
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""
+JSON helpers for the raw-bytes product path.
+
+Responses are decoded once and each product keeps the exact bytes it had in the
+response, so the product store, the database writers and the API can pass those
+bytes along instead of serializing the product again.
+
+Pages are decoded with the standard library's scanner, which reports where each
+product starts and ends, so the raw bytes are sliced straight out of the response.
+orjson doesn't report positions, so it is only used (when installed) by loads and
+dumps, e.g. to decode stored products when they are read.
+"""
+
+import re
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+
+def loads(content):
+    """Decode a JSON document from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def dumps(value, default=None):
+    """
+    Encode a value as compact JSON bytes, safe to keep in memory long term.
+
+    default is called for values JSON can't represent, as in json.dumps; with it, orjson
+    also accepts non-string dictionary keys like the standard library does.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS if default is not None else 0
+        # orjson's result holds on to its whole output buffer (about 1 KB however short
+        # the JSON), so copy it into an exact-size bytes object
+        return bytes(memoryview(orjson.dumps(value, default=default, option=option)))
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=default).encode("utf-8")
+
+
+def to_json_text(product):
+    """Get a product as JSON text, passing raw JSON bytes or text through unchanged."""
+    if isinstance(product, (bytes, bytearray, memoryview)):
+        return bytes(product).decode("utf-8")
+    if isinstance(product, str):
+        return product
+    return json.dumps(product)
+
+
+def loads_with_raw_items(content, field="data"):
+    """
+    Decode a JSON object and get the raw bytes of each item of one of its array fields.
+
+    Args:
+        content: JSON document as bytes (e.g. response.content) or str.
+        field: Name of the array field whose items are returned as bytes.
+
+    Returns:
+        tuple: (document, raw_items) where raw_items[i] holds the JSON bytes of
+            document[field][i] (empty if the field is missing or not an array). Items
+            are always on one line: an item spanning several lines (as in pretty-printed
+            responses) is encoded again compactly, so the bytes can go into NDJSON as they are.
+
+    Raises:
+        ValueError: If the content is not valid JSON.
+    """
+    if isinstance(content, (bytes, bytearray, memoryview)):
+        content = bytes(content)
+        text = content.decode("utf-8")
+        # Character offsets are byte offsets when the document is pure ASCII
+        source = content if len(text) == len(content) else None
+    else:
+        text = content
+        source = None
+
+    index = _skip(text, 0)
+    if not text.startswith("{", index):
+        return json.loads(text), []
+
+    document = {}
+    raw_items = []
+    index = _skip(text, index + 1)
+    if text.startswith("}", index):
+        index += 1
+    else:
+        while True:
+            key, index = _decoder.raw_decode(text, index)
+            if not isinstance(key, str):
+                raise json.JSONDecodeError("Expecting property name", text, index)
+            index = _expect(text, index, ":")
+            if key == field and text.startswith("[", index):
+                value, raw_items, index = _decode_array(text, index, source)
+            else:
+                value, index = _decoder.raw_decode(text, index)
+            document[key] = value
+
+            index = _skip(text, index)
+            if text.startswith(",", index):
+                index = _skip(text, index + 1)
+            elif text.startswith("}", index):
+                index += 1
+                break
+            else:
+                raise json.JSONDecodeError("Expecting ',' delimiter", text, index)
+
+    if _skip(text, index) != len(text):
+        raise json.JSONDecodeError("Extra data", text, index)
+    return document, raw_items
+
+
+def _skip(text, index):
+    return _WHITESPACE.match(text, index).end()
+
+
+def _expect(text, index, delimiter):
+    """Skip whitespace, a delimiter and more whitespace, returning the next index."""
+    index = _skip(text, index)
+    if not text.startswith(delimiter, index):
+        raise json.JSONDecodeError(f"Expecting '{delimiter}' delimiter", text, index)
+    return _skip(text, index + 1)
+
+
+def _decode_array(text, index, source):
+    """
+    Decode the array starting at text[index], keeping each item's JSON bytes.
+
+    Returns:
+        tuple: (items, raw_items, end index)
+    """
+    items = []
+    raw_items = []
+    index = _skip(text, index + 1)
+    if text.startswith("]", index):
+        return items, raw_items, index + 1
+
+    while True:
+        item, end = _decoder.raw_decode(text, index)
+        items.append(item)
+        raw = source[index:end] if source is not None else text[index:end].encode("utf-8")
+        # Line breaks can only be whitespace between tokens, never inside a JSON string
+        if b"\n" in raw or b"\r" in raw:
+            raw = dumps(item)
+        raw_items.append(raw)
+
+        index = _skip(text, end)
+        if text.startswith(",", index):
+            index = _skip(text, index + 1)
+        elif text.startswith("]", index):
+            return items, raw_items, index + 1
+        else:
+            raise json.JSONDecodeError("Expecting ',' delimiter", text, index)
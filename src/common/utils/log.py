@@ -0,0 +1,203 @@
+"""
+Structured logging module for the scrapers.
+
+This module sets up leveled loggers whose records are handed to a background thread
+through a bounded queue, so worker threads never block on stdout. Per-request and
+per-page messages are logged at DEBUG level with a category, and can be sampled or
+rate limited per category; when DEBUG is disabled they cost a single level check.
+Records can be rendered as plain text or as JSON lines carrying context fields such
+as worker_id, job_id and page.
+
+Settings are read from the optional LOGGING dictionary in config/config.py:
+    level: Minimum level to emit (default: "INFO").
+    format: "text" (default) or "json".
+    queue_size: Maximum number of records waiting to be written (default: 10000);
+        records are dropped rather than blocking when the queue is full.
+    sample: Dictionary of category -> fraction of records to keep (e.g. {"http": 0.01}).
+    rate_limit: Dictionary of category -> maximum records per second.
+
+Usage:
+    logger = get_logger(__name__)
+    logger.debug("Fetched page", extra={"category": "page", "worker_id": 3, "page": 12})
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import time
+
+try:
+    from config.config import LOGGING
+except ImportError:  # The LOGGING section is optional
+    LOGGING = {}
+
+ROOT_LOGGER_NAME = "xpedia"
+
+# Record attributes set by the logging module itself, left out of the JSON context
+_STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_configure_lock = threading.Lock()
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Render records as one JSON object per line, including extra context fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Render records as the plain message, prefixed with the worker when one is given."""
+
+    def format(self, record):
+        message = record.getMessage()
+        worker_id = getattr(record, "worker_id", None)
+        if worker_id is not None:
+            message = f"Worker {worker_id}: {message}"
+        if record.levelno >= logging.WARNING:
+            message = f"{record.levelname}: {message}"
+        if record.exc_text:
+            message = f"{message}\n{record.exc_text}"
+        return message
+
+
+class CategoryFilter(logging.Filter):
+    """Sample or rate limit records by their "category" attribute."""
+
+    def __init__(self, sample=None, rate_limit=None):
+        """
+        Args:
+            sample: Dictionary of category -> fraction of records to keep.
+            rate_limit: Dictionary of category -> maximum records per second.
+        """
+        super().__init__()
+        self.sample = dict(sample or {})
+        self.rate_limit = dict(rate_limit or {})
+        self._windows = {}  # category -> [window start, records in window]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        category = getattr(record, "category", None)
+        if category is None or record.levelno >= logging.WARNING:
+            return True
+
+        fraction = self.sample.get(category)
+        if fraction is not None and random.random() >= fraction:
+            return False
+
+        limit = self.rate_limit.get(category)
+        if limit is not None:
+            now = time.monotonic()
+            with self._lock:
+                window = self._windows.setdefault(category, [now, 0])
+                if now - window[0] >= 1.0:
+                    window[0], window[1] = now, 0
+                if window[1] >= limit:
+                    return False
+                window[1] += 1
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Merge args into the message here so mutable arguments can't change before the
+        # listener formats it, but leave formatting to the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(settings=None):
+    """
+    Set up the queue handler and background listener for all scraper loggers.
+
+    Called automatically by get_logger; call it directly to apply other settings.
+
+    Args:
+        settings: Logging settings (default: LOGGING from config/config.py).
+    """
+    with _configure_lock:
+        _configure(LOGGING if settings is None else settings)
+
+
+def _configure(settings):
+    """Install the handlers. Caller must hold _configure_lock."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter() if settings.get("format") == "json" else TextFormatter())
+
+    log_queue = queue.Queue(maxsize=settings.get("queue_size", 10000))
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(CategoryFilter(settings.get("sample"), settings.get("rate_limit")))
+
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    root.handlers = [queue_handler]
+    root.setLevel(settings.get("level", "INFO"))
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Write any queued records and stop the background listener."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def get_logger(name):
+    """
+    Get a logger under the scrapers' root logger, configuring logging on first use.
+
+    Args:
+        name: Logger name, usually the module's __name__.
+
+    Returns:
+        logger: logging.Logger instance.
+    """
+    if _listener is None:
+        with _configure_lock:
+            if _listener is None:
+                _configure(LOGGING)
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+atexit.register(shutdown_logging)
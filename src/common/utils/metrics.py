@@ -0,0 +1,240 @@
+"""
+Metrics module for scraper telemetry.
+
+This module provides thread-safe counters, gauges and histograms registered in a
+process-wide registry, and renders them in the Prometheus text exposition format
+(served by the API server at /api/metrics). The metrics recorded by the scrapers
+are defined at the bottom of this module.
+"""
+
+import math
+import threading
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base class holding one value per combination of label values."""
+
+    metric_type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        """
+        Args:
+            name: Metric name.
+            documentation: Help text shown in the exposition output.
+            labelnames: Names of the labels every sample is recorded with.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self):
+        """Return (suffix, labelvalues, extra_label, value) tuples for rendering."""
+        with self._lock:
+            values = dict(self._values)
+        if not values and not self.labelnames:
+            values[()] = 0  # Unlabelled metrics are always exposed
+        return [("", key, None, value) for key, value in sorted(values.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for suffix, labelvalues, extra, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, labelvalues, extra)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    metric_type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that can go up and down, or be read from a callback at render time."""
+
+    metric_type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._functions = {}  # Label values -> callbacks whose results are summed
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def add_function(self, function, **labels):
+        """
+        Add a callback whose result is summed with the others registered for the same labels.
+
+        Used for per-job resources such as queues, so concurrent jobs add up instead of
+        the last job started replacing the others. Remove it with remove_function when done.
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._functions.setdefault(key, []).append(function)
+
+    def remove_function(self, function, **labels):
+        """Remove a callback added with add_function (ignored if it is not registered)."""
+        key = self._key(labels)
+        with self._lock:
+            functions = self._functions.get(key, [])
+            if function in functions:
+                functions.remove(function)
+
+    def _samples(self):
+        with self._lock:
+            values = dict(self._values)
+            functions = {key: list(callbacks) for key, callbacks in self._functions.items()}
+        for key, callbacks in functions.items():
+            total = 0
+            for function in callbacks:
+                try:
+                    total += function()
+                except Exception:
+                    continue
+            values[key] = total
+        if not values and not self.labelnames:
+            values[()] = 0
+        return [("", key, None, value) for key, value in sorted(values.items())]
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][index] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def _samples(self):
+        samples = []
+        with self._lock:
+            items = sorted((key, dict(state, counts=list(state["counts"]))) for key, state in self._values.items())
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["counts"]):
+                cumulative += count
+                samples.append(("_bucket", key, ("le", _format_value(float(bound))), cumulative))
+            samples.append(("_sum", key, None, state["sum"]))
+            samples.append(("_count", key, None, state["count"]))
+        return samples
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+# Process-wide registry served at /api/metrics
+REGISTRY = MetricsRegistry()
+
+# HTTP requests made by the fetch functions
+http_requests = REGISTRY.counter(
+    "scraper_http_requests_total", "HTTP request attempts by response status and proxy user", ("status", "proxy_user")
+)
+http_retries = REGISTRY.counter("scraper_http_retries_total", "HTTP request attempts after the first for a URL")
+http_failures = REGISTRY.counter("scraper_http_failures_total", "URLs that failed after all retry attempts")
+http_request_duration = REGISTRY.histogram(
+    "scraper_http_request_duration_seconds", "HTTP request attempt latency", ("status",)
+)
+http_response_bytes = REGISTRY.counter("scraper_http_response_bytes_total", "Response body bytes received")
+
+# Page processing
+pages_processed = REGISTRY.counter("scraper_pages_total", "Pages processed by result", ("scraper", "result"))
+page_duration = REGISTRY.histogram(
+    "scraper_page_duration_seconds", "Time to fetch, parse and store one page", ("scraper",)
+)
+active_workers = REGISTRY.gauge("scraper_active_workers", "Worker threads or coroutines currently crawling", ("scraper",))
+queue_depth = REGISTRY.gauge("scraper_queue_depth", "Items waiting in internal queues", ("queue",))
+
+# Product storage
+products_ingested = REGISTRY.counter("scraper_products_ingested_total", "Products written to storage", ("storage",))
+products_skipped = REGISTRY.counter(
+    "scraper_products_skipped_total", "Products not stored by reason", ("reason",)
+)
+storage_write_duration = REGISTRY.histogram(
+    "scraper_storage_write_duration_seconds", "Time to write one batch of products", ("storage",)
+)
@@ -0,0 +1,306 @@
+"""
+Memory-bounded product store.
+
+Products are appended per job in batches and read back as one continuous list per
+job. Batches stay in memory as decoded dictionaries until the store passes its
+memory budget; the oldest batches (across all jobs) are then spilled to one
+append-only segment file per job, written as compact JSON lines, and read back
+through a memory map. Readers don't need to know where a product lives.
+
+Sizes are measured as encoded JSON bytes, so the budget is approximate: decoded
+dictionaries take several times more memory than their JSON. Values JSON can't
+represent (such as datetimes) are encoded as strings, so they are stored rather
+than rejected, and come back as strings once spilled.
+
+With a record_type (such as the LKQ scraper's ProductRecord), products are held as
+compact records carrying their raw JSON bytes instead of dictionaries. Spilling then
+writes those bytes as they are, and readers still get dictionaries back.
+"""
+
+import os
+import mmap
+import shutil
+import tempfile
+import threading
+from array import array
+from collections import deque
+
+from src.common.utils import jsonlib
+
+DEFAULT_READ_BATCH_SIZE = 1000
+
+
+def _encode(product):
+    return jsonlib.dumps(product, default=str)
+
+
+class _JobProducts:
+    """One job's products: a spilled prefix on disk followed by batches in memory."""
+
+    def __init__(self):
+        self.path = None
+        self.offsets = array("Q", [0])  # Start of each spilled product, plus the end of the file
+        self.batches = deque()          # [products, size] pairs, oldest first
+        self.memory_count = 0
+        self._file = None
+        self._map = None
+
+    @property
+    def spilled_count(self):
+        return len(self.offsets) - 1
+
+    @property
+    def count(self):
+        return self.spilled_count + self.memory_count
+
+    def spill(self, encoded_products):
+        """Append encoded products (one JSON document each) to the segment file."""
+        if self._file is None:
+            self._file = open(self.path, "a+b")
+        position = self.offsets[-1]
+        lines = []
+        for encoded in encoded_products:
+            line = encoded + b"\n"
+            lines.append(line)
+            position += len(line)
+            self.offsets.append(position)
+        self._file.write(b"".join(lines))
+        self._file.flush()
+
+    def read_spilled(self, start, stop):
+        """Copy the JSON bytes of spilled products [start, stop) out of the memory-mapped segment."""
+        if self._map is None or len(self._map) < self.offsets[stop]:
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        offsets = self.offsets
+        segment = self._map
+        # Each line ends one byte before the next product starts
+        return [segment[offsets[index]:offsets[index + 1] - 1] for index in range(start, stop)]
+
+    def read_memory(self, start, stop):
+        """Return in-memory products [start, stop), counted from the first in-memory product."""
+        result = []
+        position = 0
+        for products, _ in self.batches:
+            end = position + len(products)
+            if end > start:
+                result.extend(products[max(0, start - position):stop - position])
+            if end >= stop:
+                break
+            position = end
+        return result
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ProductStore:
+    """Thread-safe per-job product lists with a memory budget and spill-to-disk."""
+
+    def __init__(self, memory_budget=None, spill_dir=None, record_type=None):
+        """
+        Args:
+            memory_budget: Bytes of products to keep in memory (None keeps everything in memory).
+            spill_dir: Directory for segment files. Each store creates its own subdirectory
+                there on first spill (default: the system temp directory).
+            record_type: Compact record class to hold products as. It must provide
+                a from_product(product, raw=None) constructor, a raw attribute
+                with the JSON bytes and a data property returning the dictionary.
+        """
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.record_type = record_type
+        self.memory_bytes = 0
+        self.spilled_bytes = 0
+        self._directory = None
+        self._segments_created = 0
+        self._jobs = {}
+        self._order = deque()  # (job_id, batch) in append order, for spilling the oldest first
+        self._lock = threading.Lock()
+
+    def __contains__(self, job_id):
+        with self._lock:
+            return job_id in self._jobs
+
+    def job_ids(self):
+        """Get the IDs of all jobs with stored products."""
+        with self._lock:
+            return list(self._jobs)
+
+    def count(self, job_id):
+        """Get the number of products stored for a job."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.count if job is not None else 0
+
+    def append(self, job_id, products, raw_products=None):
+        """
+        Append a batch of products to a job, spilling the oldest batches past the budget.
+
+        Args:
+            job_id: Job the products belong to.
+            products: Product dictionaries.
+            raw_products: Each product's JSON bytes, kept by compact records instead of
+                encoding the product again, and used to size the batch (optional; entries
+                may be None).
+
+        Returns:
+            count: Number of products stored for the job after the append.
+        """
+        if self.record_type is not None:
+            if raw_products is None:
+                products = [self.record_type.from_product(product) for product in products]
+            else:
+                products = [self.record_type.from_product(product, raw=raw) for product, raw in zip(products, raw_products)]
+            size = sum(len(record.raw) for record in products)
+        else:
+            products = list(products)
+            if self.memory_budget is None:
+                size = 0
+            elif raw_products is not None:
+                size = sum(len(raw) if raw is not None else len(_encode(product))
+                           for product, raw in zip(products, raw_products))
+            else:
+                size = sum(len(_encode(product)) for product in products)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                job = self._jobs[job_id] = _JobProducts()
+            if products:
+                batch = [products, size]
+                job.batches.append(batch)
+                job.memory_count += len(products)
+                self.memory_bytes += size
+                if self.memory_budget is not None:
+                    self._order.append((job_id, batch))
+                    while self.memory_bytes > self.memory_budget and self._order:
+                        self._spill_oldest()
+            return job.count
+
+    def get_range(self, job_id, start, stop):
+        """Get a job's products [start, stop) as dictionaries, in the order they were appended."""
+        spilled, in_memory = self._read(job_id, start, stop, jsonlib.loads)
+        if self.record_type is not None:
+            in_memory = [record.data for record in in_memory]
+        return spilled + in_memory
+
+    def get_raw_range(self, job_id, start, stop):
+        """Get a job's products [start, stop) as JSON bytes, without decoding them."""
+        spilled, in_memory = self._read(job_id, start, stop, bytes)
+        if self.record_type is not None:
+            return spilled + [record.raw for record in in_memory]
+        return spilled + [_encode(product) for product in in_memory]
+
+    def _read(self, job_id, start, stop, decode):
+        """
+        Read a job's products [start, stop).
+
+        Only the byte ranges are copied under the lock; spilled products are decoded
+        after it is released, so long reads don't hold up appends from the scrapers.
+
+        Returns:
+            tuple: (spilled products decoded with decode, in-memory items as stored)
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return [], []
+            start = max(0, start)
+            stop = min(stop, job.count)
+            if start >= stop:
+                return [], []
+
+            spilled = job.spilled_count
+            spilled_items = job.read_spilled(start, min(stop, spilled)) if start < spilled else []
+            memory_items = job.read_memory(max(0, start - spilled), stop - spilled) if stop > spilled else []
+        if decode is not bytes:
+            spilled_items = [decode(item) for item in spilled_items]
+        return spilled_items, memory_items
+
+    def get(self, job_id, index):
+        """Get one product by its position in the job (IndexError if out of range)."""
+        products = self.get_range(job_id, index, index + 1)
+        if not products:
+            raise IndexError(f"Job {job_id} has no product at position {index}")
+        return products[0]
+
+    def get_all(self, job_id):
+        """Get a copy of all of a job's products. Prefer iter_products for large jobs."""
+        return self.get_range(job_id, 0, self.count(job_id))
+
+    def iter_products(self, job_id, batch_size=DEFAULT_READ_BATCH_SIZE):
+        """Yield a job's products, reading batch_size products at a time."""
+        return self._iter(self.get_range, job_id, batch_size)
+
+    def iter_raw(self, job_id, batch_size=DEFAULT_READ_BATCH_SIZE):
+        """Yield a job's products as JSON bytes, reading batch_size products at a time."""
+        return self._iter(self.get_raw_range, job_id, batch_size)
+
+    def _iter(self, read_range, job_id, batch_size):
+        start = 0
+        while True:
+            products = read_range(job_id, start, start + batch_size)
+            yield from products
+            if len(products) < batch_size:
+                return
+            start += len(products)
+
+    def discard(self, job_id):
+        """Drop a job's products and delete its segment file."""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is None:
+                return
+            self.memory_bytes -= sum(size for _, size in job.batches)
+            self.spilled_bytes -= job.offsets[-1]
+            job.close()
+        if job.path is not None and os.path.exists(job.path):
+            os.remove(job.path)
+
+    def close(self):
+        """Drop all products and remove the spill directory."""
+        with self._lock:
+            for job in self._jobs.values():
+                job.close()
+            self._jobs.clear()
+            self._order.clear()
+            self.memory_bytes = 0
+            self.spilled_bytes = 0
+            directory, self._directory = self._directory, None
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def _segment_path(self, job_id):
+        """Path of a job's segment file. Caller must hold _lock."""
+        if self._directory is None:
+            if self.spill_dir is not None:
+                os.makedirs(self.spill_dir, exist_ok=True)
+            self._directory = tempfile.mkdtemp(prefix="products_", dir=self.spill_dir)
+        self._segments_created += 1
+        safe_name = "".join(char if char.isalnum() or char in "-_" else "_" for char in str(job_id))
+        return os.path.join(self._directory, f"{safe_name}_{self._segments_created}.jsonl")
+
+    def _spill_oldest(self):
+        """Move the oldest in-memory batch to its job's segment file. Caller must hold _lock."""
+        job_id, batch = self._order.popleft()
+        job = self._jobs.get(job_id)
+        if job is None or not job.batches or job.batches[0] is not batch:
+            return  # The job was discarded
+        products, size = batch
+        if job.path is None:
+            job.path = self._segment_path(job_id)
+        before = job.offsets[-1]
+        if self.record_type is not None:
+            job.spill(record.raw for record in products)
+        else:
+            job.spill(_encode(product) for product in products)
+        job.batches.popleft()
+        job.memory_count -= len(products)
+        self.memory_bytes -= size
+        self.spilled_bytes += job.offsets[-1] - before
@@ -0,0 +1,228 @@
+"""
+Proxy pool module for selecting proxy users by health.
+
+This module tracks success rate, latency and recent errors for each proxy user in
+REQUEST["proxy"]["users"]. Users that keep failing trip a circuit breaker and are
+taken out of rotation; after a cool-down a single half-open probe request decides
+whether they return. New requests go to the healthiest available user.
+"""
+
+import random
+import threading
+import time
+from config.config import REQUEST
+from src.common.utils.log import get_logger
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+logger = get_logger(__name__)
+
+
+class ProxyUserHealth:
+    """Health statistics and circuit breaker state for one proxy user."""
+
+    def __init__(self, user):
+        self.user = user
+        self.username = user["username"]
+        self.success_rate = 1.0  # Exponentially weighted
+        self.latency = 0.0  # Exponentially weighted, in seconds
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_error = None
+        self.state = CLOSED
+        self.opened_at = None
+        self.probe_in_flight = False
+        self.assigned_workers = 0
+
+    def score(self):
+        """Higher is healthier. Spreads load across users assigned to fewer workers."""
+        return self.success_rate / ((1.0 + self.latency) * (1.0 + self.assigned_workers))
+
+    def to_dict(self):
+        return {
+            "username": self.username,
+            "state": self.state,
+            "success_rate": round(self.success_rate, 3),
+            "latency": round(self.latency, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "assigned_workers": self.assigned_workers
+        }
+
+
+class ProxyPool:
+    """
+    Thread-safe pool of proxy users with health scoring and circuit breakers.
+
+    Workers call select() to get a user, keep it while requests succeed, and report
+    every attempt with record_success() or record_failure().
+    """
+
+    def __init__(self, users, failure_threshold=5, min_success_rate=0.5, open_seconds=30.0, ewma_alpha=0.2):
+        """
+        Args:
+            users: List of proxy user dictionaries with "username" and "password".
+            failure_threshold: Consecutive failures that trip the circuit breaker.
+            min_success_rate: Weighted success rate below which the breaker trips.
+            open_seconds: Time a tripped user stays out of rotation before a half-open probe.
+            ewma_alpha: Weight of the latest request in the success rate and latency averages.
+        """
+        self.failure_threshold = failure_threshold
+        self.min_success_rate = min_success_rate
+        self.open_seconds = open_seconds
+        self.ewma_alpha = ewma_alpha
+        self._health = {user["username"]: ProxyUserHealth(user) for user in users}
+        self._lock = threading.Lock()
+
+    def _is_available(self, health, now):
+        """Check if a user can take a request, moving open breakers to half-open after the cool-down."""
+        if health.state == OPEN and now - health.opened_at >= self.open_seconds:
+            health.state = HALF_OPEN
+            health.probe_in_flight = False
+        if health.state == HALF_OPEN:
+            return not health.probe_in_flight
+        return health.state == CLOSED
+
+    def select(self, previous=None, exclude=None):
+        """
+        Select the healthiest available proxy user.
+
+        Args:
+            previous: Username the worker held before, released from its assignment.
+            exclude: Username to avoid if any other user is available.
+
+        Returns:
+            user: Proxy user dictionary, or None if the pool is empty.
+        """
+        with self._lock:
+            if previous in self._health:
+                self._health[previous].assigned_workers = max(0, self._health[previous].assigned_workers - 1)
+
+            if not self._health:
+                return None
+
+            now = time.monotonic()
+            candidates = [h for h in self._health.values() if self._is_available(h, now)]
+            if len(candidates) > 1 and exclude is not None:
+                candidates = [h for h in candidates if h.username != exclude] or candidates
+
+            if candidates:
+                best_score = max(h.score() for h in candidates)
+                chosen = random.choice([h for h in candidates if h.score() == best_score])
+            else:
+                # Every breaker is open, fall back to the user that will reopen soonest
+                chosen = min(self._health.values(), key=lambda h: h.opened_at or 0)
+
+            if chosen.state == HALF_OPEN:
+                chosen.probe_in_flight = True
+                logger.info("Proxy user %s: half-open probe", chosen.username,
+                            extra={"category": "proxy", "proxy_user": chosen.username})
+
+            chosen.assigned_workers += 1
+            return chosen.user
+
+    def is_available(self, username):
+        """Check if a user the worker already holds may keep sending requests."""
+        with self._lock:
+            health = self._health.get(username)
+            return health is not None and health.state == CLOSED
+
+    def release(self, username):
+        """Release a worker's assignment to a user."""
+        with self._lock:
+            if username in self._health:
+                self._health[username].assigned_workers = max(0, self._health[username].assigned_workers - 1)
+
+    def record_success(self, username, latency):
+        """Record a successful request, closing a half-open breaker."""
+        with self._lock:
+            health = self._health.get(username)
+            if health is None:
+                return
+            health.requests += 1
+            health.consecutive_failures = 0
+            health.success_rate += self.ewma_alpha * (1.0 - health.success_rate)
+            health.latency += self.ewma_alpha * (latency - health.latency)
+            if health.state != CLOSED:
+                logger.info("Proxy user %s: circuit closed after successful probe", username,
+                            extra={"category": "proxy", "proxy_user": username})
+                health.state = CLOSED
+                health.probe_in_flight = False
+
+    def record_failure(self, username, error, latency=None):
+        """
+        Record a failed request and trip the circuit breaker if the user is unhealthy.
+
+        Args:
+            username: Proxy username the request used.
+            error: Short description (status code or exception name).
+            latency: Time taken by the attempt in seconds (optional).
+        """
+        with self._lock:
+            health = self._health.get(username)
+            if health is None:
+                return
+            health.requests += 1
+            health.failures += 1
+            health.consecutive_failures += 1
+            health.last_error = error
+            health.success_rate -= self.ewma_alpha * health.success_rate
+            if latency is not None:
+                health.latency += self.ewma_alpha * (latency - health.latency)
+
+            if health.state == HALF_OPEN or (
+                health.state == CLOSED and (
+                    health.consecutive_failures >= self.failure_threshold
+                    or health.success_rate < self.min_success_rate
+                )
+            ):
+                health.state = OPEN
+                health.opened_at = time.monotonic()
+                health.probe_in_flight = False
+                logger.warning("Proxy user %s: circuit opened for %.0fs (success rate: %.0f%%, last error: %s)",
+                               username, self.open_seconds, health.success_rate * 100, error,
+                               extra={"category": "proxy", "proxy_user": username})
+
+    def summary(self):
+        """Return health statistics for all users."""
+        with self._lock:
+            return [health.to_dict() for health in self._health.values()]
+
+
+# Shared pool used by all workers in the process
+_proxy_pool = None
+_proxy_pool_lock = threading.Lock()
+
+
+def get_proxy_pool():
+    """
+    Get the process-wide proxy pool built from REQUEST["proxy"]["users"].
+
+    Breaker settings are read from REQUEST["proxy"]["health"]: "failure_threshold",
+    "min_success_rate", "open_seconds" and "ewma_alpha".
+
+    Returns:
+        proxy_pool: Shared ProxyPool instance, or None if no proxy users are configured.
+    """
+    global _proxy_pool
+    with _proxy_pool_lock:
+        if _proxy_pool is None:
+            proxy_config = REQUEST.get("proxy") or {}
+            users = proxy_config.get("users", [])
+            if not users:
+                return None
+            health_config = proxy_config.get("health", {})
+            _proxy_pool = ProxyPool(
+                users,
+                failure_threshold=health_config.get("failure_threshold", 5),
+                min_success_rate=health_config.get("min_success_rate", 0.5),
+                open_seconds=health_config.get("open_seconds", 30.0),
+                ewma_alpha=health_config.get("ewma_alpha", 0.2)
+            )
+        return _proxy_pool
@@ -0,0 +1,135 @@
+"""
+Rate limiting module for outgoing scraper requests.
+
+This module provides token buckets keyed per proxy user and per target host.
+Workers reserve a token from each bucket that applies to a request and wait only
+as long as needed for the tokens to become available, giving a precise
+requests-per-second ceiling per proxy account and per host.
+"""
+
+import threading
+import time
+from config.config import REQUEST
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. Reservations
+    may take the balance negative; the caller then waits until the debt is repaid,
+    which keeps waiting workers in FIFO order without busy polling.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        Args:
+            rate: Tokens added per second.
+            capacity: Maximum burst size (default: one second worth of tokens, at least 1).
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, self.rate))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """
+        Reserve tokens and return how long the caller must wait before using them.
+
+        Args:
+            tokens: Number of tokens to take.
+
+        Returns:
+            wait: Seconds to wait (0 if the tokens are available now).
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= tokens
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class RateLimiter:
+    """Registry of token buckets keyed per proxy user and per target host."""
+
+    def __init__(self, per_user_rate=None, per_host_rate=None, burst=None):
+        """
+        Args:
+            per_user_rate: Requests per second allowed for each proxy user (None for no limit).
+            per_host_rate: Requests per second allowed for each target host (None for no limit).
+            burst: Bucket capacity (default: one second worth of requests).
+        """
+        self.per_user_rate = per_user_rate
+        self.per_host_rate = per_host_rate
+        self.burst = burst
+        self._user_buckets = {}
+        self._host_buckets = {}
+        self._lock = threading.Lock()
+
+    def _get_bucket(self, buckets, key, rate):
+        with self._lock:
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = TokenBucket(rate, self.burst)
+            return bucket
+
+    def reserve(self, proxy_user=None, host=None):
+        """
+        Reserve a request slot for a proxy user and target host.
+
+        Args:
+            proxy_user: Proxy username the request is sent through (optional).
+            host: Target host of the request (optional).
+
+        Returns:
+            wait: Seconds to wait before sending the request.
+        """
+        wait = 0.0
+        if proxy_user and self.per_user_rate:
+            wait = max(wait, self._get_bucket(self._user_buckets, proxy_user, self.per_user_rate).reserve())
+        if host and self.per_host_rate:
+            wait = max(wait, self._get_bucket(self._host_buckets, host, self.per_host_rate).reserve())
+        return wait
+
+    def acquire(self, proxy_user=None, host=None):
+        """
+        Block until a request may be sent for a proxy user and target host.
+
+        Returns:
+            wait: Seconds spent waiting.
+        """
+        wait = self.reserve(proxy_user, host)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+# Shared limiter used by all workers in the process
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    Get the process-wide rate limiter configured from REQUEST["rate_limit"].
+
+    Supported keys: "per_user_rps" and "per_host_rps" (default: no limit for either)
+    and "burst". Both rates are opt-in, e.g. {"per_user_rps": 2.0}.
+
+    Returns:
+        rate_limiter: Shared RateLimiter instance.
+    """
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            config = REQUEST.get("rate_limit", {})
+            _rate_limiter = RateLimiter(
+                per_user_rate=config.get("per_user_rps"),
+                per_host_rate=config.get("per_host_rps"),
+                burst=config.get("burst")
+            )
+        return _rate_limiter
@@ -0,0 +1,150 @@
+"""
+Asyncio crawl engine for the LKQ scraper.
+
+This module implements an alternative to the ThreadPoolExecutor engine in scraper.py.
+All workers run as coroutines on a single event loop and share one pooled aiohttp
+session, with a semaphore bounding the number of pages in flight. Page allocation,
+empty-page detection and product storage are shared with the threaded engine; the
+blocking part of page handling (decoding, file and archive writes, storage flushes)
+runs in the default thread pool so it never stalls the event loop.
+
+Enable it with LKQ["engine"] = "asyncio". Settings are read from LKQ["async"]:
+    workers: Number of worker coroutines (default: LKQ["parallel_workers"]).
+    max_in_flight: Maximum number of concurrent page requests (default: workers).
+"""
+
+import asyncio
+import contextlib
+import time
+from config.config import LKQ, PARALLEL
+from src.common.utils.async_http import create_client_session, fetch_with_retries_async
+from src.common.utils.proxy_pool import get_proxy_pool
+from src.common.utils import metrics
+from src.common.utils.log import get_logger
+from src.scrapers.lkq.scraper import (
+    build_page_url,
+    handle_page_response,
+)
+
+logger = get_logger(__name__)
+
+
+async def fetch_worker_async(context, session, semaphore, url_base, worker_id):
+    """
+    Coroutine counterpart of fetch_worker using the same dynamic page allocation.
+
+    Args:
+        context: CrawlContext of the job.
+        session: Shared aiohttp.ClientSession.
+        semaphore: Semaphore bounding the number of in-flight pages.
+        url_base: Base API URL.
+        worker_id: Worker ID for proxy assignment and logging.
+
+    Returns:
+        tuple: (total_products, pages_processed)
+    """
+    total_products = 0
+    pages_processed = 0
+    success = False
+    proxy_state = {}
+    worker_state = {}
+    metrics.active_workers.inc(scraper="lkq")
+
+    try:
+        # Try different URLs if needed
+        for attempt, url_to_use in enumerate([url_base] + context.alternative_urls):
+            if attempt > 0:
+                logger.info("Trying alternative URL #%d", attempt, extra={"worker_id": worker_id})
+
+            # Keep processing pages until end of data is reached
+            while True:
+                page_num = context.next_page(worker_state)
+                if page_num is None:
+                    break
+
+                url = build_page_url(url_to_use, page_num, context.take)
+                page_start = time.monotonic()
+                async with semaphore:
+                    if context.replay_transport is not None:
+                        response = await context.replay_transport.fetch_async(url, worker_id)
+                    else:
+                        response = await fetch_with_retries_async(
+                            session, url, LKQ["headers"].copy(), proxy_state, use_proxy=LKQ.get("use_proxy", True), worker_id=worker_id
+                        )
+
+                # Decoding, file writes and storage flushes block, so keep them off the event loop
+                products_count, page_success, is_empty = await asyncio.to_thread(
+                    handle_page_response, context, response, page_num, worker_id
+                )
+                metrics.page_duration.observe(time.monotonic() - page_start, scraper="lkq")
+
+                if page_success:
+                    success = True
+                    total_products += products_count
+                    pages_processed += 1
+                else:
+                    # If this URL is failing, try another URL
+                    break
+
+            # If we successfully found products with this URL, don't try others
+            if success:
+                break
+    finally:
+        # Return this worker's proxy user to the pool, even if the loop raised
+        proxy_pool = get_proxy_pool()
+        if proxy_pool is not None and proxy_state.get("proxy_user"):
+            proxy_pool.release(proxy_state["proxy_user"]["username"])
+        metrics.active_workers.dec(scraper="lkq")
+
+    return total_products, pages_processed
+
+
+async def crawl_async(context, api_url, num_workers, max_in_flight):
+    """
+    Run all worker coroutines and aggregate their results.
+
+    Returns:
+        tuple: (total_products, total_pages_processed)
+    """
+    semaphore = asyncio.Semaphore(max_in_flight)
+    total_products = 0
+    total_pages_processed = 0
+
+    # Replays never touch the network, so they don't need aiohttp
+    session_context = create_client_session(max_in_flight) if context.replay_transport is None else contextlib.nullcontext()
+    async with session_context as session:
+        results = await asyncio.gather(
+            *(fetch_worker_async(context, session, semaphore, api_url, worker_id) for worker_id in range(num_workers)),
+            return_exceptions=True
+        )
+
+    for worker_id, result in enumerate(results):
+        if isinstance(result, Exception):
+            print(f"Worker {worker_id} failed: {result}")
+            continue
+        worker_products, worker_pages = result
+        total_products += worker_products
+        total_pages_processed += worker_pages
+
+    return total_products, total_pages_processed
+
+
+def run_async_engine(context, api_url):
+    """
+    Run the crawl on a new event loop in the calling thread.
+
+    Args:
+        context: CrawlContext of the job.
+        api_url: Base API URL for LKQ.
+
+    Returns:
+        tuple: (total_products, total_pages_processed)
+    """
+    async_config = LKQ.get("async", {})
+    num_workers = async_config.get("workers", LKQ.get("parallel_workers", PARALLEL["max_workers"]))
+    max_in_flight = async_config.get("max_in_flight", num_workers)
+
+    print(f"Async workers: {num_workers}")
+    print(f"Max pages in flight: {max_in_flight}")
+
+    return asyncio.run(crawl_async(context, api_url, num_workers, max_in_flight))
@@ -0,0 +1,159 @@
+"""
+Per-job crawl state for the LKQ scraper.
+
+Each call to fetch_all_products creates a CrawlContext holding the page frontier,
+the end-of-data tracking and the helpers configured for that run (page plan,
+concurrency controller, deduplicator, fingerprint index, response archive and
+replay transport). Workers of every engine share their job's context instead of
+module globals, so several crawls can run side by side in one process, e.g. one
+job per category, each started with its own POST /api/scrapers/lkq/start.
+
+Products are collected in per-thread buffers and handed to storage in batches, so
+workers only contend on the storage lock once per batch rather than once per page.
+Buffers are kept small and are also flushed once their oldest product has waited
+PRODUCT_FLUSH_INTERVAL seconds, so a running job's products show up in the API
+and the job counts soon after they are scraped.
+"""
+
+import threading
+import time
+
+# Number of consecutive empty pages before considering we reached the end
+EMPTY_PAGE_THRESHOLD = 3
+
+# Products a thread collects before flushing them to storage
+PRODUCT_BUFFER_SIZE = 50
+
+# Seconds a buffered product may wait before its buffer is flushed anyway
+PRODUCT_FLUSH_INTERVAL = 1.0
+
+
+class CrawlContext:
+    """Frontier, counters and per-run helpers for one crawl."""
+
+    def __init__(self, job_id, take, empty_page_threshold=EMPTY_PAGE_THRESHOLD,
+                 product_sink=None, buffer_size=PRODUCT_BUFFER_SIZE, flush_interval=PRODUCT_FLUSH_INTERVAL):
+        """
+        Args:
+            job_id: Job ID for tracking (None for untracked runs).
+            take: Number of results per page.
+            empty_page_threshold: Consecutive empty pages that mark the end of the data.
+            product_sink: Function called with (products, raw_products) for each batch
+                flushed from a buffer; raw_products holds each product's JSON bytes or None.
+            buffer_size: Products a thread buffers before flushing them (1 flushes every page).
+            flush_interval: Seconds after which a thread's next page flushes its buffer
+                even if it is not full (None to flush only when full).
+        """
+        self.job_id = job_id
+        self.take = take
+        self.empty_page_threshold = empty_page_threshold
+        self.product_sink = product_sink
+        self.buffer_size = max(1, buffer_size)
+        self.flush_interval = flush_interval
+
+        # Guards the frontier and the empty page counter; never held while storing products
+        self.lock = threading.Lock()
+
+        # Per-thread product buffers, registered so they can all be flushed at the end
+        self._local = threading.local()
+        self._buffers = []
+        self._buffers_lock = threading.Lock()
+        self.next_page_to_process = 0
+        self.end_of_data_reached = False
+        self.consecutive_empty_pages = 0
+
+        # Adaptive concurrency controller (None when disabled)
+        self.concurrency_controller = None
+
+        # Pre-computed page plan (None for dynamic page allocation)
+        self.page_plan = None
+
+        # Product fingerprint index for incremental runs (None when incremental mode is disabled)
+        self.fingerprint_index = None
+
+        # Deduplicator dropping products repeated across pages (None when disabled)
+        self.deduplicator = None
+
+        # Compressed archive of raw responses (None when disabled)
+        self.response_archive = None
+
+        # Replay transport serving archived pages instead of the network (None for live crawls)
+        self.replay_transport = None
+
+        # Catalog URLs workers switch to when the job's URL fails (empty to stay on the job's URL)
+        self.alternative_urls = []
+
+    def next_page(self, worker_state=None):
+        """
+        Claim the next page to fetch.
+
+        When a page plan is active, pages are claimed from the worker's current chunk
+        without touching the shared counter.
+
+        Args:
+            worker_state: Per-worker dictionary used to hold the worker's planned chunk.
+
+        Returns:
+            page_num: Page number, or None if the end of the data has been reached.
+        """
+        if self.page_plan is not None:
+            return self.page_plan.next_page(worker_state if worker_state is not None else {})
+
+        with self.lock:
+            if self.end_of_data_reached:
+                return None
+
+            if self.consecutive_empty_pages >= self.empty_page_threshold:
+                self.end_of_data_reached = True
+                print(f"End of data reached after {self.consecutive_empty_pages} consecutive empty pages")
+                return None
+
+            page = self.next_page_to_process
+            self.next_page_to_process += 1
+            return page
+
+    def add_products(self, products, raw_products=None):
+        """
+        Add products to the calling thread's buffer, flushing it once it is full.
+
+        Each thread (or event loop) only touches its own buffer, so no lock is taken
+        until a batch is flushed.
+
+        Args:
+            products: Product dictionaries.
+            raw_products: The products' JSON bytes from the response (optional).
+        """
+        buffer = getattr(self._local, "products", None)
+        if buffer is None:
+            # [products, raw products, time the oldest buffered product was added]
+            buffer = self._local.products = [[], [], None]
+            with self._buffers_lock:
+                self._buffers.append(buffer)
+
+        buffered_products, buffered_raw, first_added = buffer
+        now = time.monotonic()
+        if not buffered_products:
+            buffer[2] = first_added = now
+        buffered_products.extend(products)
+        buffered_raw.extend(raw_products if raw_products is not None else [None] * len(products))
+        if len(buffered_products) >= self.buffer_size or (
+            self.flush_interval is not None and now - first_added >= self.flush_interval
+        ):
+            self._flush(buffer)
+
+    def flush_products(self):
+        """Flush every thread's buffered products. Call after all workers have stopped."""
+        with self._buffers_lock:
+            buffers = list(self._buffers)
+        for buffer in buffers:
+            self._flush(buffer)
+
+    def _flush(self, buffer):
+        buffered_products, buffered_raw, _ = buffer
+        if not buffered_products:
+            return
+        batch, raw_batch = buffered_products[:], buffered_raw[:]
+        del buffered_products[:]
+        del buffered_raw[:]
+        if self.product_sink is not None:
+            self.product_sink(batch, raw_batch)
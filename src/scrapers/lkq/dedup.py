@@ -0,0 +1,107 @@
+"""
+Cross-page product deduplication for the LKQ scraper.
+
+LKQ endpoints are paged with skip/take over a `closestFirst` sort, so products can
+shift between pages while a crawl is running and show up more than once. This module
+drops repeated products as they stream in, keyed on the LKQ product identifier.
+
+Seen identifiers are stored as 64-bit hashes in an open-addressing table backed by a
+flat array, about 16 bytes per product, so millions of identifiers fit in a few
+tens of megabytes.
+"""
+
+import hashlib
+import threading
+from array import array
+from src.scrapers.lkq.products import product_key
+
+
+class CompactHashSet:
+    """Set of 64-bit hashes stored in a linear-probing array('Q') table."""
+
+    def __init__(self, initial_capacity=1 << 16):
+        capacity = 1
+        while capacity < initial_capacity:
+            capacity <<= 1
+        self._slots = array("Q", bytes(8 * capacity))
+        self._mask = capacity - 1
+        self.size = 0
+
+    def add(self, value):
+        """
+        Add a nonzero 64-bit value.
+
+        Returns:
+            added: True if the value was new, False if it was already present.
+        """
+        slots = self._slots
+        mask = self._mask
+        index = value & mask
+        while True:
+            current = slots[index]
+            if current == 0:
+                slots[index] = value
+                self.size += 1
+                if self.size * 2 > len(slots):
+                    self._grow()
+                return True
+            if current == value:
+                return False
+            index = (index + 1) & mask
+
+    def _grow(self):
+        """Double the table size and re-insert every value."""
+        old_slots = self._slots
+        self._slots = array("Q", bytes(16 * len(old_slots)))
+        self._mask = len(self._slots) - 1
+        self.size = 0
+        for value in old_slots:
+            if value:
+                self.add(value)
+
+    def memory_bytes(self):
+        return self._slots.itemsize * len(self._slots)
+
+
+def key_hash(key):
+    """Hash a product key to a nonzero 64-bit integer."""
+    value = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+    return value or 1
+
+
+class ProductDeduplicator:
+    """Thread-safe streaming deduplicator for a single job."""
+
+    def __init__(self, id_field=None, initial_capacity=1 << 16):
+        """
+        Args:
+            id_field: Explicit product field holding the identifier (optional).
+            initial_capacity: Initial number of hash table slots.
+        """
+        self.id_field = id_field
+        self.seen = CompactHashSet(initial_capacity)
+        self.duplicate_count = 0
+        self._lock = threading.Lock()
+
+    def filter_new(self, products):
+        """
+        Return the products whose identifier has not been seen before in this job.
+
+        Products without an identifier are always kept.
+
+        Args:
+            products: List of product dictionaries.
+
+        Returns:
+            unique: List of products seen for the first time.
+        """
+        hashes = [key_hash(key) if key is not None else None
+                  for key in (product_key(product, self.id_field) for product in products)]
+        unique = []
+        with self._lock:
+            for product, value in zip(products, hashes):
+                if value is None or self.seen.add(value):
+                    unique.append(product)
+                else:
+                    self.duplicate_count += 1
+        return unique
@@ -0,0 +1,114 @@
+"""
+Fingerprint index for incremental LKQ scraping.
+
+This module keeps the content fingerprint of every product seen in the last completed
+run, keyed by the LKQ product identifier. During an incremental run, products whose
+fingerprint matches the index are skipped so only new or changed products are stored.
+The index is written back when the run completes. Concurrent jobs (e.g. one per
+category) share one index file: each save merges the fingerprints the job recorded
+into the file as it is on disk, so jobs finishing at the same time don't drop each
+other's fingerprints.
+"""
+
+import json
+import os
+import threading
+from src.scrapers.lkq.products import product_key, product_fingerprint
+
+# One lock per index file, held while it is read back, merged and written
+_file_locks = {}
+_file_locks_lock = threading.Lock()
+
+
+def _file_lock(path):
+    with _file_locks_lock:
+        return _file_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+def _load_fingerprints(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+class FingerprintIndex:
+    """Thread-safe product key -> fingerprint index persisted as a JSON file."""
+
+    def __init__(self, path, id_field=None):
+        """
+        Args:
+            path: Path of the index file. It is created on the first save.
+            id_field: Explicit product field holding the identifier (optional).
+        """
+        self.path = path
+        self.id_field = id_field
+        self.fingerprints = {}
+        self.updated = {}  # Fingerprints recorded by this run, merged into the file on save
+        self.changed_count = 0
+        self.unchanged_count = 0
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            try:
+                with _file_lock(path):
+                    self.fingerprints = _load_fingerprints(path)
+                print(f"Loaded {len(self.fingerprints)} product fingerprints from {path}")
+            except Exception as e:
+                print(f"Error loading fingerprint index {path}, starting empty: {e}")
+
+    def filter_changed(self, products):
+        """
+        Return the products that are new or changed since the last run and record their fingerprints.
+
+        Products without an identifier are always treated as changed.
+
+        Args:
+            products: List of product dictionaries.
+
+        Returns:
+            changed: List of new or changed products.
+        """
+        changed = []
+        with self._lock:
+            for product in products:
+                key = product_key(product, self.id_field)
+                if key is None:
+                    changed.append(product)
+                    continue
+
+                fingerprint = product_fingerprint(product)
+                if self.fingerprints.get(key) == fingerprint:
+                    self.unchanged_count += 1
+                    continue
+
+                self.fingerprints[key] = fingerprint
+                self.updated[key] = fingerprint
+                changed.append(product)
+
+            self.changed_count += len(changed)
+        return changed
+
+    def save(self):
+        """
+        Merge this run's fingerprints into the index file and write it atomically.
+
+        The file is read back first, so fingerprints saved by other jobs since this one
+        started are kept. An interrupted save keeps the previous index.
+        """
+        with self._lock, _file_lock(self.path):
+            merged = dict(self.fingerprints)
+            if os.path.exists(self.path):
+                try:
+                    merged = _load_fingerprints(self.path)
+                except Exception as e:
+                    print(f"Error reading fingerprint index {self.path}, overwriting it: {e}")
+            merged.update(self.updated)
+            self.fingerprints = merged
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(merged, f, separators=(",", ":"))
+            os.replace(temp_path, self.path)
+            print(f"Saved {len(self.fingerprints)} product fingerprints to {self.path}")
@@ -0,0 +1,308 @@
+"""
+Streaming pipeline engine for the LKQ scraper.
+
+This module splits page processing into three stages joined by bounded queues:
+
+    fetchers -> fetched pages queue -> parsers -> parsed pages queue -> persistence sinks
+
+Fetchers only do network I/O, parsers decode responses and track empty pages, and
+sinks archive responses and write products to storage. When storage falls behind, the
+queues fill up and block the stages upstream, so slow storage throttles fetching
+instead of growing memory, and network requests never wait on disk or DB writes.
+A page that cannot be parsed is reported back to the fetcher that fetched it, which
+then, like the threaded engine after a bad page, stops using that URL and moves on to
+the alternative URLs, fetching the failed pages again from there.
+If a parser or sink thread dies every stage stops instead of waiting on it.
+
+Enable it with LKQ["engine"] = "pipeline". Settings are read from LKQ["pipeline"]:
+    fetchers: Number of fetcher threads (default: LKQ["parallel_workers"]).
+    parsers: Number of parser threads (default: 2).
+    sinks: Number of persistence threads (default: 1).
+    fetch_queue_size: Capacity of the fetched pages queue (default: 2 x fetchers).
+    persist_queue_size: Capacity of the parsed pages queue (default: 4 x sinks).
+"""
+
+import queue
+import threading
+import time
+from config.config import LKQ
+from src.common.utils.http import close_session, release_proxy_user
+from src.common.utils import metrics
+from src.common.utils.log import get_logger
+from src.common.utils.jsonlib import loads_with_raw_items
+from src.scrapers.lkq import scraper
+
+# Marks the end of a stage's input
+STOP = object()
+
+# Seconds between checks for a failed stage while waiting on a queue
+QUEUE_POLL_INTERVAL = 0.5
+
+logger = get_logger(__name__)
+
+
+def put_unless_failed(target_queue, item, failed):
+    """
+    Put an item on a bounded queue, giving up if a stage has failed.
+
+    A failed stage no longer drains its input queue, so blocking on it forever
+    would hang the whole crawl; every stage stops instead.
+
+    Returns:
+        put: Whether the item was queued.
+    """
+    while not failed.is_set():
+        try:
+            target_queue.put(item, timeout=QUEUE_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def get_unless_failed(source_queue, failed):
+    """Take the next item from a queue, or STOP once a stage has failed."""
+    while not failed.is_set():
+        try:
+            return source_queue.get(timeout=QUEUE_POLL_INTERVAL)
+        except queue.Empty:
+            continue
+    return STOP
+
+
+class ParseOutcomes:
+    """
+    Parse results of each fetcher's pages, reported back by the parsers.
+
+    Fetchers don't parse their own pages, so this is how a fetcher learns that a page
+    failed and which pages to fetch again from the next URL.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._pending = {}       # worker_id -> pages queued but not parsed yet
+        self._parsed = set()     # Workers with at least one parsed page
+        self._failed_pages = {}  # worker_id -> pages that could not be parsed
+
+    def queued(self, worker_id):
+        with self._condition:
+            self._pending[worker_id] = self._pending.get(worker_id, 0) + 1
+
+    def parsed(self, worker_id, page_num, success):
+        with self._condition:
+            self._pending[worker_id] -= 1
+            if success:
+                self._parsed.add(worker_id)
+            else:
+                self._failed_pages.setdefault(worker_id, []).append(page_num)
+            self._condition.notify_all()
+
+    def has_failed(self, worker_id):
+        with self._condition:
+            return bool(self._failed_pages.get(worker_id))
+
+    def settle(self, worker_id, failed):
+        """
+        Wait until a worker's queued pages have been parsed (or a stage has failed).
+
+        Returns:
+            tuple: (whether any of the worker's pages parsed, pages that failed since the last call)
+        """
+        with self._condition:
+            while self._pending.get(worker_id, 0) > 0 and not failed.is_set():
+                self._condition.wait(QUEUE_POLL_INTERVAL)
+            return worker_id in self._parsed, self._failed_pages.pop(worker_id, [])
+
+
+def fetcher(context, url_base, worker_id, fetch_queue, failed, outcomes):
+    """
+    Fetch pages and hand the responses to the parsers.
+
+    Uses the same page allocation and alternative URL fallback as fetch_worker: a page
+    that fails to fetch or parse ends the current URL. Parsing runs behind fetching,
+    so later pages may already have parsed by the time a failure comes back; pages
+    that failed to parse are therefore always fetched again from the next URL, which
+    the worker then keeps using. After a failed fetch, the alternative URLs are only
+    tried while none of the worker's pages have parsed. Blocks when the fetched pages
+    queue is full, and stops if a later stage fails.
+    """
+    retry_pages = []
+    worker_state = {}
+    controller = context.concurrency_controller
+    metrics.active_workers.inc(scraper="lkq")
+
+    try:
+        for attempt, url_to_use in enumerate([url_base] + context.alternative_urls):
+            if attempt > 0:
+                logger.info("Trying alternative URL #%d", attempt, extra={"worker_id": worker_id})
+
+            while not failed.is_set() and not outcomes.has_failed(worker_id):
+                if controller is not None:
+                    controller.acquire()
+                try:
+                    page_num = retry_pages.pop(0) if retry_pages else context.next_page(worker_state)
+                    if page_num is None:
+                        break
+
+                    url = scraper.build_page_url(url_to_use, page_num, context.take)
+                    page_start = time.monotonic()
+                    response = scraper.fetch_page(context, url, worker_id)
+                finally:
+                    if controller is not None:
+                        controller.release()
+
+                if response is None or response.status_code != 200:
+                    metrics.page_duration.observe(time.monotonic() - page_start, scraper="lkq")
+                    logger.warning("Failed to fetch page %d", page_num + 1, extra={"category": "page", "worker_id": worker_id, "job_id": context.job_id, "page": page_num + 1})
+                    break
+
+                outcomes.queued(worker_id)
+                if not put_unless_failed(fetch_queue, (page_num, worker_id, response, page_start), failed):
+                    break
+
+            # Pages that could not be parsed are fetched again from the next URL. Otherwise,
+            # if pages were parsed from this worker's URLs, don't try others
+            any_parsed, retry_pages = outcomes.settle(worker_id, failed)
+            if failed.is_set() or (any_parsed and not retry_pages):
+                break
+    finally:
+        close_session()
+        release_proxy_user()
+        metrics.active_workers.dec(scraper="lkq")
+
+
+def parser(context, fetch_queue, persist_queue, stats, stats_lock, failed, outcomes):
+    """Decode fetched pages, update end-of-data tracking and pass products to the sinks."""
+    try:
+        while True:
+            item = get_unless_failed(fetch_queue, failed)
+            if item is STOP:
+                break
+
+            page_num, worker_id, response, page_start = item
+            try:
+                data, raw_products = loads_with_raw_items(response.content)
+                if not isinstance(data, dict):
+                    raise ValueError(f"expected a JSON object, got {type(data).__name__}")
+                products = data.get("data", [])
+                is_empty = len(products) == 0
+
+                with context.lock:
+                    scraper.update_empty_page_count(context, is_empty, worker_id)
+            except Exception as e:
+                logger.warning("Error parsing page %d: %s", page_num + 1, e, extra={"category": "page", "worker_id": worker_id, "page": page_num + 1})
+                metrics.pages_processed.inc(scraper="lkq", result="failed")
+                metrics.page_duration.observe(time.monotonic() - page_start, scraper="lkq")
+                outcomes.parsed(worker_id, page_num, False)
+                continue
+
+            outcomes.parsed(worker_id, page_num, True)
+            with stats_lock:
+                stats["products"] += len(products)
+                stats["pages"] += 1
+            metrics.pages_processed.inc(scraper="lkq", result="empty" if is_empty else "success")
+
+            # Blocks when the sinks fall behind, which in turn backs up the fetchers
+            if not put_unless_failed(persist_queue, (page_num, worker_id, response, products, raw_products, page_start), failed):
+                break
+    except BaseException:
+        logger.exception("Parser stopped unexpectedly")
+        failed.set()
+        raise
+
+
+def sink(context, persist_queue, failed):
+    """Archive responses and write products to storage."""
+    try:
+        while True:
+            item = get_unless_failed(persist_queue, failed)
+            if item is STOP:
+                break
+
+            page_num, worker_id, response, products, raw_products, page_start = item
+            try:
+                scraper.save_page_response(context, response, page_num, worker_id)
+                if context.job_id and products:
+                    scraper.store_page_products(context, worker_id, products, raw_products)
+            except Exception as e:
+                logger.error("Error storing page %d: %s", page_num + 1, e, extra={"category": "storage", "worker_id": worker_id, "page": page_num + 1})
+            # From the start of the fetch to storage, including the time spent queued between stages
+            metrics.page_duration.observe(time.monotonic() - page_start, scraper="lkq")
+    except BaseException:
+        logger.exception("Sink stopped unexpectedly")
+        failed.set()
+        raise
+
+
+def run_pipeline_engine(context, api_url, num_fetchers):
+    """
+    Run the crawl as a fetch -> parse -> persist pipeline.
+
+    Args:
+        context: CrawlContext of the job.
+        api_url: Base API URL for LKQ.
+        num_fetchers: Default number of fetcher threads.
+
+    Returns:
+        tuple: (total_products, total_pages_processed)
+    """
+    pipeline_config = LKQ.get("pipeline", {})
+    num_fetchers = pipeline_config.get("fetchers", num_fetchers)
+    num_parsers = pipeline_config.get("parsers", 2)
+    num_sinks = pipeline_config.get("sinks", 1)
+
+    fetch_queue = queue.Queue(maxsize=pipeline_config.get("fetch_queue_size", 2 * num_fetchers))
+    persist_queue = queue.Queue(maxsize=pipeline_config.get("persist_queue_size", 4 * num_sinks))
+    stats = {"products": 0, "pages": 0}
+    stats_lock = threading.Lock()
+    failed = threading.Event()  # Set when a parser or sink dies, so nothing waits on it
+    outcomes = ParseOutcomes()
+
+    logger.info("Pipeline stages: %d fetchers, %d parsers, %d sinks", num_fetchers, num_parsers, num_sinks,
+                extra={"job_id": context.job_id})
+
+    parser_threads = [
+        threading.Thread(target=parser, args=(context, fetch_queue, persist_queue, stats, stats_lock, failed, outcomes), daemon=True)
+        for _ in range(num_parsers)
+    ]
+    sink_threads = [
+        threading.Thread(target=sink, args=(context, persist_queue, failed), daemon=True)
+        for _ in range(num_sinks)
+    ]
+    fetcher_threads = [
+        threading.Thread(target=fetcher, args=(context, api_url, worker_id, fetch_queue, failed, outcomes), daemon=True)
+        for worker_id in range(num_fetchers)
+    ]
+
+    # Summed with the queues of other jobs running at the same time
+    metrics.queue_depth.add_function(fetch_queue.qsize, queue="fetched_pages")
+    metrics.queue_depth.add_function(persist_queue.qsize, queue="parsed_pages")
+
+    for thread in parser_threads + sink_threads + fetcher_threads:
+        thread.start()
+
+    # Shut the stages down in order so every queued page is drained. STOP is always
+    # forwarded, and dropped only if a stage has died and can no longer take it
+    try:
+        try:
+            for thread in fetcher_threads:
+                thread.join()
+        finally:
+            for _ in parser_threads:
+                put_unless_failed(fetch_queue, STOP, failed)
+        try:
+            for thread in parser_threads:
+                thread.join()
+        finally:
+            for _ in sink_threads:
+                put_unless_failed(persist_queue, STOP, failed)
+        for thread in sink_threads:
+            thread.join()
+    finally:
+        metrics.queue_depth.remove_function(fetch_queue.qsize, queue="fetched_pages")
+        metrics.queue_depth.remove_function(persist_queue.qsize, queue="parsed_pages")
+
+    if failed.is_set():
+        logger.warning("Pipeline stopped early because a stage failed", extra={"job_id": context.job_id})
+
+    return stats["products"], stats["pages"]
@@ -0,0 +1,214 @@
+"""
+Page planning module for the LKQ scraper.
+
+This module works out how many pages a crawl has before the workers start, either
+from the result count in the first LKQ response or, when no count is given, by
+probing `skip` exponentially and then binary searching for the last page. The page
+range is then split into chunks up front so workers claim whole chunks from a queue
+instead of taking pages one by one from a shared counter.
+"""
+
+import math
+import queue
+from collections import deque
+from src.common.utils.log import get_logger
+
+# Keys that may hold the total number of results in an LKQ response. A bare "count" is
+# left out: APIs often use it for the number of items on the current page.
+TOTAL_COUNT_KEYS = ("total", "totalCount", "totalResults", "totalItems", "recordsTotal")
+
+logger = get_logger(__name__)
+
+
+def find_total_count(data, count_key=None):
+    """
+    Find the total result count in an API response.
+
+    Args:
+        data: Parsed JSON response.
+        count_key: Explicit key to read the count from (optional).
+
+    Returns:
+        total: Total number of results, or None if the response has no count.
+    """
+    if not isinstance(data, dict):
+        return None
+
+    keys = (count_key,) if count_key else TOTAL_COUNT_KEYS
+    containers = [data] + [data[key] for key in ("meta", "pagination", "paging") if isinstance(data.get(key), dict)]
+    for container in containers:
+        for key in keys:
+            value = container.get(key)
+            if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+                return value
+    return None
+
+
+def is_plausible_total(total, first_count, take):
+    """
+    Check a reported total against the first page.
+
+    A total smaller than the first page is wrong, and a total equal to a full first
+    page is more likely that page's own item count than the size of the result set.
+    """
+    if total < first_count:
+        return False
+    return total > first_count or first_count < take
+
+
+def find_last_page(probe, take, known_pages=None):
+    """
+    Find the last non-empty page by exponential probing followed by binary search.
+
+    Args:
+        probe: Function taking a page number and returning its product count, or None on failure.
+        take: Number of results per page requested from the API.
+        known_pages: Dictionary of page number -> product count already fetched.
+
+    Returns:
+        last_page: Index of the last non-empty page (-1 if the first page is empty),
+            or None if a probe failed.
+    """
+    counts = dict(known_pages or {})
+
+    def count_for(page_num):
+        if page_num not in counts:
+            counts[page_num] = probe(page_num)
+        return counts[page_num]
+
+    first_count = count_for(0)
+    if first_count is None:
+        return None
+    if first_count == 0:
+        return -1
+
+    # A short first page is either the whole result set or the API capping `take`;
+    # page 1 tells them apart, and in the capped case its count is the real page size
+    page_size = take
+    if first_count < take:
+        second_count = count_for(1)
+        if second_count is None:
+            return None
+        if second_count == 0:
+            return 0
+        page_size = first_count
+
+    # Exponential phase: double the page number until we hit an empty page
+    low, high = 0, 1
+    while True:
+        count = count_for(high)
+        if count is None:
+            return None
+        if count == 0:
+            break
+        if count < page_size:
+            return high  # A partial page is the last one
+        low, high = high, high * 2
+
+    # Binary phase: `low` is a full page, `high` is empty
+    while high - low > 1:
+        middle = (low + high) // 2
+        count = count_for(middle)
+        if count is None:
+            return None
+        if count == 0:
+            high = middle
+        elif count < page_size:
+            return middle
+        else:
+            low = middle
+    return low
+
+
+def split_into_chunks(pages, chunk_pages):
+    """Split a sorted list of page numbers into chunks of at most chunk_pages pages."""
+    return [pages[i:i + chunk_pages] for i in range(0, len(pages), chunk_pages)]
+
+
+class PagePlan:
+    """
+    Pre-computed page chunks that workers claim from a queue.
+
+    Each worker keeps its current chunk in a per-worker state dictionary, so
+    claiming the next page needs no shared counter.
+    """
+
+    def __init__(self, total_pages, done_pages, chunk_pages):
+        """
+        Args:
+            total_pages: Number of pages in the crawl.
+            done_pages: Page numbers already fetched while planning.
+            chunk_pages: Number of pages per chunk.
+        """
+        self.total_pages = total_pages
+        remaining = [page for page in range(total_pages) if page not in done_pages]
+        self.chunks = queue.SimpleQueue()
+        for chunk in split_into_chunks(remaining, chunk_pages):
+            self.chunks.put(chunk)
+        self.chunk_count = math.ceil(len(remaining) / chunk_pages) if remaining else 0
+
+    def next_page(self, worker_state):
+        """
+        Claim the next planned page for a worker.
+
+        Args:
+            worker_state: Per-worker dictionary holding the worker's current chunk.
+
+        Returns:
+            page_num: Next page number, or None when all chunks have been claimed.
+        """
+        chunk = worker_state.get("chunk")
+        if not chunk:
+            try:
+                chunk = worker_state["chunk"] = deque(self.chunks.get_nowait())
+            except queue.Empty:
+                return None
+        return chunk.popleft()
+
+
+def create_page_plan(probe, take, chunk_pages, count_key=None):
+    """
+    Plan a crawl from the first response's result count or by probing for the last page.
+
+    Args:
+        probe: Function taking a page number and returning (product_count, data), with
+            product_count None on failure. Probed pages are fetched and stored by the caller.
+        take: Number of results per page.
+        chunk_pages: Number of pages per chunk.
+        count_key: Explicit response key holding the total result count (optional).
+
+    Returns:
+        plan: PagePlan, or None if planning failed and the caller should fall back to
+            dynamic page allocation.
+    """
+    first_count, first_data = probe(0)
+    if first_count is None:
+        return None
+
+    total = find_total_count(first_data, count_key)
+    if total is not None and not is_plausible_total(total, first_count, take):
+        logger.warning("Page planner: ignoring reported count %d for a first page of %d results", total, first_count,
+                       extra={"category": "planner"})
+        total = None
+    if total is not None:
+        total_pages = math.ceil(total / take)
+        logger.info("Page planner: response reports %d results (%d pages)", total, total_pages,
+                    extra={"category": "planner"})
+        return PagePlan(total_pages, {0}, chunk_pages)
+
+    probed = {0: first_count}
+
+    def probe_count(page_num):
+        count, _ = probe(page_num)
+        probed[page_num] = count
+        return count
+
+    last_page = find_last_page(probe_count, take, known_pages={0: first_count})
+    if last_page is None:
+        return None
+
+    total_pages = last_page + 1
+    logger.info("Page planner: found last page %d after probing %d pages", total_pages, len(probed),
+                extra={"category": "planner"})
+    done_pages = {page for page, count in probed.items() if count is not None}
+    return PagePlan(total_pages, done_pages, chunk_pages)
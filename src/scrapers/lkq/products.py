@@ -0,0 +1,133 @@
+"""
+Product helpers for the LKQ scraper.
+
+This module extracts the LKQ product identifier from a product payload, computes
+a stable content fingerprint used to detect unchanged products between runs, and
+defines the compact ProductRecord used to hold stored products in memory.
+"""
+
+import hashlib
+import json
+import sys
+from src.common.utils import jsonlib
+
+# Fields that may hold the LKQ product identifier, in order of preference
+PRODUCT_ID_FIELDS = ("id", "productId", "inventoryId", "stockNumber", "partNumber")
+
+
+def product_key(product, id_field=None):
+    """
+    Get the LKQ product identifier from a product payload.
+
+    Args:
+        product: Product dictionary from the "data" list of an LKQ response.
+        id_field: Explicit field holding the identifier (optional).
+
+    Returns:
+        key: Identifier as a string, or None if the product has none.
+    """
+    if not isinstance(product, dict):
+        return None
+
+    for field in ((id_field,) if id_field else PRODUCT_ID_FIELDS):
+        value = product.get(field)
+        if value is not None and value != "":
+            return str(value)
+    return None
+
+
+def product_fingerprint(product):
+    """
+    Compute a stable content hash of a product payload.
+
+    Keys are sorted before hashing so the fingerprint does not depend on field order.
+
+    Returns:
+        fingerprint: 16 character hexadecimal digest.
+    """
+    canonical = json.dumps(product, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _nested(product, *paths):
+    """Get the first non-empty value found at any of the given key paths."""
+    for path in paths:
+        value = product
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        if value is not None and value != "":
+            return value
+    return None
+
+
+def _intern(value):
+    """Share one copy of short repeated strings such as makes, models and states."""
+    return sys.intern(value) if isinstance(value, str) and len(value) <= 64 else value
+
+
+def _number(value, cast):
+    try:
+        return cast(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class ProductRecord:
+    """
+    Compact stored product: the fields we query in slots, plus the raw payload.
+
+    The full LKQ payload is kept as compact JSON bytes and only decoded when .data is
+    read, which costs a fraction of the memory of the nested dictionaries.
+    """
+
+    __slots__ = ("id", "part_number", "price", "currency", "year", "make", "model",
+                 "location", "state", "availability", "raw")
+
+    def __init__(self, raw, id=None, part_number=None, price=None, currency=None, year=None, make=None,
+                 model=None, location=None, state=None, availability=None):
+        self.raw = raw
+        self.id = id
+        self.part_number = part_number
+        self.price = price
+        self.currency = currency
+        self.year = year
+        self.make = make
+        self.model = model
+        self.location = location
+        self.state = state
+        self.availability = availability
+
+    @classmethod
+    def from_product(cls, product, id_field=None, raw=None):
+        """
+        Build a record from a product dictionary.
+
+        Args:
+            product: Product dictionary from the "data" list of an LKQ response.
+            id_field: Explicit field holding the identifier (optional).
+            raw: The product's JSON bytes, when already encoded.
+        """
+        if raw is None:
+            raw = jsonlib.dumps(product)
+        price = _nested(product, ("price", "amount"), ("price",), ("salePrice",))
+        return cls(
+            raw,
+            id=product_key(product, id_field),
+            part_number=_nested(product, ("partNumber",), ("interchangeNumber",)),
+            price=_number(price if not isinstance(price, dict) else None, float),
+            currency=_intern(_nested(product, ("price", "currency"), ("currency",))),
+            year=_number(_nested(product, ("vehicle", "year"), ("year",)), int),
+            make=_intern(_nested(product, ("vehicle", "make"), ("make",))),
+            model=_intern(_nested(product, ("vehicle", "model"), ("model",))),
+            location=_intern(_nested(product, ("location", "name"), ("location",), ("yardName",))),
+            state=_intern(_nested(product, ("location", "state"), ("state",))),
+            availability=_intern(_nested(product, ("availability",), ("status",)))
+        )
+
+    @property
+    def data(self):
+        """The full product payload, decoded from the raw bytes on each access."""
+        return jsonlib.loads(self.raw)
+
+    def __repr__(self):
+        return f"ProductRecord(id={self.id!r}, part_number={self.part_number!r}, price={self.price!r})"
@@ -0,0 +1,147 @@
+"""
+Offline replay transport for the LKQ scraper.
+
+This module serves pages from a recorded response archive (see
+src/common/utils/archive.py) or from the per-page JSON files in data/lkq_responses
+instead of the network, so parsing, deduplication and storage can be profiled at
+full speed and production runs reproduced without spending proxy traffic.
+
+Pages are looked up by the skip/take parameters of the requested URL, so a replay
+must use the same results_per_page as the recording. Pages that were never recorded
+are served as empty pages, which ends the crawl the same way the live API does.
+
+Enable it with LKQ["transport"] = "replay". Settings are read from LKQ["replay"]:
+    source: Job archive directory or response file directory (default: data/lkq_responses).
+    timing: "recorded" (sleep for the recorded latency), "scaled" (recorded latency x scale)
+        or "zero" (no delay, default).
+    scale: Latency multiplier for "scaled" timing (default: 1.0).
+"""
+
+import asyncio
+import os
+import re
+import threading
+import time
+from datetime import timedelta
+from urllib.parse import urlparse, parse_qs
+from src.common.utils.archive import INDEX_FILE, read_archive_index, read_archive_record
+from src.common.utils.async_http import FetchedResponse
+
+# Name of the per-page response files written by save_page_response
+RESPONSE_FILE_PATTERN = re.compile(r"lkq_response_worker.+_page_(\d+)\.json$")
+
+# Served for pages that were not recorded
+EMPTY_PAGE = b'{"data": []}'
+
+TIMING_MODES = ("recorded", "scaled", "zero")
+
+
+def load_archive_pages(directory):
+    """
+    Load every page of a job archive into memory.
+
+    Returns:
+        pages: Dictionary of page number -> (raw bytes, latency in seconds or None).
+    """
+    pages = {}
+    for entry in read_archive_index(directory):
+        pages[entry["page"]] = (read_archive_record(directory, entry), entry.get("latency"))
+    return pages
+
+
+def load_response_files(directory):
+    """
+    Load the per-page JSON response files of a response directory into memory.
+
+    When a page was saved by more than one run, the newest file wins.
+
+    Returns:
+        pages: Dictionary of page number -> (raw bytes, None).
+    """
+    files = []
+    for name in os.listdir(directory):
+        match = RESPONSE_FILE_PATTERN.match(name)
+        if match:
+            path = os.path.join(directory, name)
+            files.append((os.path.getmtime(path), int(match.group(1)) - 1, path))
+
+    pages = {}
+    for _, page_num, path in sorted(files):
+        with open(path, "rb") as f:
+            pages[page_num] = (f.read(), None)
+    return pages
+
+
+def page_from_url(url):
+    """Get the page number from the skip/take parameters of a page URL."""
+    query = parse_qs(urlparse(url).query)
+    skip = int(query.get("skip", ["0"])[0])
+    take = int(query.get("take", ["1"])[0])
+    return skip // max(1, take)
+
+
+class ReplayTransport:
+    """Serves recorded pages as FetchedResponse objects in place of HTTP requests."""
+
+    def __init__(self, source, timing="zero", scale=1.0):
+        """
+        Args:
+            source: Job archive directory or response file directory.
+            timing: "recorded", "scaled" or "zero".
+            scale: Latency multiplier for "scaled" timing.
+        """
+        if timing not in TIMING_MODES:
+            raise ValueError(f"Unknown replay timing '{timing}', expected one of {', '.join(TIMING_MODES)}")
+        if not os.path.isdir(source):
+            raise FileNotFoundError(f"Replay source {source} does not exist")
+
+        self.source = source
+        self.timing = timing
+        self.scale = scale if timing == "scaled" else 1.0
+        if os.path.exists(os.path.join(source, INDEX_FILE)):
+            self.pages = load_archive_pages(source)
+        else:
+            self.pages = load_response_files(source)
+        self.served_count = 0
+        self.missing_count = 0
+        self._lock = threading.Lock()
+
+        print(f"Replay transport: loaded {len(self.pages)} pages from {source} ({timing} timing)")
+
+    def _lookup(self, url):
+        page_num = page_from_url(url)
+        content, latency = self.pages.get(page_num, (None, None))
+        with self._lock:
+            self.served_count += 1
+            if content is None:
+                self.missing_count += 1
+        if content is None:
+            content = EMPTY_PAGE
+
+        delay = 0.0
+        if self.timing != "zero" and latency:
+            delay = latency * self.scale
+        return FetchedResponse(200, content, url, timedelta(seconds=delay)), delay
+
+    def fetch(self, url, worker_id=None):
+        """
+        Serve a recorded page, sleeping for its latency unless timing is "zero".
+
+        Args:
+            url: Page URL with skip/take parameters.
+            worker_id: Worker ID (unused, kept for parity with fetch_with_retries).
+
+        Returns:
+            response: FetchedResponse with the recorded bytes.
+        """
+        response, delay = self._lookup(url)
+        if delay > 0:
+            time.sleep(delay)
+        return response
+
+    async def fetch_async(self, url, worker_id=None):
+        """Coroutine counterpart of fetch for the asyncio engine."""
+        response, delay = self._lookup(url)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return response
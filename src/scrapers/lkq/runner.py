@@ -9,6 +9,7 @@ import uuid
 import json
 import os
 from datetime import datetime
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse, quote
 from config.config import LKQ, PARALLEL
 
 # In-memory storage for job information
@@ -46,12 +47,37 @@ def update_job_memory(job_id, **updates):
         return True
     return False
 
-def start_lkq_scraper(job_id=None):
+def category_url(category, base_url=None):
+    """
+    Build the catalog URL for one category.
+    
+    Args:
+        category: Category name, e.g. "Engine Assembly".
+        base_url: Catalog URL whose category parameter is replaced (default: LKQ["api_url"]).
+    
+    Returns:
+        url: The base URL with its category query parameter set to the given category.
+    """
+    parsed_url = urlparse(base_url or LKQ["api_url"])
+    query_params = parse_qsl(parsed_url.query)
+    if any(key == "category" for key, _ in query_params):
+        query_params = [(key, category if key == "category" else value) for key, value in query_params]
+    else:
+        query_params.append(("category", category))
+    return urlunparse(parsed_url._replace(query=urlencode(query_params, quote_via=quote)))
+
+def start_lkq_scraper(job_id=None, api_url=None, category=None):
     """
     Start the LKQ scraper to fetch product data.
     
+    Each job crawls with its own crawl context, so several jobs (e.g. one per
+    category) can run at the same time.
+    
     Args:
         job_id: Optional job ID. If provided, use this ID instead of creating a new one.
+        api_url: Optional catalog URL to crawl (default: LKQ["api_url"] from config).
+        category: Optional category to crawl, set on the catalog URL. Category jobs don't
+            fall back to the scraper's alternative URLs, which list other categories.
     
     Returns:
         job_id: ID of the created job.
@@ -76,10 +102,14 @@ def start_lkq_scraper(job_id=None):
                 print(f"Created memory entry for provided job ID: {job_id}")
         
         # Import scraper module here to avoid circular imports
-        from src.scrapers.lkq.scraper import fetch_all_products
+        from src.scrapers.lkq.scraper import fetch_all_products, get_job_stats
         
         # Get base URL from config
-        api_url = LKQ["api_url"]
+        api_url = api_url or LKQ["api_url"]
+        alternative_urls = None
+        if category is not None:
+            api_url = category_url(category, api_url)
+            alternative_urls = []
         
         # Print parallel processing configuration
         print(f"\n--- Parallel Processing Configuration ---")
@@ -106,14 +136,15 @@ def start_lkq_scraper(job_id=None):
                 print(f"Starting LKQ scraper thread for job {job_id}...")
                 
                 # Run the scraper
-                total_products = fetch_all_products(api_url, job_id=job_id)
+                total_products = fetch_all_products(api_url, job_id=job_id, alternative_urls=alternative_urls)
                 
                 # Update job status on completion
                 update_job_memory(
                     job_id, 
                     status="completed", 
                     end_time=datetime.now().isoformat(),
-                    product_count=total_products
+                    product_count=total_products,
+                    **get_job_stats(job_id)
                 )
                 
                 print(f"LKQ scraper completed for job {job_id}. Total products: {total_products}")
@@ -6,33 +6,52 @@ and store it in the database.
 """
 
 import time
+import atexit
 import json
-import random
 import os
 import math
 import threading
 import concurrent.futures
-import queue
 from datetime import datetime
 from config.config import LKQ, REQUEST, PARALLEL
-from src.common.utils.http import fetch_with_retries
+from src.common.utils.http import fetch_with_retries, close_session, release_proxy_user
+from src.common.utils.proxy_pool import get_proxy_pool
+from src.scrapers.lkq.planner import create_page_plan
+from src.scrapers.lkq.fingerprints import FingerprintIndex
+from src.scrapers.lkq.dedup import ProductDeduplicator
+from src.common.utils.concurrency import create_controller
+from src.common.utils import metrics
+from src.common.utils.log import get_logger
+from src.common.utils.archive import ResponseArchive, prune_archives
+from src.scrapers.lkq.replay import ReplayTransport
+from src.scrapers.lkq.products import ProductRecord
+from src.scrapers.lkq.context import CrawlContext, PRODUCT_BUFFER_SIZE, PRODUCT_FLUSH_INTERVAL
+from src.common.utils.product_store import ProductStore
+from src.common.utils.jsonlib import loads_with_raw_items
 
 # Thread-local storage for thread-specific data
 thread_local = threading.local()
 
-# Use in-memory storage for testing
-in_memory_products = {}
+logger = get_logger(__name__)
+
+# Products of every job, kept in memory up to the configured budget and spilled to disk past it
+_store_config = LKQ.get("product_store", {})
+_memory_budget_mb = _store_config.get("memory_budget_mb", 256)
+product_store = ProductStore(
+    memory_budget=int(_memory_budget_mb * 1024 * 1024) if _memory_budget_mb is not None else None,
+    spill_dir=_store_config.get("spill_dir", "data/lkq_product_store"),
+    record_type=ProductRecord if _store_config.get("compact", True) else None
+)
+atexit.register(product_store.close)
 
 # Lock for thread-safe operations on shared resources
-products_lock = threading.Lock()
 file_lock = threading.Lock()
-next_page_lock = threading.Lock()
 
-# Global flags and counters for coordination
-empty_page_threshold = 3  # Number of consecutive empty pages before considering we reached the end
-consecutive_empty_pages = 0
-end_of_data_reached = False
-next_page_to_process = 0
+# Jobs that already have a sample product file
+sampled_jobs = set()
+
+# Per-job crawl statistics reported back to the runner
+job_stats = {}
 
 # Alternative URLs to try if the main one fails
 ALTERNATIVE_URLS = [
@@ -44,24 +63,33 @@ ALTERNATIVE_URLS = [
 # Directory for saving response files
 RESPONSE_DIR = "data/lkq_responses"
 
+# Directory holding one response archive per job
+ARCHIVE_DIR = "data/lkq_archive"
+
+# Archive directories of running jobs, which pruning must leave alone
+active_archive_dirs = set()
+archive_lock = threading.Lock()
+
 # Simple in-memory database functions
-def save_products_memory(job_id, products):
-    """Save products to in-memory storage (thread-safe)."""
-    with products_lock:
-        if job_id not in in_memory_products:
-            in_memory_products[job_id] = []
-        
-        in_memory_products[job_id].extend(products)
-        current_count = len(in_memory_products[job_id])
+def save_products_memory(job_id, products, raw_products=None):
+    """Save products, and optionally their raw JSON bytes, to the product store (thread-safe)."""
+    write_start = time.monotonic()
+    current_count = product_store.append(job_id, products, raw_products)
     
-    print(f"Saved {len(products)} products to in-memory storage for job {job_id}")
-    print(f"Total products for job {job_id}: {current_count}")
+    metrics.storage_write_duration.observe(time.monotonic() - write_start, storage="memory")
+    metrics.products_ingested.inc(len(products), storage="memory")
+    
+    logger.debug("Saved %d products to in-memory storage (%d total)", len(products), current_count,
+                 extra={"category": "storage", "job_id": job_id})
     return True
 
+def get_job_stats(job_id):
+    """Get crawl statistics recorded for a job."""
+    return dict(job_stats.get(job_id, {}))
+
 def get_products_for_job_memory(job_id):
-    """Get products for a job from in-memory storage (thread-safe)."""
-    with products_lock:
-        return in_memory_products.get(job_id, [])[:]  # Return a copy to avoid concurrent modification
+    """Get a copy of a job's products from the product store (thread-safe)."""
+    return product_store.get_all(job_id)
 
 def save_response_to_file(filename, data):
     """Save response data to file in a thread-safe way."""
@@ -69,164 +97,348 @@ def save_response_to_file(filename, data):
         with open(filename, "w") as f:
             json.dump(data, f, indent=2)
 
-def get_next_page():
-    """
-    Get the next page to process in a thread-safe way.
-    Returns None if end of data has been reached.
-    """
-    global next_page_to_process, end_of_data_reached, consecutive_empty_pages
+def save_bytes_to_file(filename, content):
+    """Save raw response bytes to file as they were received."""
+    with open(filename, "wb") as f:
+        f.write(content)
+
+def build_page_url(url_base, page_num, take):
+    """Construct the API URL for a page with skip/take pagination parameters."""
+    skip = page_num * take
+    return f"{url_base}&skip={skip}&take={take}" if '?' in url_base else f"{url_base}?skip={skip}&take={take}"
+
+def fetch_page(context, url, worker_id):
+    """Fetch a page from the network, or from the job's replay transport when replaying."""
+    if context.replay_transport is not None:
+        return context.replay_transport.fetch(url, worker_id)
     
-    with next_page_lock:
-        if end_of_data_reached:
-            return None
-            
-        if consecutive_empty_pages >= empty_page_threshold:
-            end_of_data_reached = True
-            print(f"End of data reached after {consecutive_empty_pages} consecutive empty pages")
-            return None
-            
-        page = next_page_to_process
-        next_page_to_process += 1
-        return page
+    # Always use the original headers from config for each request
+    return fetch_with_retries(url, LKQ["headers"].copy(), use_proxy=LKQ.get("use_proxy", True), worker_id=worker_id, controller=context.concurrency_controller)
 
-def process_page(url_base, page_num, job_id, worker_id, take):
+def process_page(context, url_base, page_num, worker_id):
     """
     Process a single page of data.
     
     Args:
+        context: CrawlContext of the job.
         url_base: Base API URL.
         page_num: Page number to process.
-        job_id: Job ID for tracking.
         worker_id: Worker ID for logging.
-        take: Number of results per page.
         
     Returns:
         tuple: (products_count, success, is_empty)
     """
-    global consecutive_empty_pages
-    
-    # Calculate skip value based on page number
-    skip = page_num * take
+    job_id = context.job_id
+    take = context.take
     
     # Construct URL with pagination parameters
-    url = f"{url_base}&skip={skip}&take={take}" if '?' in url_base else f"{url_base}?skip={skip}&take={take}"
-    print(f"Worker {worker_id}: Fetching Page {page_num + 1} (skip={skip}, take={take})")
-    
-    # Always use the original headers from config for each request
-    current_headers = LKQ["headers"].copy()
+    url = build_page_url(url_base, page_num, take)
+    logger.debug("Fetching page %d (skip=%d, take=%d)", page_num + 1, page_num * take, take,
+                 extra={"category": "page", "worker_id": worker_id, "job_id": job_id, "page": page_num + 1})
     
     # Fetch data with retries
-    response = fetch_with_retries(url, current_headers, use_proxy=True, worker_id=worker_id)
+    page_start = time.monotonic()
+    response = fetch_page(context, url, worker_id)
+    
+    result = handle_page_response(context, response, page_num, worker_id)
+    metrics.page_duration.observe(time.monotonic() - page_start, scraper="lkq")
+    return result
+
+def handle_page_response(context, response, page_num, worker_id):
+    """
+    Parse and store a fetched page, updating the end-of-data tracking.
     
+    Shared by the threaded and asyncio engines so both produce identical results.
+    
+    Args:
+        context: CrawlContext of the job.
+        response: Response object (or None if the fetch failed).
+        page_num: Page number the response belongs to.
+        worker_id: Worker ID for logging.
+        
+    Returns:
+        tuple: (products_count, success, is_empty)
+    """
+    return process_page_response(context, response, page_num, worker_id)[:3]
+
+def process_page_response(context, response, page_num, worker_id):
+    """
+    Parse and store a fetched page like handle_page_response, also returning the decoded response.
+    
+    Returns:
+        tuple: (products_count, success, is_empty, data) where data is None if the page failed.
+    """
+    job_id = context.job_id
+    log_context = {"category": "page", "worker_id": worker_id, "job_id": job_id, "page": page_num + 1}
     if response is None:
-        print(f"Worker {worker_id}: Failed to fetch data for page {page_num + 1}")
-        return 0, False, False
+        logger.warning("Failed to fetch data for page %d", page_num + 1, extra=log_context)
+        metrics.pages_processed.inc(scraper="lkq", result="failed")
+        return 0, False, False, None
     
     # Check if we got a valid response
     if response.status_code != 200:
-        print(f"Worker {worker_id}: Response status code {response.status_code} for page {page_num + 1}")
-        return 0, False, False
+        logger.warning("Response status code %d for page %d", response.status_code, page_num + 1, extra=log_context)
+        metrics.pages_processed.inc(scraper="lkq", result="failed")
+        return 0, False, False, None
 
     # Parse response JSON
     try:
-        data = response.json()
+        # Decode once, keeping each product's bytes so they are never serialized again
+        data, raw_products = loads_with_raw_items(response.content)
         
-        # Create response file path in the dedicated directory
-        response_file_path = os.path.join(RESPONSE_DIR, f"lkq_response_worker{worker_id}_page_{page_num + 1}.json")
-        
-        # Save response to a file for debugging (thread-safe)
-        save_response_to_file(response_file_path, data)
-        print(f"Worker {worker_id}: Saved response to {response_file_path}")
+        # Archive the raw response for debugging and replay (thread-safe)
+        save_page_response(context, response, page_num, worker_id)
         
         products = data.get("data", [])
         product_count = len(products)
-        print(f"Worker {worker_id}: Products found on page {page_num + 1}: {product_count}")
+        logger.debug("Products found on page %d: %d", page_num + 1, product_count, extra=log_context)
         
         # Check if this page is empty
         is_empty = product_count == 0
         
         # Update consecutive empty pages counter (thread-safe)
-        with next_page_lock:
-            if is_empty:
-                consecutive_empty_pages += 1
-                print(f"Worker {worker_id}: Empty page detected. Consecutive empty pages: {consecutive_empty_pages}")
-            else:
-                consecutive_empty_pages = 0  # Reset counter when we find products
-                
-                # Save products to storage if job_id is provided
-                if job_id and products:
-                    # Save products to in-memory storage (thread-safe)
-                    save_success = save_products_memory(job_id, products)
-                    
-                    if save_success and len(products) > 0:
-                        # Save a sample product to a file (thread-safe)
-                        sample_product_file_path = os.path.join(RESPONSE_DIR, f"sample_product_{job_id}_worker{worker_id}.json")
-                        save_response_to_file(sample_product_file_path, products[0])
+        with context.lock:
+            update_empty_page_count(context, is_empty, worker_id)
+        
+        # Save products to storage if job_id is provided, outside the page allocation lock
+        if not is_empty and job_id and products:
+            store_page_products(context, worker_id, products, raw_products)
         
-        return product_count, True, is_empty
+        metrics.pages_processed.inc(scraper="lkq", result="empty" if is_empty else "success")
+        return product_count, True, is_empty, data
         
     except Exception as e:
-        print(f"Worker {worker_id}: Error processing page {page_num + 1}: {e}")
-        return 0, False, False
+        logger.error("Error processing page %d: %s", page_num + 1, e, extra=log_context)
+        metrics.pages_processed.inc(scraper="lkq", result="failed")
+        return 0, False, False, None
 
-def fetch_worker(url_base, job_id, worker_id, take):
+def save_page_response(context, response, page_num, worker_id):
+    """
+    Archive a page's raw response, or save it as a JSON file when the archive is disabled.
+    
+    Args:
+        context: CrawlContext of the job.
+        response: Response object holding the raw bytes.
+        page_num: Page number the response belongs to.
+        worker_id: Worker ID for logging.
+    """
+    if context.response_archive is not None:
+        elapsed = getattr(response, "elapsed", None)
+        context.response_archive.append(
+            page_num,
+            response.content,
+            worker_id=worker_id,
+            url=getattr(response, "url", None),
+            latency=elapsed.total_seconds() if elapsed is not None else None
+        )
+        return
+    
+    response_file_path = os.path.join(RESPONSE_DIR, f"lkq_response_worker{worker_id}_page_{page_num + 1}.json")
+    save_bytes_to_file(response_file_path, response.content)
+    logger.debug("Saved response to %s", response_file_path, extra={"category": "storage", "worker_id": worker_id})
+
+def update_empty_page_count(context, is_empty, worker_id):
+    """Update the job's consecutive empty pages counter. Caller must hold context.lock."""
+    if is_empty:
+        context.consecutive_empty_pages += 1
+        logger.debug("Empty page detected. Consecutive empty pages: %d", context.consecutive_empty_pages,
+                     extra={"category": "page", "worker_id": worker_id, "job_id": context.job_id})
+    else:
+        context.consecutive_empty_pages = 0  # Reset counter when we find products
+
+def store_page_products(context, worker_id, products, raw_products=None):
+    """
+    Buffer a page's products for storage and save a sample product to a file.
+    
+    Products go to the calling thread's buffer in the crawl context, which flushes them
+    to in-memory storage in batches.
+    
+    Args:
+        context: CrawlContext of the job.
+        worker_id: Worker ID for logging.
+        products: Product dictionaries from the page.
+        raw_products: Each product's JSON bytes from the response (optional).
+    """
+    job_id = context.job_id
+    deduplicator = context.deduplicator
+    fingerprint_index = context.fingerprint_index
+    
+    # The filters return the same product objects, so the raw bytes can be matched back up
+    raw_by_product = None
+    if raw_products is not None and len(raw_products) == len(products):
+        raw_by_product = {id(product): raw for product, raw in zip(products, raw_products)}
+    
+    # Drop products already stored by this job (results can shift between pages)
+    if deduplicator is not None:
+        unique = deduplicator.filter_new(products)
+        metrics.products_skipped.inc(len(products) - len(unique), reason="duplicate")
+        products = unique
+        if not products:
+            return
+    
+    # In incremental mode only new or changed products are stored
+    if fingerprint_index is not None:
+        changed = fingerprint_index.filter_changed(products)
+        metrics.products_skipped.inc(len(products) - len(changed), reason="unchanged")
+        products = changed
+        if not products:
+            return
+    
+    raw_products = [raw_by_product[id(product)] for product in products] if raw_by_product is not None else None
+    context.add_products(products, raw_products)
+    
+    # Save a single sample product per job to a file (thread-safe)
+    with file_lock:
+        first_sample = job_id not in sampled_jobs
+        sampled_jobs.add(job_id)
+    if first_sample:
+        sample_product_file_path = os.path.join(RESPONSE_DIR, f"sample_product_{job_id}.json")
+        if raw_products is not None:
+            save_bytes_to_file(sample_product_file_path, raw_products[0])
+        else:
+            save_response_to_file(sample_product_file_path, products[0])
+
+def fetch_worker(context, url_base, worker_id):
     """
     Worker function to fetch pages using a dynamic work allocation strategy.
     
     Args:
+        context: CrawlContext of the job.
         url_base: Base API URL.
-        job_id: Job ID for tracking.
         worker_id: Worker ID for logging.
-        take: Number of results per page.
         
     Returns:
         tuple: (total_products, pages_processed)
     """
+    job_id = context.job_id
+    concurrency_controller = context.concurrency_controller
     total_products = 0
     pages_processed = 0
     success = False
+    worker_state = {}
     
-    print(f"Worker {worker_id} starting with dynamic page allocation")
+    logger.info("Starting with %s page allocation", "planned" if context.page_plan is not None else "dynamic",
+                extra={"worker_id": worker_id, "job_id": job_id})
+    metrics.active_workers.inc(scraper="lkq")
     
-    # Try different URLs if needed
-    for attempt, url_to_use in enumerate([url_base] + ALTERNATIVE_URLS):
-        if attempt > 0:
-            print(f"Worker {worker_id}: Trying alternative URL #{attempt}")
+    try:
+        # Try different URLs if needed
+        for attempt, url_to_use in enumerate([url_base] + context.alternative_urls):
+            if attempt > 0:
+                logger.info("Trying alternative URL #%d", attempt, extra={"worker_id": worker_id, "job_id": job_id})
         
-        # Keep processing pages until end of data is reached
-        while True:
-            # Get the next page to process
-            page_num = get_next_page()
+            # Keep processing pages until end of data is reached
+            while True:
+                # Wait for a fetcher slot when the adaptive controller is enabled
+                if concurrency_controller is not None:
+                    concurrency_controller.acquire()
             
-            # Check if we've reached the end of data
-            if page_num is None:
-                print(f"Worker {worker_id}: No more pages to process")
-                break
+                try:
+                    # Get the next page to process
+                    page_num = context.next_page(worker_state)
                 
-            # Process the page
-            products_count, page_success, is_empty = process_page(url_to_use, page_num, job_id, worker_id, take)
+                    # Check if we've reached the end of data
+                    if page_num is None:
+                        logger.debug("No more pages to process", extra={"worker_id": worker_id, "job_id": job_id})
+                        break
+                    
+                    # Process the page
+                    products_count, page_success, is_empty = process_page(context, url_to_use, page_num, worker_id)
+                finally:
+                    if concurrency_controller is not None:
+                        concurrency_controller.release()
             
-            if page_success:
-                success = True
-                total_products += products_count
-                pages_processed += 1
-                
-                # Add a small random delay between requests
-                delay_time = random.uniform(0.5, 2.0)  # More moderate delay for parallel processing
-                print(f"Worker {worker_id}: Waiting {delay_time:.2f} seconds before next page...")
-                time.sleep(delay_time)
-            else:
-                # If this URL is failing, try another URL
-                break
+                if page_success:
+                    success = True
+                    total_products += products_count
+                    pages_processed += 1
+                else:
+                    # If this URL is failing, try another URL
+                    break
         
-        # If we successfully found products with this URL, don't try others
-        if success:
-            break
+            # If we successfully found products with this URL, don't try others
+            if success:
+                break
+    finally:
+        # Release this worker's pooled proxy connections and proxy user, even if the loop raised
+        close_session()
+        release_proxy_user()
+        metrics.active_workers.dec(scraper="lkq")
     
-    print(f"Worker {worker_id} completed: Found {total_products} products across {pages_processed} pages")
+    logger.info("Completed: found %d products across %d pages", total_products, pages_processed,
+                extra={"worker_id": worker_id, "job_id": job_id})
     return total_products, pages_processed
 
-def fetch_all_products(api_url, take=None, job_id=None):
+def plan_crawl(context, api_url):
+    """
+    Build a page plan from the result count or by probing for the last page.
+    
+    Pages fetched while planning are stored like any other page and left out of the plan.
+    
+    Args:
+        context: CrawlContext of the job.
+        api_url: Base API URL for LKQ.
+        
+    Returns:
+        tuple: (plan, products_count, pages_processed) where plan is None if planning failed.
+    """
+    take = context.take
+    probe_totals = {"products": 0, "pages": 0}
+    
+    def probe(page_num):
+        url = build_page_url(api_url, page_num, take)
+        response = fetch_page(context, url, "planner")
+        product_count, success, is_empty, data = process_page_response(context, response, page_num, "planner")
+        if not success:
+            return None, None
+        probe_totals["products"] += product_count
+        probe_totals["pages"] += 1
+        return product_count, data if page_num == 0 else None
+    
+    plan = create_page_plan(
+        probe,
+        take,
+        chunk_pages=LKQ.get("plan_chunk_pages", 10),
+        count_key=LKQ.get("total_count_key")
+    )
+    close_session()
+    release_proxy_user()
+    return plan, probe_totals["products"], probe_totals["pages"]
+
+def run_threaded_engine(context, api_url, num_workers):
+    """
+    Run the crawl with one OS thread per worker.
+    
+    Args:
+        context: CrawlContext of the job.
+        api_url: Base API URL for LKQ.
+        num_workers: Number of worker threads.
+        
+    Returns:
+        tuple: (total_products, total_pages_processed)
+    """
+    total_products = 0
+    total_pages_processed = 0
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as executor:
+        future_to_worker = {
+            executor.submit(fetch_worker, context, api_url, worker_id): worker_id
+            for worker_id in range(num_workers)
+        }
+        
+        for future in concurrent.futures.as_completed(future_to_worker):
+            worker_id = future_to_worker[future]
+            try:
+                worker_products, worker_pages = future.result()
+                total_products += worker_products
+                total_pages_processed += worker_pages
+                print(f"Worker {worker_id} finished: Found {worker_products} products across {worker_pages} pages")
+            except Exception as e:
+                print(f"Worker {worker_id} failed: {e}")
+    
+    return total_products, total_pages_processed
+
+def fetch_all_products(api_url, take=None, job_id=None, alternative_urls=None):
     """
     Fetch all products from the LKQ API by paginating through results using parallel processing.
     
@@ -234,30 +446,72 @@ def fetch_all_products(api_url, take=None, job_id=None):
         api_url: Base API URL for LKQ.
         take: Number of results per page (default: from config).
         job_id: Job ID for database tracking.
+        alternative_urls: URLs to switch to when api_url fails (default: ALTERNATIVE_URLS).
+            Pass an empty list to keep a job scoped to api_url, e.g. to one category.
         
     Returns:
         total_products: Total number of products fetched.
     """
-    # Reset global variables
-    global next_page_to_process, end_of_data_reached, consecutive_empty_pages
-    next_page_to_process = 0
-    end_of_data_reached = False
-    consecutive_empty_pages = 0
-    
     # Set defaults from config if not provided
     take = take or LKQ["results_per_page"]
     num_workers = LKQ.get("parallel_workers", PARALLEL["max_workers"])
     
+    # All crawl state lives in the job's context, so concurrent jobs don't interfere
+    context = CrawlContext(
+        job_id,
+        take,
+        product_sink=lambda products, raw_products: save_products_memory(job_id, products, raw_products),
+        buffer_size=LKQ.get("product_buffer_size", PRODUCT_BUFFER_SIZE),
+        flush_interval=LKQ.get("product_flush_interval", PRODUCT_FLUSH_INTERVAL)
+    )
+    context.alternative_urls = list(ALTERNATIVE_URLS if alternative_urls is None else alternative_urls)
+    if LKQ.get("deduplicate", True):
+        context.deduplicator = ProductDeduplicator(id_field=LKQ.get("product_id_field"))
+    
+    # With adaptive concurrency, start enough threads for the maximum limit and let the controller gate them
+    adaptive_config = LKQ.get("adaptive_concurrency", {})
+    if adaptive_config.get("enabled") and LKQ.get("engine", "threaded") in ("threaded", "pipeline"):
+        context.concurrency_controller = create_controller(adaptive_config, num_workers)
+        num_workers = context.concurrency_controller.max_limit
+    concurrency_controller = context.concurrency_controller
+    
     print(f"\n--- LKQ Scraper Configuration ---")
     print(f"API URL: {api_url}")
+    print(f"Alternative URLs: {len(context.alternative_urls)}")
     print(f"Results per page: {take}")
     print(f"Job ID: {job_id}")
     print(f"Parallel workers: {num_workers}")
-    print(f"Dynamic page allocation: Enabled")
-    print(f"Empty page threshold: {empty_page_threshold}")
-    print(f"Proxy configuration: Using Oxylabs proxy with {len(REQUEST['proxy']['users'])} users")
+    print(f"Crawl engine: {LKQ.get('engine', 'threaded')}")
+    print(f"Transport: {LKQ.get('transport', 'network')}")
+    print(f"Page allocation: {LKQ.get('page_planning', 'dynamic')}")
+    if concurrency_controller is not None:
+        print(f"Adaptive concurrency: {concurrency_controller.min_limit}-{concurrency_controller.max_limit} workers "
+              f"(starting at {concurrency_controller.limit})")
+    print(f"Empty page threshold: {context.empty_page_threshold}")
+    print(f"Product buffer size: {context.buffer_size} (flushed after {context.flush_interval}s)")
+    if LKQ.get("use_proxy", True):
+        print(f"Proxy configuration: Using Oxylabs proxy with {len(REQUEST['proxy']['users'])} users")
+    else:
+        print(f"Proxy configuration: Disabled, requests go directly to the API")
     print(f"Response files directory: {RESPONSE_DIR}")
     
+    archive_config = LKQ.get("archive", {})
+    if archive_config.get("enabled", True):
+        archive_dir = os.path.join(ARCHIVE_DIR, str(job_id or datetime.now().strftime("%Y%m%d%H%M%S")))
+        with archive_lock:
+            prune_archives(ARCHIVE_DIR, archive_config.get("keep_jobs"), exclude=active_archive_dirs)
+            active_archive_dirs.add(archive_dir)
+        response_archive = context.response_archive = ResponseArchive(
+            archive_dir,
+            segment_max_bytes=archive_config.get("segment_max_bytes", 64 * 1024 * 1024),
+            max_total_bytes=archive_config.get("max_total_bytes"),
+            compression=archive_config.get("compression", "gzip"),
+            compresslevel=archive_config.get("compresslevel", 6),
+            queue_size=archive_config.get("queue_size", 256)
+        )
+        print(f"Response archive: {response_archive.directory} ({response_archive.compression})")
+        metrics.queue_depth.add_function(response_archive.pending, queue="archive")
+    
     # Check if we have enough proxy users for the number of workers
     recommended_users = REQUEST["proxy"].get("recommended_users_per_thread", 5)
     current_users = len(REQUEST["proxy"]["users"])
@@ -269,28 +523,85 @@ def fetch_all_products(api_url, take=None, job_id=None):
     # Ensure the response directory exists
     os.makedirs(RESPONSE_DIR, exist_ok=True)
     
+    # Serve recorded pages instead of fetching them when replaying
+    if LKQ.get("transport", "network") == "replay":
+        replay_config = LKQ.get("replay", {})
+        context.replay_transport = ReplayTransport(
+            replay_config.get("source", RESPONSE_DIR),
+            timing=replay_config.get("timing", "zero"),
+            scale=replay_config.get("scale", 1.0)
+        )
+    
+    # Load the fingerprints from the last run so unchanged products are skipped
+    incremental_config = LKQ.get("incremental", {})
+    if incremental_config.get("enabled"):
+        context.fingerprint_index = FingerprintIndex(
+            incremental_config.get("index_path", "data/lkq_fingerprints.json"),
+            id_field=LKQ.get("product_id_field")
+        )
+    
     start_time = datetime.now()
     print(f"Scraper started at: {start_time}")
     
-    # Use ThreadPoolExecutor for dynamic parallel processing
-    total_products = 0
-    total_pages_processed = 0
-    
-    with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as executor:
-        future_to_worker = {
-            executor.submit(fetch_worker, api_url, job_id, worker_id, take): worker_id
-            for worker_id in range(num_workers)
-        }
+    try:
+        # Plan the full page range up front instead of detecting the end from empty pages
+        planned_products = 0
+        planned_pages = 0
+        if LKQ.get("page_planning") == "planned":
+            context.page_plan, planned_products, planned_pages = plan_crawl(context, api_url)
+            if context.page_plan is None:
+                print("Page planning failed, falling back to dynamic page allocation")
+            else:
+                print(f"Planned {context.page_plan.total_pages} pages in {context.page_plan.chunk_count} chunks")
+            context.consecutive_empty_pages = 0
         
-        for future in concurrent.futures.as_completed(future_to_worker):
-            worker_id = future_to_worker[future]
-            try:
-                worker_products, worker_pages = future.result()
-                total_products += worker_products
-                total_pages_processed += worker_pages
-                print(f"Worker {worker_id} finished: Found {worker_products} products across {worker_pages} pages")
-            except Exception as e:
-                print(f"Worker {worker_id} failed: {e}")
+        engine = LKQ.get("engine", "threaded")
+        if engine == "asyncio":
+            # Import here to keep aiohttp optional for the threaded engine
+            from src.scrapers.lkq.async_scraper import run_async_engine
+            total_products, total_pages_processed = run_async_engine(context, api_url)
+        elif engine == "pipeline":
+            from src.scrapers.lkq.pipeline import run_pipeline_engine
+            total_products, total_pages_processed = run_pipeline_engine(context, api_url, num_workers)
+        else:
+            total_products, total_pages_processed = run_threaded_engine(context, api_url, num_workers)
+    finally:
+        # Store the products still sitting in the workers' buffers, even if the engine raised
+        try:
+            context.flush_products()
+        finally:
+            response_archive = context.response_archive
+            if response_archive is not None:
+                response_archive.close()
+                metrics.queue_depth.remove_function(response_archive.pending, queue="archive")
+                with archive_lock:
+                    active_archive_dirs.discard(response_archive.directory)
+    
+    total_products += planned_products
+    total_pages_processed += planned_pages
+    
+    replay_transport = context.replay_transport
+    if replay_transport is not None:
+        print(f"Replayed {replay_transport.served_count} pages ({replay_transport.missing_count} not recorded)")
+    
+    if response_archive is not None:
+        print(f"Archived {response_archive.records_written} responses "
+              f"({response_archive.bytes_written / 1024:.1f} KB compressed) to {response_archive.directory}")
+        if job_id:
+            job_stats.setdefault(job_id, {}).update(archive_path=response_archive.directory)
+    
+    deduplicator = context.deduplicator
+    fingerprint_index = context.fingerprint_index
+    if deduplicator is not None and job_id:
+        job_stats.setdefault(job_id, {}).update(duplicate_products=deduplicator.duplicate_count)
+    
+    if fingerprint_index is not None:
+        fingerprint_index.save()
+        if job_id:
+            job_stats.setdefault(job_id, {}).update(
+                changed_products=fingerprint_index.changed_count,
+                unchanged_products=fingerprint_index.unchanged_count
+            )
     
     # Update job stats if tracking a job
     if job_id:
@@ -301,9 +612,11 @@ def fetch_all_products(api_url, take=None, job_id=None):
         print(f"Execution time: {execution_time:.2f} seconds")
         
         # Verify final product count (thread-safe)
-        final_products = get_products_for_job_memory(job_id)
-        final_product_count = len(final_products)
+        final_product_count = product_store.count(job_id)
         print(f"Final products in memory for job {job_id}: {final_product_count}")
+        if product_store.spilled_bytes:
+            print(f"Product store: {product_store.memory_bytes / 1024 / 1024:.1f} MB in memory, "
+                  f"{product_store.spilled_bytes / 1024 / 1024:.1f} MB spilled to disk")
         
         print(f"Updating job {job_id} with status 'completed' and {final_product_count} products")
         # Skip the database update, just log it
@@ -313,5 +626,20 @@ def fetch_all_products(api_url, take=None, job_id=None):
     print(f"Total products fetched: {total_products}")
     print(f"Pages processed: {total_pages_processed}")
     print(f"Products per page (average): {total_products/max(1, total_pages_processed):.2f}")
-    print(f"Max page number reached: {next_page_to_process - 1}")
+    if deduplicator is not None:
+        print(f"Duplicate products dropped: {deduplicator.duplicate_count}")
+    if fingerprint_index is not None:
+        print(f"Changed or new products: {fingerprint_index.changed_count}")
+        print(f"Unchanged products skipped: {fingerprint_index.unchanged_count}")
+    if context.page_plan is not None:
+        print(f"Planned pages: {context.page_plan.total_pages}")
+    else:
+        print(f"Max page number reached: {context.next_page_to_process - 1}")
+    
+    proxy_pool = get_proxy_pool()
+    if proxy_pool is not None:
+        print(f"\n--- Proxy User Health ---")
+        for health in proxy_pool.summary():
+            print(f"{health['username']}: {health['state']}, success rate {health['success_rate']:.0%}, "
+                  f"avg latency {health['latency']:.2f}s, {health['failures']}/{health['requests']} failed")
     return total_products 
\ No newline at end of file
@@ -7,7 +7,12 @@ instead of direct connections, which helps bypass permission issues.
 
 import os
 import sys
+import csv
+import io
 import subprocess
+import queue
+import threading
+import time
 import json
 import uuid
 from datetime import datetime
@@ -17,6 +22,9 @@ project_root = os.path.dirname(os.path.abspath(__file__))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+from src.common.utils import metrics
+from src.common.utils.jsonlib import to_json_text
+
 # Database name
 DB_NAME = "xpedia-parts"
 
@@ -29,13 +37,146 @@ def json_serializable(obj):
         return str(obj)
     return str(obj)
 
-def run_sql_command(sql, params=None):
+def substitute_params(sql, params):
+    """Substitute %(name)s placeholders in a SQL command with literal values."""
+    for key, value in params.items():
+        # Convert value to string format suitable for SQL
+        if isinstance(value, str):
+            sql_value = f"'{value}'"
+        elif isinstance(value, (int, float)):
+            sql_value = str(value)
+        elif isinstance(value, datetime):
+            sql_value = f"'{value.isoformat()}'"
+        elif value is None:
+            sql_value = "NULL"
+        else:
+            sql_value = f"'{value}'"
+        
+        # Replace placeholder with value
+        sql = sql.replace(f"%({key})s", sql_value)
+    return sql
+
+class PsqlSession:
+    """
+    Long-lived `sudo -u postgres psql` process fed over stdin.
+    
+    Statements and COPY data are written to a single psql process instead of
+    starting a new subprocess per statement. After each command a marker is echoed
+    to stdout and another to stderr, so the output of that command can be read back
+    and its errors told apart from row data: psql reports errors only on stderr.
+    The stderr marker uses \\warn, which needs psql 13 or newer.
+    """
+    
+    def __init__(self, db_name=DB_NAME):
+        # ON_ERROR_STOP is left off on purpose: it would end this long-lived process at
+        # the first failed statement. Errors are read from stderr instead
+        cmd = ["sudo", "-u", "postgres", "psql", "-d", db_name, "-X", "-q", "-A", "-t"]
+        self.process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1
+        )
+        self._command_count = 0
+        
+        # Drain stderr on a thread so a long error report can't fill the pipe and block psql
+        self._stderr_lines = queue.Queue()
+        self._stderr_reader = threading.Thread(target=self._read_stderr, daemon=True)
+        self._stderr_reader.start()
+    
+    def _read_stderr(self):
+        for line in self.process.stderr:
+            self._stderr_lines.put(line.rstrip("\n"))
+        self._stderr_lines.put(None)
+    
+    def _send(self, script):
+        """Write a script to psql and return (success, output) once its markers are echoed."""
+        self._command_count += 1
+        marker = f"__psql_done_{self._command_count}__"
+        self.process.stdin.write(f"{script}\n\\echo {marker}\n\\warn {marker}\n")
+        self.process.stdin.flush()
+        
+        lines = []
+        for line in self.process.stdout:
+            line = line.rstrip("\n")
+            if line == marker:
+                break
+            lines.append(line)
+        else:
+            return False, "psql process exited unexpectedly"
+        
+        errors = []
+        while True:
+            line = self._stderr_lines.get()
+            if line is None:
+                return False, "psql process exited unexpectedly"
+            if line == marker:
+                break
+            errors.append(line)
+        
+        # stderr also carries NOTICE and WARNING messages, which don't fail the command
+        error_output = "\n".join(errors).strip()
+        if any("ERROR:" in line or "FATAL:" in line for line in errors):
+            return False, error_output
+        return True, "\n".join(lines).strip()
+    
+    def execute(self, sql):
+        """
+        Execute SQL on the open psql process.
+        
+        Returns:
+            Tuple of (success, result) like run_sql_command.
+        """
+        sql = sql.strip()
+        if not sql.endswith(";"):
+            sql += ";"
+        return self._send(sql)
+    
+    def copy_rows(self, table, columns, rows):
+        """
+        Load rows into a table with COPY ... FROM STDIN in a single transaction.
+        
+        Args:
+            table: Quoted table name.
+            columns: List of column names.
+            rows: Iterable of row tuples (values are written as CSV).
+            
+        Returns:
+            Tuple of (success, result).
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerows(rows)
+        script = (
+            "BEGIN;\n"
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv);\n"
+            f"{buffer.getvalue()}\\.\n"
+            "COMMIT;"
+        )
+        return self._send(script)
+    
+    def close(self):
+        """Close stdin and wait for psql to exit."""
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.wait()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def run_sql_command(sql, params=None, psql=None):
     """
     Run a SQL command using sudo with the postgres user.
     
     Args:
         sql: SQL command to execute.
         params: Parameters to substitute in the SQL command.
+        psql: Optional PsqlSession to run the command on instead of a new subprocess.
         
     Returns:
         Tuple of (success, result) where result is the command output or error message.
@@ -59,21 +200,11 @@ def run_sql_command(sql, params=None):
                 
         print(f"Parameters: {log_params}")
         
-        for key, value in params.items():
-            # Convert value to string format suitable for SQL
-            if isinstance(value, str):
-                sql_value = f"'{value}'"
-            elif isinstance(value, (int, float)):
-                sql_value = str(value)
-            elif isinstance(value, datetime):
-                sql_value = f"'{value.isoformat()}'"
-            elif value is None:
-                sql_value = "NULL"
-            else:
-                sql_value = f"'{value}'"
-            
-            # Replace placeholder with value
-            sql = sql.replace(f"%({key})s", sql_value)
+        sql = substitute_params(sql, params)
+    
+    # Reuse the long-lived psql process when one is provided
+    if psql is not None:
+        return psql.execute(sql)
     
     # Execute the SQL command using sudo
     cmd = ["sudo", "-u", "postgres", "psql", "-d", DB_NAME, "-c", sql]
@@ -94,12 +225,14 @@ def run_sql_command(sql, params=None):
         print(f"Exception occurred: {str(e)}")
         return False, str(e)
 
-def create_job(scraper_name):
+def create_job(scraper_name, verify=True, psql=None):
     """
     Create a new job entry in the Jobs table.
     
     Args:
         scraper_name: Name of the scraper.
+        verify: Whether to re-select the inserted row to verify it (default: True).
+        psql: Optional PsqlSession to run the statements on.
         
     Returns:
         job_id: UUID of the created job or None if creation fails.
@@ -124,14 +257,16 @@ def create_job(scraper_name):
         "status": status
     }
     
-    success, result = run_sql_command(sql, params)
+    success, result = run_sql_command(sql, params, psql=psql)
     if success:
         print(f"Job created successfully with ID: {job_id}")
+        if not verify:
+            return job_id
         # Verify the job was created by querying it
         verify_sql = f"""
         SELECT * FROM "Jobs" WHERE job_id = '{job_id}';
         """
-        verify_success, verify_result = run_sql_command(verify_sql)
+        verify_success, verify_result = run_sql_command(verify_sql, psql=psql)
         if verify_success and job_id in verify_result:
             print(f"Verified job exists in database: {verify_result}")
         else:
@@ -141,7 +276,7 @@ def create_job(scraper_name):
         print(f"Error creating job: {result}")
         return None
 
-def update_job(job_id, status, total_products, end_time, execution_time):
+def update_job(job_id, status, total_products, end_time, execution_time, psql=None):
     """
     Update a job entry with final statistics.
     
@@ -151,6 +286,7 @@ def update_job(job_id, status, total_products, end_time, execution_time):
         total_products: Total number of products scraped.
         end_time: End time of the job.
         execution_time: Total execution time of the job in seconds.
+        psql: Optional PsqlSession to run the statement on.
     """
     print(f"\n--- Updating Job ---")
     print(f"Job ID: {job_id}")
@@ -176,7 +312,7 @@ def update_job(job_id, status, total_products, end_time, execution_time):
         "execution_time": execution_time
     }
     
-    success, result = run_sql_command(sql, params)
+    success, result = run_sql_command(sql, params, psql=psql)
     if success:
         print(f"Job {job_id} updated successfully")
     else:
@@ -188,7 +324,7 @@ def save_products(job_id, products):
     
     Args:
         job_id: UUID of the job that produced these products.
-        products: List of product data dictionaries to save.
+        products: List of product data dictionaries (or their raw JSON bytes) to save.
     """
     print(f"\n--- Saving Products ---")
     print(f"Job ID: {job_id}")
@@ -201,7 +337,10 @@ def save_products(job_id, products):
     # Save a sample product to a file for debugging
     sample_product = products[0] if products else {}
     with open("sample_product.json", "w") as f:
-        json.dump(sample_product, f, indent=2)
+        if isinstance(sample_product, dict):
+            json.dump(sample_product, f, indent=2)
+        else:
+            f.write(to_json_text(sample_product))
         print(f"Saved sample product to sample_product.json")
     
     saved_count = 0
@@ -215,13 +354,9 @@ def save_products(job_id, products):
         if i % 10 == 0:
             print(f"Processing product {i+1}/{len(products)}...")
         
-        # Get a preview of the product data for logging
-        product_preview = {k: str(v)[:50] + "..." if isinstance(v, str) and len(str(v)) > 50 else v 
-                         for k, v in list(product_data.items())[:5]}
-        
-        # Convert product_data to JSON string
+        # Convert product_data to JSON string, passing raw JSON bytes through as they are
         try:
-            data_json = json.dumps(product_data)
+            data_json = to_json_text(product_data)
             # For very large JSON, truncate the preview
             data_json_preview = data_json[:100] + "..." if len(data_json) > 100 else data_json
             
@@ -239,12 +374,12 @@ def save_products(job_id, products):
             
             # Only log detailed info for the first product and then every 10th
             if i == 0 or i % 10 == 0:
-                print(f"\nProduct {i+1} preview: {product_preview}")
-                print(f"JSON data preview: {data_json_preview}")
+                print(f"\nProduct {i+1} JSON data preview: {data_json_preview}")
             
             success, result = run_sql_command(sql, params)
             if success:
                 saved_count += 1
+                metrics.products_ingested.inc(storage="psql")
             else:
                 error_count += 1
                 print(f"Error saving product {i+1}: {result}")
@@ -265,4 +400,60 @@ def save_products(job_id, products):
     if verify_success:
         print(f"Verified products in database for job {job_id}: {verify_result}")
     else:
-        print(f"Warning: Could not verify products in database: {verify_result}") 
\ No newline at end of file
+        print(f"Warning: Could not verify products in database: {verify_result}") 
+
+def save_products_batched(job_id, products, batch_size=1000, psql=None):
+    """
+    Save scraped products to the Products table over one long-lived psql process.
+    
+    Products are sent as COPY data in batches, one transaction per batch, without
+    per-product subprocesses or verification queries. This path is opt-in: callers
+    that want it use it instead of save_products, which keeps its per-product
+    INSERTs and verification query.
+    
+    Args:
+        job_id: UUID of the job that produced these products.
+        products: List of product data dictionaries (or their raw JSON bytes) to save.
+        batch_size: Number of products per COPY batch (default: 1000).
+        psql: Optional open PsqlSession; a new one is opened and closed if not given.
+        
+    Returns:
+        saved_count: Number of products saved.
+    """
+    print(f"\n--- Saving Products (batched) ---")
+    print(f"Job ID: {job_id}")
+    print(f"Number of products to save: {len(products)}")
+    
+    if not products:
+        print("No products to save. Skipping database operation.")
+        return 0
+    
+    owns_session = psql is None
+    if owns_session:
+        psql = PsqlSession()
+    
+    saved_count = 0
+    try:
+        for start in range(0, len(products), batch_size):
+            batch = products[start:start + batch_size]
+            scraped_at = datetime.now().isoformat()
+            rows = [
+                (str(uuid.uuid4()), job_id, to_json_text(product_data), scraped_at)
+                for product_data in batch
+            ]
+            write_start = time.monotonic()
+            success, result = psql.copy_rows(
+                '"Products"', ["product_id", "job_id", "data", "scraped_at"], rows
+            )
+            if success:
+                saved_count += len(rows)
+                metrics.storage_write_duration.observe(time.monotonic() - write_start, storage="psql")
+                metrics.products_ingested.inc(len(rows), storage="psql")
+            else:
+                print(f"Error saving batch starting at product {start + 1}: {result}")
+    finally:
+        if owns_session:
+            psql.close()
+    
+    print(f"Successfully saved: {saved_count}/{len(products)}")
+    return saved_count
\ No newline at end of file
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test script for the raw product bytes helpers.
+
+Decodes a pretty-printed page, like the replay source's response files, and checks
+that every product's raw bytes stay on one line all the way to the NDJSON output.
+"""
+
+import os
+import sys
+import json
+
+# Add the project root to Python path to ensure modules can be found
+project_root = os.path.dirname(os.path.abspath(__file__))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.common.utils.jsonlib import loads_with_raw_items
+from src.common.utils.product_store import ProductStore
+from src.scrapers.lkq.products import ProductRecord
+
+PRODUCTS = [
+    {"id": 1, "partNumber": "A-1", "vehicle": {"year": 2010, "make": "Ford"}, "notes": "line\nbreak"},
+    {"id": 2, "partNumber": "B-2", "price": {"amount": 120.5, "currency": "USD"}},
+    {"id": 3, "partNumber": "C-3", "tags": ["engine", "used"]}
+]
+
+
+def test_indented_page_raw_items():
+    """Raw items of an indented page have no line breaks and decode to the products."""
+    for page in (json.dumps({"total": 3, "data": PRODUCTS}, indent=2),
+                 json.dumps({"total": 3, "data": PRODUCTS}, indent=2).replace("\n", "\r\n")):
+        document, raw_items = loads_with_raw_items(page.encode("utf-8"))
+        assert document["data"] == PRODUCTS
+        assert len(raw_items) == len(PRODUCTS)
+        for raw, product in zip(raw_items, PRODUCTS):
+            assert b"\n" not in raw and b"\r" not in raw, f"raw item spans lines: {raw!r}"
+            assert json.loads(raw) == product
+    print("Indented page: raw items are single-line JSON")
+
+
+def test_indented_page_ndjson():
+    """Stored raw items form valid NDJSON, one product per line."""
+    page = json.dumps({"data": PRODUCTS}, indent=2).encode("utf-8")
+    document, raw_items = loads_with_raw_items(page)
+    # Records keep the raw bytes, as the scraper's store does
+    store = ProductStore(record_type=ProductRecord)
+    store.append("job", document["data"], raw_items)
+    ndjson = b"".join(raw + b"\n" for raw in store.iter_raw("job"))
+    lines = ndjson.splitlines()
+    assert len(lines) == len(PRODUCTS)
+    assert [json.loads(line) for line in lines] == PRODUCTS
+    store.close()
+    print("Indented page: NDJSON has one product per line")
+
+
+if __name__ == "__main__":
+    test_indented_page_raw_items()
+    test_indented_page_ndjson()
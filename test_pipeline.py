@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script for the LKQ pipeline engine.
+
+Serves a malformed first page from the primary URL and checks that the pipeline
+falls back to the alternative URL and fetches that page again from there, the way
+the threaded engine switches URLs after a page it cannot parse.
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+# Add the project root to Python path to ensure modules can be found
+project_root = os.path.dirname(os.path.abspath(__file__))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.common.utils.async_http import FetchedResponse
+from src.scrapers.lkq import scraper
+from src.scrapers.lkq.context import CrawlContext
+from src.scrapers.lkq.pipeline import run_pipeline_engine
+from src.scrapers.lkq.replay import page_from_url
+
+PRIMARY_URL = "http://primary.test/api/catalog"
+ALTERNATIVE_URL = "http://alternative.test/api/catalog"
+PAGES = 3
+TAKE = 2
+
+
+class FakeTransport:
+    """Serves a malformed page 0 from the primary URL and good pages everywhere else."""
+
+    def __init__(self):
+        self.requested = []
+
+    def fetch(self, url, worker_id=None):
+        page_num = page_from_url(url)
+        self.requested.append((url.split("?")[0], page_num))
+        if url.startswith(PRIMARY_URL) and page_num == 0:
+            return FetchedResponse(200, b'{"data": [{"id": "broken"', url)
+        products = [{"id": f"{page_num}-{i}"} for i in range(TAKE)] if page_num < PAGES else []
+        return FetchedResponse(200, json.dumps({"data": products}).encode("utf-8"), url)
+
+
+class FakeArchive:
+    """Keeps archived pages in memory instead of writing them to disk."""
+
+    def __init__(self):
+        self.pages = []
+
+    def append(self, page_num, content, **metadata):
+        self.pages.append(page_num)
+
+
+def test_pipeline_malformed_page():
+    """The malformed page is fetched again from the alternative URL and its products stored."""
+    stored = []
+    context = CrawlContext("test-pipeline", TAKE, product_sink=lambda products, raw_products: stored.extend(products))
+    context.replay_transport = FakeTransport()
+    context.response_archive = FakeArchive()
+    context.alternative_urls = [ALTERNATIVE_URL]
+
+    working_dir = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Sample products are written relative to the working directory
+            os.chdir(temp_dir)
+            os.makedirs(scraper.RESPONSE_DIR, exist_ok=True)
+            total_products, pages = run_pipeline_engine(context, PRIMARY_URL, 1)
+            context.flush_products()
+    finally:
+        os.chdir(working_dir)
+
+    assert (ALTERNATIVE_URL, 0) in context.replay_transport.requested, "page 0 was not fetched from the alternative URL"
+    stored_ids = sorted(product["id"] for product in stored)
+    expected_ids = sorted(f"{page_num}-{i}" for page_num in range(PAGES) for i in range(TAKE))
+    assert stored_ids == expected_ids, f"expected {expected_ids}, got {stored_ids}"
+    assert total_products == PAGES * TAKE
+    print(f"Pipeline recovered the malformed page: {total_products} products across {pages} pages")
+
+
+if __name__ == "__main__":
+    test_pipeline_malformed_page()